@@ -9,12 +9,47 @@ def create_app(config_class=Config):
     """Create and configure the Flask application"""
     app = Flask(__name__, template_folder="../templates", static_folder="../static")
     app.config.from_object(config_class)
+
+    if app.config.get("PROXY_HOPS"):
+        # request.remote_addr becomes the address the nearest trusted proxy saw
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["PROXY_HOPS"])
+
+    from app.utils.session_store import init_session_store
+    init_session_store(app)
+
+    from app.utils.rate_limit import init_rate_limiter
+    init_rate_limiter(app)
+
+    from app.utils.chat_analytics import init_chat_analytics
+    init_chat_analytics(app)
+
+    from app.utils.lesson_bundle import init_lesson_bundle
+    init_lesson_bundle(app)
+
+    from app.utils.engine_pool import init_engine_pool
+    init_engine_pool(app)
+
+    from app.utils.analysis_queue import init_analysis_queue
+    init_analysis_queue(app)
+
+    from app.utils.sse import init_sse
+    init_sse(app)
+
+    from app.tournaments.live import init_live_tournaments
+    init_live_tournaments(app)
+
+    from app.utils.online_games import init_online_games
+    init_online_games(app)
     
     # Register blueprints
     from app.routes.main import bp as main_bp
     from app.routes.auth import bp as auth_bp
     from app.routes.admin import bp as admin_bp
     from app.routes.student import bp as student_bp
+    from app.routes.learn import bp as learn_bp
+    from app.routes.play import bp as play_bp
+    from app.routes.tournaments import bp as tournaments_bp
     from app.api.chat import chat_bp
     
     app.register_blueprint(chat_bp)
@@ -22,6 +57,9 @@ def create_app(config_class=Config):
     app.register_blueprint(auth_bp)
     app.register_blueprint(admin_bp)
     app.register_blueprint(student_bp)
+    app.register_blueprint(learn_bp)
+    app.register_blueprint(play_bp)
+    app.register_blueprint(tournaments_bp)
     
     # Context processor for user role
     from app.utils.helpers import inject_user_role
@@ -1,11 +1,13 @@
 #Help taken from deepseek to fill the deatials. 
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 import re
 import random
 import time
 from firebase_admin import auth
 from app.utils.firebase_init import db
-from datetime import datetime
+from app.utils.faq_index import FAQIndex
+from app.utils.helpers import client_key
+from app.utils.rate_limit import rate_limit
 
 chat_bp = Blueprint("chat", __name__)
 
@@ -48,6 +50,347 @@ ENCOURAGEMENTS = [
     "I'm excited to help you with this! 😊",
 ]
 
+ABOUT_REPLY = (
+    "🏆 <strong>About CHESS CLASS (SRIVASTAVA)</strong> 🏆<br><br>"
+    "We're a chess coaching family in Nagpur! 🙏❤️<br><br>"
+    
+    "<strong>Our Legacy:</strong><br>"
+    "• <strong>10+ years</strong> of excellence in chess education 📅<br>"
+    "• <strong>800+ students</strong> trained successfully 👨‍🎓<br>"
+    "• <strong>4.9★ rating</strong> from 41+ happy reviews ⭐<br>"
+    "• Located in Dharampeth, Nagpur 📍<br><br>"
+    
+    "<strong>What Makes Us Special:</strong><br>"
+    "✨ <em>Community & Growth</em> - Students build lifelong friendships 👫<br>"
+    "✨ <em>Expert Instructors</em> - Kind, generous, and highly skilled coaches 👨‍🏫<br>"
+    "✨ <em>Personalized Coaching</em> - Tailored strategies for each student 🎯<br>"
+    "✨ <em>Comprehensive Resources</em> - PDFs, books, and study materials 📚<br>"
+    "✨ <em>Weekly Tournaments</em> - Regular competitive practice 🏅<br><br>"
+    
+    "<strong>Led by Srivastav Sir</strong> 👑 - A passionate chess mentor dedicated to nurturing talent at every level.<br><br>"
+    
+    "We provide a welcoming environment where passion meets excellence! 🎯✨<br><br>"
+    
+    "Want to know about our batches or how to join? 😊"
+)
+
+INSTRUCTOR_REPLY = (
+    "👨‍🏫 <strong>Meet Our Lead Instructor - Srivastav Sir</strong> 👑<br><br>"
+    
+    "Srivastav Sir is the heart and soul of our chess academy! ❤️ With over 10 years of teaching experience, "
+    "he's guided hundreds of students from beginners to tournament winners. 🏆<br><br>"
+    
+    "<strong>Teaching Style:</strong><br>"
+    "• ❤️ Patient and encouraging<br>"
+    "• 🎯 Focuses on individual student needs<br>"
+    "• 📚 Provides comprehensive study materials<br>"
+    "• 🏆 Proven track record of tournament success<br>"
+    "• 🤝 Creates a friendly, supportive environment<br><br>"
+    
+    "Our reviews speak for themselves - 4.9★ rating from delighted students and parents! ⭐⭐⭐⭐⭐<br><br>"
+    
+    "Want to learn under his expert guidance? Ask me about enrollment! 😊"
+)
+
+BATCH_REPLY = (
+    "♟️ <strong>Our Chess Class Batches</strong> ⏰<br><br>"
+    
+    "📍 <strong>Offline Coaching (Nagpur Center)</strong> 🏢<br>"
+    "• <em>Beginner Batch</em>: Mon, Wed, Fri (4PM – 5PM) 🌱<br>"
+    "  Perfect for those just starting their chess journey!<br><br>"
+    
+    "• <em>Intermediate Batch</em>: Tue, Thu, Sat (5PM – 6:30PM) 🎯<br>"
+    "  For players with basic knowledge looking to improve<br><br>"
+    
+    "• <em>Advanced Batch</em>: Tue, Thu, Sat (6:30PM – 8PM) ⭐<br>"
+    "  Intense training for competitive players<br><br>"
+    
+    "💻 <strong>Live Online Classes</strong> 🌐<br>"
+    "• <em>Batch A</em>: Tue, Thu, Sat (4PM – 5PM) 🖥️<br>"
+    "• <em>Batch B</em>: Mon, Wed, Fri (6PM – 7PM) 💻<br>"
+    "• <em>Weekend Intensive</em>: Sat, Sun (10AM – 12PM) 🚀<br><br>"
+    
+    "🎯 <strong>What You Get:</strong><br>"
+    "✓ Small batch sizes for personalized attention 👥<br>"
+    "✓ Interactive learning sessions 🎓<br>"
+    "✓ Regular homework and assignments 📝<br>"
+    "✓ Weekly progress tracking 📈<br><br>"
+    
+    "Which batch suits your schedule best? I can help you choose! 😊"
+)
+
+FEES_REPLY = (
+    "💰 <strong>Fee Structure - Transparent & Affordable</strong> 💸<br><br>"
+    
+    "📅 <strong>Monthly Plan</strong> 📆<br>"
+    "• ₹3,000 per student 💵<br>"
+    "• All study materials included 📚<br>"
+    "• Sunday tournaments included 🏆<br><br>"
+    
+    "🎯 <strong>Quarterly Plan (Most Popular! ⭐)</strong> 🚀<br>"
+    "• ₹7,500 for 3 months 💰<br>"
+    "• <em>No special offers or discounts available</em> 🚫<br>"
+    "• All benefits included ✅<br><br>"
+    
+    "💳 <strong>Payment Methods:</strong><br>"
+    "• UPI: 8830435532@paytm 📱<br>"
+    "• GPay/PhonePe: 8830435532 💰<br>"
+    "• Cash at center 💵<br>"
+    "• Bank transfer available 🏦<br><br>"
+    
+    "📌 <strong>Note:</strong> Fees are payable in advance. After payment, admin will verify details and allot your batch. ⏳<br><br>"
+    
+    "Ready to enroll? The quarterly plan offers continuous learning! 🎁"
+)
+
+TOURNAMENT_REPLY = (
+    "🏆 <strong>Weekly Chess Tournaments</strong> 🎮<br><br>"
+    
+    "📅 <strong>Every Sunday</strong> 📆<br>"
+    "• Time: will be specified in notice ⏰<br>"
+    "• Format: Swiss System (5 rounds) 🔄<br>"
+    "• Time Control: 3+2 minutes ⏱️<br>"
+    "• Entry Fee: <strong>FREE for enrolled students!</strong> 🎉🎊<br>"
+    "• Prizes: Trophies, Certificates & Chess books 🏅📜📚<br><br>"
+    
+    "🎯 <strong>Benefits of Playing Tournaments:</strong><br>"
+    "• Real competitive experience 🥊<br>"
+    "• Track your progress 📈<br>"
+    "• Build confidence 💪<br>"
+    "• Learn from mistakes 🤔<br>"
+    "• Make chess friends! 👫🎉<br><br>"
+    
+    "Ready to participate in the next tournament? I can help you register! 🎮🚀"
+)
+
+ENROLLMENT_REPLY = (
+    "🎯 <strong>How to Join - Step by Step</strong> 📋<br><br>"
+    
+    "📋 <strong>Registration Process:</strong><br><br>"
+    
+    "1️⃣ <strong>Sign Up</strong> 📝<br>"
+    "   • Go to the website's <strong>Sign Up page</strong> (top right corner) ↗️<br>"
+    "   • Register as a student 👨‍🎓<br>"
+    "   • Fill in your details accurately ✍️<br><br>"
+    
+    "2️⃣ <strong>Fee Payment</strong> 💰<br>"
+    "   • Choose your plan (Monthly ₹3,000 or Quarterly ₹7,500) 💵<br>"
+    "   • Pay via UPI: <strong>8830435532</strong> 📱<br>"
+    "   • Save your payment receipt 🧾<br><br>"
+    
+    "3️⃣ <strong>Verification & Batch Allotment</strong> ⏳<br>"
+    "   • Admin will verify your details 👨‍💼<br>"
+    "   • Once verified, you'll be allotted a batch ✅<br>"
+    "   • You'll receive confirmation via phone/email 📞📧<br><br>"
+    
+    "4️⃣ <strong>Start Learning</strong> 🚀<br>"
+    "   • Attend your first class 🎓<br>"
+    "   • Receive study materials 📚<br>"
+    "   • Begin your chess journey! ♟️🎉<br><br>"
+    
+    "📞 <strong>For Assistance:</strong><br>"
+    "Call/WhatsApp: <strong>8830435532</strong> (Srivastav Sir) 📱<br><br>"
+    
+    "Ready to make your first move? ♟️ Start by signing up on the website! 🚀"
+)
+
+AGE_REPLY = (
+    "👨‍👩‍👧‍👦 <strong>Eligibility - Age Requirements</strong> 🎂<br><br>"
+    
+    "We accept students aged <strong>0 to 25 years only</strong>. 📅<br><br>"
+    
+    "<strong>Age Groups:</strong><br>"
+    "• <strong>Kids (5-12 years)</strong>: Fun, game-based learning 🎮😄<br>"
+    "• <strong>Teens (13-18 years)</strong>: Competitive training 🏆💪<br>"
+    "• <strong>Young Adults (19-25 years)</strong>: Advanced coaching 🎓🚀<br><br>"
+    
+    "<strong>Note:</strong><br>"
+    "• Children below 5 years: Can join with parental guidance 👨‍👦<br>"
+    "• Above 25 years: Unfortunately not accepted in our regular batches ❌<br><br>"
+    
+    "✨ <strong>No prior chess experience needed!</strong> 🎉<br>"
+    "We teach complete beginners to advanced players. 🌱⭐<br><br>"
+    
+    "How old are you? I can suggest the perfect batch! 😊🎯"
+)
+
+DISCOUNT_REPLY = (
+    "💸 <strong>Fee Information</strong> 📋<br><br>"
+    
+    "Our fee structure is:<br>"
+    "• Monthly: ₹3,000 💵<br>"
+    "• Quarterly: ₹7,500 💰<br><br>"
+    
+    "Currently, <strong>no special discounts or offers are available</strong>. 🚫<br><br>"
+    
+    "We maintain transparent pricing to ensure quality coaching for all students. ✅<br><br>"
+    
+    "The quarterly plan provides continuous learning at a consistent rate. 📅<br><br>"
+    
+    "Ready to enroll at our standard rates? 😊🎯"
+)
+
+LOCATION_REPLY = (
+    "📍 <strong>We're Located in Nagpur!</strong> 🗺️<br><br>"
+    
+    "<strong>Address:</strong><br>"
+    "Chess Class (Srivastava) ♟️<br>"
+    "Flat No. 104, Vithal Rukmini Apartments 🏢<br>"
+    "Dharampeth, Nagpur - 440010 📍<br>"
+    "Maharashtra, India 🇮🇳<br><br>"
+    
+    "<strong>🗺️ Landmark:</strong><br>"
+    "Near Dharampeth Post Office 📮<br>"
+    "10 minutes from Nagpur Railway Station 🚂<br><br>"
+    
+    "<strong>🚗 Easy to Reach:</strong><br>"
+    "• Auto/Cab: 'Vithal Rukmini Apartments, Dharampeth' 🚕<br>"
+    "• Parking: Available 🅿️<br><br>"
+    
+    "📞 Need directions? Call: <strong>8830435532</strong> 📱<br><br>"
+    
+    "Serving Nagpur's chess community for 10+ years! ⏳🎉<br><br>"
+    
+    "Planning to visit? Center open Mon-Sat (4PM-8PM) 😊⏰"
+)
+
+CAPABILITIES_REPLY = (
+    "🤖 <strong>I'm Your Chess Assistant - Here's How I Can Help!</strong> 🎯<br><br>"
+    
+    "I'm an assistant specialized in everything about <strong>Chess Class (Srivastava)</strong>! ♟️❤️<br><br>"
+    
+    "<strong>📋 I can help you with:</strong><br><br>"
+    
+    "🕐 <strong>Class Information:</strong><br>"
+    "• Batch timings and schedules ⏰<br>"
+    "• Online vs offline options 💻🏢<br>"
+    "• Age groups and eligibility 👶👨<br><br>"
+    
+    "💰 <strong>Fee & Payment:</strong><br>"
+    "• Fee structure and plans 💵<br>"
+    "• Payment methods 📱<br>"
+    "• Enrollment process 📝<br><br>"
+    
+    "📝 <strong>Enrollment:</strong><br>"
+    "• How to join 🚀<br>"
+    "• Registration steps 📋<br>"
+    "• Verification process ✅<br><br>"
+    
+    "🏆 <strong>Tournaments & Events:</strong><br>"
+    "• Weekly tournament info 📅<br>"
+    "• Special events 🎉<br>"
+    "• Competition details 🏅<br><br>"
+    
+    "♟️ <strong>Chess Learning:</strong><br>"
+    "• Curriculum details 📚<br>"
+    "• Study materials 🎒<br>"
+    "• Benefits of chess 🧠<br><br>"
+    
+    "📞 <strong>Contact & Location:</strong><br>"
+    "• Address and directions 🗺️<br>"
+    "• Phone numbers 📱<br>"
+    "• Center timings ⏰<br><br>"
+    
+    "⭐ <strong>About Us:</strong><br>"
+    "• Our story and achievements 📖<br>"
+    "• Student reviews ⭐<br>"
+    "• Instructor information 👨‍🏫<br><br>"
+    
+    "💬 I'm available to chat! 😊<br>"
+    "Just ask me anything about chess coaching, and I'll do my best to help! ❤️<br><br>"
+    
+    "What would you like to know first? 🤔"
+)
+
+CONTACT_REPLY = (
+    "📞 <strong>Contact Chess Class (Srivastava)</strong> 📱<br><br>"
+    "• Call/WhatsApp: <strong>8830435532</strong> (Srivastav Sir) 📱<br>"
+    "• UPI: 8830435532@paytm 💳<br>"
+    "• Center open Mon-Sat (4PM-8PM) ⏰<br><br>"
+    "Feel free to call for anything I can't answer here! 😊"
+)
+
+# FAQ corpus for the retrieval fallback: paraphrases the keyword branches miss
+# or hit on a single word (including Hinglish), each pointing at one of the
+# answers above. benchmarks/chat_bench.py checks every one still reaches it.
+FAQ_ENTRIES = [
+    ([
+        "what do you charge per month",
+        "monthly plan quarterly plan",
+        "kitne paise lagte hai",
+        "kitna lagega coaching ka",
+        "upi gpay phonepe bank transfer",
+        "can i pay by cash at the center",
+        "rupees per student per month",
+    ], FEES_REPLY),
+    ([
+        "online classes available",
+        "do you teach online on zoom",
+        "offline batch at nagpur center",
+        "beginner intermediate advanced batch",
+        "weekend intensive saturday",
+        "morning or evening slot",
+        "kab hoti hai padhai",
+        "kitne baje aana hai",
+    ], BATCH_REPLY),
+    ([
+        "swiss system five rounds",
+        "blitz 3+2 time control",
+        "prizes trophies certificates",
+        "do you conduct rated play",
+        "weekly competitive practice",
+    ], TOURNAMENT_REPLY),
+    ([
+        "sign up as student on the website",
+        "admission kaise le",
+        "kaise judna hai",
+        "new student verification and batch allotment",
+        "what documents or receipt after paying",
+    ], ENROLLMENT_REPLY),
+    ([
+        "is my son too young",
+        "my daughter is 6",
+        "beginner with no experience",
+        "complete beginner never played",
+        "can parents learn too",
+        "chote bacche ke liye",
+    ], AGE_REPLY),
+    ([
+        "where is the academy",
+        "directions to the center",
+        "railway station distance",
+        "is parking available",
+        "kahan par hai class",
+        "vithal rukmini apartments",
+    ], LOCATION_REPLY),
+    ([
+        "phone number",
+        "contact number",
+        "whatsapp number",
+        "how can i call you",
+        "talk to a human",
+        "number do",
+    ], CONTACT_REPLY),
+    ([
+        "how many students have you trained",
+        "reviews and rating of the academy",
+        "how many years of experience",
+        "pdf books study material provided",
+        "why should i choose you",
+    ], ABOUT_REPLY),
+    ([
+        "who will teach my child",
+        "teaching style of srivastav",
+        "is the faculty experienced",
+    ], INSTRUCTOR_REPLY),
+    ([
+        "is there a free trial",
+        "kuch kam ho sakta hai",
+    ], DISCOUNT_REPLY),
+]
+
+faq_index = FAQIndex(FAQ_ENTRIES)
+
 def get_session_id():
     """Get or create a unique session ID for tracking easter egg state"""
     # Try to get user ID from Firebase auth
@@ -60,33 +403,26 @@ def get_session_id():
             pass
     
     # Fallback: use IP address + user agent as session ID for guests
-    ip = request.headers.get('X-Forwarded-For', request.remote_addr)
-    user_agent = request.headers.get('User-Agent', 'unknown')
-    return f"guest_{hash(f'{ip}_{user_agent}')}"
+    return f"guest_{client_key()}"
 
 def get_easter_egg_state(session_id):
-    """Get easter egg state from Firestore"""
+    """Get easter egg state from the session store (expires after CHAT_SESSION_TTL)"""
     try:
-        doc = db.collection("chat_sessions").document(session_id).get()
-        if doc.exists:
-            data = doc.to_dict()
-            # Check if state is still valid (within last 5 minutes)
-            if data.get('timestamp'):
-                time_diff = (datetime.now() - data['timestamp'].replace(tzinfo=None)).total_seconds()
-                if time_diff < 300:  # 5 minutes
-                    return data.get('easter_egg_active', False), data.get('easter_egg_stage', 0)
+        state = current_app.extensions["chat_session_store"].get(session_id)
+        if state:
+            return state.get('easter_egg_active', False), state.get('easter_egg_stage', 0)
     except Exception as e:
         print(f"Error getting easter egg state: {e}")
     return False, 0
 
 def set_easter_egg_state(session_id, active, stage):
-    """Set easter egg state in Firestore"""
+    """Set easter egg state in the session store"""
     try:
-        db.collection("chat_sessions").document(session_id).set({
-            'easter_egg_active': active,
-            'easter_egg_stage': stage,
-            'timestamp': datetime.now()
-        }, merge=True)
+        store = current_app.extensions["chat_session_store"]
+        if active:
+            store.set(session_id, {'easter_egg_active': active, 'easter_egg_stage': stage})
+        else:
+            store.delete(session_id)
         print(f"🥚 Easter egg state saved: active={active}, stage={stage}")
     except Exception as e:
         print(f"Error setting easter egg state: {e}")
@@ -123,11 +459,35 @@ def get_random_response(responses):
     """Pick a random response from list"""
     return random.choice(responses)
 
+def record_intent(intent, message=None):
+    """Count a matched intent in memory; flushed to storage in periodic batches"""
+    analytics = current_app.extensions.get("chat_analytics")
+    if analytics:
+        analytics.record(intent, message)
+
 def calculate_similarity(text, keywords):
     """Calculate how many keywords match"""
     return sum(1 for keyword in keywords if keyword in text)
 
+def weak_match_reply(text, keywords):
+    """
+    FAQ reply for a message that hits only one of a branch's keywords.
+    Single words like "class", "time", "game" or "start" turn up in questions
+    about something else, so a confident FAQ match answers those instead.
+    """
+    if calculate_similarity(text, keywords) != 1:
+        return None
+    faq_reply = faq_index.best_answer(text)
+    if not faq_reply:
+        return None
+    record_intent("faq")
+    return jsonify({"reply": format_response(faq_reply), "close_chat": False})
+
 @chat_bp.route("/chat", methods=["POST"])
+@rate_limit("chat", body={
+    "reply": "⏳ Whoa, that's a lot of messages! Please wait a minute before asking again. 🙏",
+    "close_chat": False,
+})
 def chat():
     try:
         data = request.get_json()
@@ -175,7 +535,9 @@ def chat():
             })
         
         # Simulate natural thinking delay
-        time.sleep(random.uniform(0.3, 0.9))
+        delay_min, delay_max = current_app.config.get("CHAT_REPLY_DELAY", (0.3, 0.9))
+        if delay_max > 0:
+            time.sleep(random.uniform(delay_min, delay_max))
         
         # --- GREETINGS (expanded) ---
         greeting_patterns = [
@@ -194,6 +556,7 @@ def chat():
             else:
                 greeting = random.choice(GREETINGS)
                 replies = [greeting.format(name=user_name)]
+            record_intent("greeting")
             return jsonify({"reply": format_response(random.choice(replies)), "close_chat": False})
 
         # --- FAREWELL (expanded) ---
@@ -206,6 +569,7 @@ def chat():
             farewell = get_random_response(FAREWELLS)
             if is_student:
                 farewell = f"Keep practicing, {user_name}! 💪 " + farewell
+            record_intent("farewell")
             return jsonify({"reply": format_response(farewell.format(name=user_name)), "close_chat": False})
 
         # --- HOW ARE YOU / SMALL TALK ---
@@ -217,6 +581,7 @@ def chat():
                 "I'm fantastic! 🎉 Helping people learn chess makes my day. 😄 What would you like to know?",
                 "Couldn't be better! 😎 I love talking about chess. ♟️ How are you doing?",
             ]
+            record_intent("small_talk")
             return jsonify({"reply": format_response(random.choice(replies)), "close_chat": False})
 
         # --- WHO ARE YOU / ABOUT BOT ---
@@ -236,60 +601,32 @@ def chat():
                 "My job is to make your experience smooth and answer any questions you have about our coaching, "
                 "whether it's about batches, fees, tournaments, or how to join. I'm always here to help! 🥰"
             ]
+            record_intent("about_bot")
             return jsonify({"reply": format_response(random.choice(replies)), "close_chat": False})
 
         # --- ABOUT CHESS CLASS SRIVASTAVA ---
         about_keywords = ["about", "who is", "tell me", "information", "details", "srivastava", "shrivastav", "shrivastava"]
         if calculate_similarity(message_lower, about_keywords) >= 1 and any(x in message_lower for x in ["class", "coaching", "center", "academy", "institute"]):
-            reply = (
-                "🏆 <strong>About CHESS CLASS (SRIVASTAVA)</strong> 🏆<br><br>"
-                "We're a chess coaching family in Nagpur! 🙏❤️<br><br>"
-                
-                "<strong>Our Legacy:</strong><br>"
-                "• <strong>10+ years</strong> of excellence in chess education 📅<br>"
-                "• <strong>800+ students</strong> trained successfully 👨‍🎓<br>"
-                "• <strong>4.9★ rating</strong> from 41+ happy reviews ⭐<br>"
-                "• Located in Dharampeth, Nagpur 📍<br><br>"
-                
-                "<strong>What Makes Us Special:</strong><br>"
-                "✨ <em>Community & Growth</em> - Students build lifelong friendships 👫<br>"
-                "✨ <em>Expert Instructors</em> - Kind, generous, and highly skilled coaches 👨‍🏫<br>"
-                "✨ <em>Personalized Coaching</em> - Tailored strategies for each student 🎯<br>"
-                "✨ <em>Comprehensive Resources</em> - PDFs, books, and study materials 📚<br>"
-                "✨ <em>Weekly Tournaments</em> - Regular competitive practice 🏅<br><br>"
-                
-                "<strong>Led by Srivastav Sir</strong> 👑 - A passionate chess mentor dedicated to nurturing talent at every level.<br><br>"
-                
-                "We provide a welcoming environment where passion meets excellence! 🎯✨<br><br>"
-                
-                "Want to know about our batches or how to join? 😊"
-            )
+            reply = ABOUT_REPLY
+            record_intent("about")
             return jsonify({"reply": format_response(reply), "close_chat": False})
 
         # --- INSTRUCTOR / TEACHER / COACH INFO ---
-        if any(x in message_lower for x in ["teacher", "instructor", "coach", "sir", "mentor", "trainer", "who teaches", "srivastav sir"]):
-            reply = (
-                "👨‍🏫 <strong>Meet Our Lead Instructor - Srivastav Sir</strong> 👑<br><br>"
-                
-                "Srivastav Sir is the heart and soul of our chess academy! ❤️ With over 10 years of teaching experience, "
-                "he's guided hundreds of students from beginners to tournament winners. 🏆<br><br>"
-                
-                "<strong>Teaching Style:</strong><br>"
-                "• ❤️ Patient and encouraging<br>"
-                "• 🎯 Focuses on individual student needs<br>"
-                "• 📚 Provides comprehensive study materials<br>"
-                "• 🏆 Proven track record of tournament success<br>"
-                "• 🤝 Creates a friendly, supportive environment<br><br>"
-                
-                "Our reviews speak for themselves - 4.9★ rating from delighted students and parents! ⭐⭐⭐⭐⭐<br><br>"
-                
-                "Want to learn under his expert guidance? Ask me about enrollment! 😊"
-            )
+        instructor_keywords = ["teacher", "instructor", "coach", "sir", "mentor", "trainer", "who teaches", "srivastav sir"]
+        if any(x in message_lower for x in instructor_keywords):
+            weak = weak_match_reply(message_lower, instructor_keywords)
+            if weak:
+                return weak
+            reply = INSTRUCTOR_REPLY
+            record_intent("instructor")
             return jsonify({"reply": format_response(reply), "close_chat": False})
 
         # --- BATCH DETAILS (expanded) ---
         batch_keywords = ["batch", "timing", "class", "schedule", "time", "when", "availability", "session", "hours", "days"]
         if calculate_similarity(message_lower, batch_keywords) >= 1:
+            weak = weak_match_reply(message_lower, batch_keywords)
+            if weak:
+                return weak
             thinking = get_random_response(THINKING_PHRASES)
             
             if is_student:
@@ -310,145 +647,49 @@ def chat():
                 )
             else:
                 reply = f"{thinking}<br><br>"
-                reply += (
-                    "♟️ <strong>Our Chess Class Batches</strong> ⏰<br><br>"
-                    
-                    "📍 <strong>Offline Coaching (Nagpur Center)</strong> 🏢<br>"
-                    "• <em>Beginner Batch</em>: Mon, Wed, Fri (4PM – 5PM) 🌱<br>"
-                    "  Perfect for those just starting their chess journey!<br><br>"
-                    
-                    "• <em>Intermediate Batch</em>: Tue, Thu, Sat (5PM – 6:30PM) 🎯<br>"
-                    "  For players with basic knowledge looking to improve<br><br>"
-                    
-                    "• <em>Advanced Batch</em>: Tue, Thu, Sat (6:30PM – 8PM) ⭐<br>"
-                    "  Intense training for competitive players<br><br>"
-                    
-                    "💻 <strong>Live Online Classes</strong> 🌐<br>"
-                    "• <em>Batch A</em>: Tue, Thu, Sat (4PM – 5PM) 🖥️<br>"
-                    "• <em>Batch B</em>: Mon, Wed, Fri (6PM – 7PM) 💻<br>"
-                    "• <em>Weekend Intensive</em>: Sat, Sun (10AM – 12PM) 🚀<br><br>"
-                    
-                    "🎯 <strong>What You Get:</strong><br>"
-                    "✓ Small batch sizes for personalized attention 👥<br>"
-                    "✓ Interactive learning sessions 🎓<br>"
-                    "✓ Regular homework and assignments 📝<br>"
-                    "✓ Weekly progress tracking 📈<br><br>"
-                    
-                    "Which batch suits your schedule best? I can help you choose! 😊"
-                )
+                reply += BATCH_REPLY
+            record_intent("batch")
             return jsonify({"reply": format_response(reply), "close_chat": False})
 
         # --- FEES (expanded) ---
         fee_keywords = ["fee", "fees", "price", "cost", "charge", "payment", "how much", "amount", "money", "pay", "expensive", "afford", "cheap"]
         if calculate_similarity(message_lower, fee_keywords) >= 1:
-            reply = (
-                "💰 <strong>Fee Structure - Transparent & Affordable</strong> 💸<br><br>"
-                
-                "📅 <strong>Monthly Plan</strong> 📆<br>"
-                "• ₹3,000 per student 💵<br>"
-                "• All study materials included 📚<br>"
-                "• Sunday tournaments included 🏆<br><br>"
-                
-                "🎯 <strong>Quarterly Plan (Most Popular! ⭐)</strong> 🚀<br>"
-                "• ₹7,500 for 3 months 💰<br>"
-                "• <em>No special offers or discounts available</em> 🚫<br>"
-                "• All benefits included ✅<br><br>"
-                
-                "💳 <strong>Payment Methods:</strong><br>"
-                "• UPI: 8830435532@paytm 📱<br>"
-                "• GPay/PhonePe: 8830435532 💰<br>"
-                "• Cash at center 💵<br>"
-                "• Bank transfer available 🏦<br><br>"
-                
-                "📌 <strong>Note:</strong> Fees are payable in advance. After payment, admin will verify details and allot your batch. ⏳<br><br>"
-                
-                "Ready to enroll? The quarterly plan offers continuous learning! 🎁"
-            )
+            weak = weak_match_reply(message_lower, fee_keywords)
+            if weak:
+                return weak
+            reply = FEES_REPLY
+            record_intent("fees")
             return jsonify({"reply": format_response(reply), "close_chat": False})
 
         # --- TOURNAMENTS (expanded) ---
         tournament_keywords = ["tournament", "competition", "contest", "match", "game", "event", "championship", "sunday"]
         if calculate_similarity(message_lower, tournament_keywords) >= 1:
-            reply = (
-                "🏆 <strong>Weekly Chess Tournaments</strong> 🎮<br><br>"
-                
-                "📅 <strong>Every Sunday</strong> 📆<br>"
-                "• Time: will be specified in notice ⏰<br>"
-                "• Format: Swiss System (5 rounds) 🔄<br>"
-                "• Time Control: 3+2 minutes ⏱️<br>"
-                "• Entry Fee: <strong>FREE for enrolled students!</strong> 🎉🎊<br>"
-                "• Prizes: Trophies, Certificates & Chess books 🏅📜📚<br><br>"
-                
-                "🎯 <strong>Benefits of Playing Tournaments:</strong><br>"
-                "• Real competitive experience 🥊<br>"
-                "• Track your progress 📈<br>"
-                "• Build confidence 💪<br>"
-                "• Learn from mistakes 🤔<br>"
-                "• Make chess friends! 👫🎉<br><br>"
-                
-                "Ready to participate in the next tournament? I can help you register! 🎮🚀"
-            )
+            weak = weak_match_reply(message_lower, tournament_keywords)
+            if weak:
+                return weak
+            reply = TOURNAMENT_REPLY
+            record_intent("tournament")
             return jsonify({"reply": format_response(reply), "close_chat": False})
 
         # --- ENROLLMENT / REGISTRATION PROCESS ---
         enroll_keywords = ["enroll", "join", "admission", "register", "sign up", "become student", "how to join", "start", "registration", "apply", "admission process"]
         if calculate_similarity(message_lower, enroll_keywords) >= 1:
+            weak = weak_match_reply(message_lower, enroll_keywords)
+            if weak:
+                return weak
             encouragement = random.choice(ENCOURAGEMENTS)
-            reply = (
-                f"{encouragement}<br><br>"
-                "🎯 <strong>How to Join - Step by Step</strong> 📋<br><br>"
-                
-                "📋 <strong>Registration Process:</strong><br><br>"
-                
-                "1️⃣ <strong>Sign Up</strong> 📝<br>"
-                "   • Go to the website's <strong>Sign Up page</strong> (top right corner) ↗️<br>"
-                "   • Register as a student 👨‍🎓<br>"
-                "   • Fill in your details accurately ✍️<br><br>"
-                
-                "2️⃣ <strong>Fee Payment</strong> 💰<br>"
-                "   • Choose your plan (Monthly ₹3,000 or Quarterly ₹7,500) 💵<br>"
-                "   • Pay via UPI: <strong>8830435532</strong> 📱<br>"
-                "   • Save your payment receipt 🧾<br><br>"
-                
-                "3️⃣ <strong>Verification & Batch Allotment</strong> ⏳<br>"
-                "   • Admin will verify your details 👨‍💼<br>"
-                "   • Once verified, you'll be allotted a batch ✅<br>"
-                "   • You'll receive confirmation via phone/email 📞📧<br><br>"
-                
-                "4️⃣ <strong>Start Learning</strong> 🚀<br>"
-                "   • Attend your first class 🎓<br>"
-                "   • Receive study materials 📚<br>"
-                "   • Begin your chess journey! ♟️🎉<br><br>"
-                
-                "📞 <strong>For Assistance:</strong><br>"
-                "Call/WhatsApp: <strong>8830435532</strong> (Srivastav Sir) 📱<br><br>"
-                
-                "Ready to make your first move? ♟️ Start by signing up on the website! 🚀"
-            )
+            reply = f"{encouragement}<br><br>" + ENROLLMENT_REPLY
+            record_intent("enrollment")
             return jsonify({"reply": format_response(reply), "close_chat": False})
 
         # --- AGE / ELIGIBILITY ---
         age_keywords = ["age", "old", "child", "kid", "adult", "eligibility", "who can join", "years", "minimum age", "maximum age", "age limit"]
         if calculate_similarity(message_lower, age_keywords) >= 1:
-            reply = (
-                "👨‍👩‍👧‍👦 <strong>Eligibility - Age Requirements</strong> 🎂<br><br>"
-                
-                "We accept students aged <strong>0 to 25 years only</strong>. 📅<br><br>"
-                
-                "<strong>Age Groups:</strong><br>"
-                "• <strong>Kids (5-12 years)</strong>: Fun, game-based learning 🎮😄<br>"
-                "• <strong>Teens (13-18 years)</strong>: Competitive training 🏆💪<br>"
-                "• <strong>Young Adults (19-25 years)</strong>: Advanced coaching 🎓🚀<br><br>"
-                
-                "<strong>Note:</strong><br>"
-                "• Children below 5 years: Can join with parental guidance 👨‍👦<br>"
-                "• Above 25 years: Unfortunately not accepted in our regular batches ❌<br><br>"
-                
-                "✨ <strong>No prior chess experience needed!</strong> 🎉<br>"
-                "We teach complete beginners to advanced players. 🌱⭐<br><br>"
-                
-                "How old are you? I can suggest the perfect batch! 😊🎯"
-            )
+            weak = weak_match_reply(message_lower, age_keywords)
+            if weak:
+                return weak
+            reply = AGE_REPLY
+            record_intent("age")
             return jsonify({"reply": format_response(reply), "close_chat": False})
 
         # --- STUDENT DASHBOARD / PERSONAL QUERIES ---
@@ -471,52 +712,19 @@ def chat():
                 
                 "Is there anything else about our classes I can help with? 🤔"
             )
+            record_intent("student_portal")
             return jsonify({"reply": format_response(reply), "close_chat": False})
 
         # --- DISCOUNTS / OFFERS ---
         if any(x in message_lower for x in ["discount", "offer", "special offer", "concession", "coupon", "promo", "promotion", "cheaper"]):
-            reply = (
-                "💸 <strong>Fee Information</strong> 📋<br><br>"
-                
-                "Our fee structure is:<br>"
-                "• Monthly: ₹3,000 💵<br>"
-                "• Quarterly: ₹7,500 💰<br><br>"
-                
-                "Currently, <strong>no special discounts or offers are available</strong>. 🚫<br><br>"
-                
-                "We maintain transparent pricing to ensure quality coaching for all students. ✅<br><br>"
-                
-                "The quarterly plan provides continuous learning at a consistent rate. 📅<br><br>"
-                
-                "Ready to enroll at our standard rates? 😊🎯"
-            )
+            reply = DISCOUNT_REPLY
+            record_intent("discount")
             return jsonify({"reply": format_response(reply), "close_chat": False})
 
         # --- LOCATION / NAGPUR ---
         if any(x in message_lower for x in ["nagpur", "location", "dharampeth", "where are you", "city", "address", "center location"]):
-            reply = (
-                "📍 <strong>We're Located in Nagpur!</strong> 🗺️<br><br>"
-                
-                "<strong>Address:</strong><br>"
-                "Chess Class (Srivastava) ♟️<br>"
-                "Flat No. 104, Vithal Rukmini Apartments 🏢<br>"
-                "Dharampeth, Nagpur - 440010 📍<br>"
-                "Maharashtra, India 🇮🇳<br><br>"
-                
-                "<strong>🗺️ Landmark:</strong><br>"
-                "Near Dharampeth Post Office 📮<br>"
-                "10 minutes from Nagpur Railway Station 🚂<br><br>"
-                
-                "<strong>🚗 Easy to Reach:</strong><br>"
-                "• Auto/Cab: 'Vithal Rukmini Apartments, Dharampeth' 🚕<br>"
-                "• Parking: Available 🅿️<br><br>"
-                
-                "📞 Need directions? Call: <strong>8830435532</strong> 📱<br><br>"
-                
-                "Serving Nagpur's chess community for 10+ years! ⏳🎉<br><br>"
-                
-                "Planning to visit? Center open Mon-Sat (4PM-8PM) 😊⏰"
-            )
+            reply = LOCATION_REPLY
+            record_intent("location")
             return jsonify({"reply": format_response(reply), "close_chat": False})
 
         # --- JOKES / FUN ---
@@ -526,6 +734,7 @@ def chat():
                 "What's a chess player's favorite game show? 🎯<br>Check or No Check! 😂🎉<br><br>Speaking of checks, have you checked out our batch timings? ⏰",
                 "Why don't chess players ever get cold? ❄️<br>Because they're always in the middle of the board! 😄🔥<br><br>Warm up your chess skills with us - want to know more about enrollment?",
             ]
+            record_intent("joke")
             return jsonify({"reply": format_response(random.choice(jokes)), "close_chat": False})
 
         # --- COMPLIMENTS TO THE BOT ---
@@ -535,59 +744,21 @@ def chat():
                 f"Thanks {user_name}! 😊🙏 I'm just doing my best to help you. Is there anything else about our chess classes you'd like to know?",
                 "You're very kind! 🙏😊 I'm glad I could help. Feel free to ask anything else about chess coaching!",
             ]
+            record_intent("compliment")
             return jsonify({"reply": format_response(random.choice(replies)), "close_chat": False})
 
         # --- GENERAL CONVERSATION ---
         if any(x in message_lower for x in ["what can you do", "help me", "what do you know", "capabilities", "features", "options"]):
-            reply = (
-                "🤖 <strong>I'm Your Chess Assistant - Here's How I Can Help!</strong> 🎯<br><br>"
-                
-                "I'm an assistant specialized in everything about <strong>Chess Class (Srivastava)</strong>! ♟️❤️<br><br>"
-                
-                "<strong>📋 I can help you with:</strong><br><br>"
-                
-                "🕐 <strong>Class Information:</strong><br>"
-                "• Batch timings and schedules ⏰<br>"
-                "• Online vs offline options 💻🏢<br>"
-                "• Age groups and eligibility 👶👨<br><br>"
-                
-                "💰 <strong>Fee & Payment:</strong><br>"
-                "• Fee structure and plans 💵<br>"
-                "• Payment methods 📱<br>"
-                "• Enrollment process 📝<br><br>"
-                
-                "📝 <strong>Enrollment:</strong><br>"
-                "• How to join 🚀<br>"
-                "• Registration steps 📋<br>"
-                "• Verification process ✅<br><br>"
-                
-                "🏆 <strong>Tournaments & Events:</strong><br>"
-                "• Weekly tournament info 📅<br>"
-                "• Special events 🎉<br>"
-                "• Competition details 🏅<br><br>"
-                
-                "♟️ <strong>Chess Learning:</strong><br>"
-                "• Curriculum details 📚<br>"
-                "• Study materials 🎒<br>"
-                "• Benefits of chess 🧠<br><br>"
-                
-                "📞 <strong>Contact & Location:</strong><br>"
-                "• Address and directions 🗺️<br>"
-                "• Phone numbers 📱<br>"
-                "• Center timings ⏰<br><br>"
-                
-                "⭐ <strong>About Us:</strong><br>"
-                "• Our story and achievements 📖<br>"
-                "• Student reviews ⭐<br>"
-                "• Instructor information 👨‍🏫<br><br>"
-                
-                "💬 I'm available to chat! 😊<br>"
-                "Just ask me anything about chess coaching, and I'll do my best to help! ❤️<br><br>"
-                
-                "What would you like to know first? 🤔"
-            )
+            reply = CAPABILITIES_REPLY
+            record_intent("capabilities")
             return jsonify({"reply": format_response(reply), "close_chat": False})
 
+        # --- FAQ RETRIEVAL ---
+        faq_reply = faq_index.best_answer(message_lower)
+        if faq_reply:
+            record_intent("faq")
+            return jsonify({"reply": format_response(faq_reply), "close_chat": False})
+
         # --- FALLBACK ---
         suggestions = [
             "Try asking: <strong>What are the batch timings?</strong> ⏰",
@@ -613,6 +784,7 @@ def chat():
             "📞 <strong>8830435532</strong> (Srivastav Sir) 📱"
         )
         
+        record_intent("fallback", message)
         return jsonify({"reply": format_response(reply), "close_chat": False})
 
     except Exception as e:
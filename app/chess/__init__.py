@@ -0,0 +1,24 @@
+"""
+Server-side chess core: board representation, move generation and search
+"""
+from app.chess.board import (
+    Board,
+    STARTING_FEN,
+    WHITE,
+    BLACK,
+    PAWN,
+    KNIGHT,
+    BISHOP,
+    ROOK,
+    QUEEN,
+    KING,
+    SQUARE_NAMES,
+    parse_square,
+    square_name,
+    move_from,
+    move_to,
+    move_flag,
+    move_promotion,
+    move_to_uci,
+    is_capture,
+)
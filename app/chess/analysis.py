@@ -0,0 +1,157 @@
+"""
+Game Analysis
+
+Annotates every move of a game with the engine's opinion. Each position is
+searched to a fixed depth, so the result does not depend on how busy the
+machine is; a per-search time limit (`time_ms`) is only a backstop for the
+rare tactical position that would take far longer. A move other than the engine's choice is judged
+by searching the position it leads to one ply shallower: both scores then
+come from the same horizon, as if the played move had been one of the root
+moves. The loss is how much worse that leaves the mover. A move that would
+be marked is checked again one ply deeper and judged on that, since a
+shallow search often sees a pawn won that a deeper one gives back.
+
+- inaccuracy: loses 50+ centipawns
+- mistake: loses 100+
+- blunder: loses 300+
+
+Evaluations are cached by Zobrist hash for the life of the process, so the
+opening moves shared by many uploaded games are only searched once.
+
+    from app.chess.analysis import analyze_game
+
+    result = analyze_game(STARTING_FEN, moves, depth=4, time_ms=500)
+    result["moves"][12]     # {"ply": 12, "san": "Qxb7", "judgement": "blunder", "loss": 420, ...}
+"""
+from app.chess.board import Board, move_to_uci
+from app.chess.search import Searcher, MATE, MATE_BOUND
+
+JUDGEMENTS = [(300, "blunder"), (100, "mistake"), (50, "inaccuracy")]
+
+# Scores are capped here before losses are taken, so a mate counts as a big
+# but finite swing and converting a won position slowly is not a blunder
+SCORE_CAP = 1000
+
+CACHE_LIMIT = 200_000
+
+# One Searcher and evaluation cache per worker process, kept across games
+_searcher = None
+_cache = {}
+
+
+def judge(loss):
+    for threshold, name in JUDGEMENTS:
+        if loss >= threshold:
+            return name
+    return None
+
+
+def _capped(score):
+    return max(-SCORE_CAP, min(SCORE_CAP, score))
+
+
+def evaluate_position(board, depth, searcher=None, cache=None, time_ms=None):
+    """
+    (score, best move) for the side to move, searched to `depth` (or for
+    `time_ms`, whichever ends first) and remembered in `cache` by Zobrist
+    hash. Positions with a single legal move return (None, move): there was
+    nothing to choose, so no search.
+    """
+    cache = _cache if cache is None else cache
+    key = (board.hash, depth)
+    hit = cache.get(key)
+    if hit is not None:
+        return hit
+
+    moves = board.legal_moves()
+    if not moves:
+        result = (-MATE if board.is_check() else 0, 0)
+    elif len(moves) == 1:
+        result = (None, moves[0])
+    else:
+        found = (searcher or Searcher()).search(board, max_depth=depth, time_ms=time_ms)
+        result = (found["score"], found["move"])
+    if len(cache) >= CACHE_LIMIT:
+        cache.clear()
+    cache[key] = result
+    return result
+
+
+def _score_after(board, move, depth, searcher, cache, time_ms):
+    """The mover's score after `move`, from a search one ply shallower"""
+    board.push(move)
+    score, _ = evaluate_position(board, max(depth - 1, 1), searcher, cache, time_ms)
+    if score is None:
+        score = searcher.static_score(board)
+    board.pop()
+    return -score
+
+
+def _judge_move(board, move, depth, searcher, cache, time_ms):
+    """(mover's score after `move`, centipawns lost, engine's best move)"""
+    before, best = evaluate_position(board, depth, searcher, cache, time_ms)
+    if before is not None and move == best:
+        return before, 0, best
+    after = _score_after(board, move, depth, searcher, cache, time_ms)
+    # A forced move loses nothing
+    loss = max(0, _capped(before) - _capped(after)) if before is not None else 0
+    return after, loss, best
+
+
+def analyze_game(start_fen, moves, depth=4, time_ms=None, searcher=None, cache=None):
+    """
+    Per-move annotations and per-side totals for a game given as 16-bit moves.
+    Scores are centipawns from White's point of view. `time_ms` caps each search.
+    """
+    global _searcher
+    if searcher is None:
+        if _searcher is None:
+            _searcher = Searcher()
+        searcher = _searcher
+
+    board = Board(start_fen)
+    annotated = []
+    totals = [{"loss": 0, "moves": 0, "inaccuracy": 0, "mistake": 0, "blunder": 0} for _ in range(2)]
+    for ply, move in enumerate(moves):
+        side = board.turn
+        after, loss, best = _judge_move(board, move, depth, searcher, cache, time_ms)
+        if judge(loss):
+            after, loss, best = _judge_move(board, move, depth + 1, searcher, cache, time_ms)
+        judgement = judge(loss)
+        sign = 1 if side == 0 else -1
+        entry = {
+            "ply": ply,
+            "san": board.san(move),
+            "uci": move_to_uci(move),
+            "score": sign * after,
+            "mate": _mate(sign * after),
+            "loss": loss,
+            "judgement": judgement,
+        }
+        if judgement:
+            entry["best"] = move_to_uci(best)
+            totals[side][judgement] += 1
+        totals[side]["loss"] += loss
+        totals[side]["moves"] += 1
+        annotated.append(entry)
+        board.push(move)
+
+    summary = {}
+    for side, name in ((0, "white"), (1, "black")):
+        t = totals[side]
+        summary[name] = {
+            "average_loss": round(t["loss"] / t["moves"]) if t["moves"] else 0,
+            "inaccuracies": t["inaccuracy"],
+            "mistakes": t["mistake"],
+            "blunders": t["blunder"],
+        }
+    return {"moves": annotated, "summary": summary, "depth": depth}
+
+
+def _mate(score):
+    """Moves to mate for a White-view score (negative when Black mates), or None"""
+    if score > MATE_BOUND:
+        return (MATE - score + 1) // 2
+    if score < -MATE_BOUND:
+        return -((MATE + score + 1) // 2)
+    return None
@@ -0,0 +1,964 @@
+"""
+Bitboard Board Representation and Move Generation
+
+Squares are numbered 0..63 with a1 = 0, h1 = 7, a8 = 56. Each of the twelve
+piece kinds has its own 64-bit bitboard; a mailbox list mirrors them for
+O(1) "what is on this square" lookups.
+
+Moves are plain ints packed into 16 bits:
+
+    bits 0-5   from square
+    bits 6-11  to square
+    bits 12-15 flag (QUIET, DOUBLE_PUSH, castles, CAPTURE, EP_CAPTURE, promotions)
+
+`Board.hash` is a 64-bit Zobrist key updated incrementally by push/pop.
+"""
+
+WHITE, BLACK = 0, 1
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING = range(6)
+
+PIECE_SYMBOLS = "PNBRQKpnbrqk"
+PIECE_CODES = ["wp", "wn", "wb", "wr", "wq", "wk", "bp", "bn", "bb", "br", "bq", "bk"]
+
+FILES = "abcdefgh"
+SQUARE_NAMES = [f + r for r in "12345678" for f in FILES]
+SQUARES = {name: i for i, name in enumerate(SQUARE_NAMES)}
+
+STARTING_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+
+FULL = 0xFFFFFFFFFFFFFFFF
+FILE_A = 0x0101010101010101
+FILE_H = FILE_A << 7
+RANK_1 = 0xFF
+RANK_3 = RANK_1 << 16
+RANK_6 = RANK_1 << 40
+RANK_8 = RANK_1 << 56
+
+# Move flags
+QUIET = 0
+DOUBLE_PUSH = 1
+KING_CASTLE = 2
+QUEEN_CASTLE = 3
+CAPTURE = 4
+EP_CAPTURE = 5
+PROMOTION = 8           # + (piece - KNIGHT); | CAPTURE for capture-promotions
+
+# Castling rights
+WHITE_OO, WHITE_OOO, BLACK_OO, BLACK_OOO = 1, 2, 4, 8
+
+
+def square_name(sq):
+    return SQUARE_NAMES[sq]
+
+
+def parse_square(name):
+    try:
+        return SQUARES[name]
+    except KeyError:
+        raise ValueError(f"Invalid square: {name!r}")
+
+
+def encode_move(from_sq, to_sq, flag=QUIET):
+    return from_sq | (to_sq << 6) | (flag << 12)
+
+
+def move_from(move):
+    return move & 63
+
+
+def move_to(move):
+    return (move >> 6) & 63
+
+
+def move_flag(move):
+    return move >> 12
+
+
+def move_promotion(move):
+    """Promotion piece type, or None"""
+    flag = move >> 12
+    return (flag & 3) + KNIGHT if flag & PROMOTION else None
+
+
+def is_capture(move):
+    return bool((move >> 12) & CAPTURE)
+
+
+def move_to_uci(move):
+    uci = SQUARE_NAMES[move & 63] + SQUARE_NAMES[(move >> 6) & 63]
+    promo = move_promotion(move)
+    if promo is not None:
+        uci += "nbrq"[promo - KNIGHT]
+    return uci
+
+
+# ---------------- ATTACK TABLES ----------------
+
+
+def _step_table(deltas):
+    table = []
+    for sq in range(64):
+        f, r = sq % 8, sq // 8
+        b = 0
+        for df, dr in deltas:
+            nf, nr = f + df, r + dr
+            if 0 <= nf < 8 and 0 <= nr < 8:
+                b |= 1 << (nr * 8 + nf)
+        table.append(b)
+    return table
+
+
+KNIGHT_ATTACKS = _step_table([(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)])
+KING_ATTACKS = _step_table([(1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1)])
+PAWN_ATTACKS = [_step_table([(-1, 1), (1, 1)]), _step_table([(-1, -1), (1, -1)])]
+
+# Rays per direction; "positive" rays grow towards h8, so their nearest blocker is the lowest bit.
+_DIRECTIONS = {
+    "N": (0, 1), "E": (1, 0), "NE": (1, 1), "NW": (-1, 1),
+    "S": (0, -1), "W": (-1, 0), "SE": (1, -1), "SW": (-1, -1),
+}
+
+
+def _ray_table(df, dr):
+    table = []
+    for sq in range(64):
+        f, r = sq % 8 + df, sq // 8 + dr
+        b = 0
+        while 0 <= f < 8 and 0 <= r < 8:
+            b |= 1 << (r * 8 + f)
+            f += df
+            r += dr
+        table.append(b)
+    return table
+
+
+RAYS = {name: _ray_table(df, dr) for name, (df, dr) in _DIRECTIONS.items()}
+_N, _E, _NE, _NW = RAYS["N"], RAYS["E"], RAYS["NE"], RAYS["NW"]
+_S, _W, _SE, _SW = RAYS["S"], RAYS["W"], RAYS["SE"], RAYS["SW"]
+
+
+def rook_attacks(sq, occ):
+    attacks = 0
+    ray = _N[sq]
+    blockers = ray & occ
+    if blockers:
+        ray ^= _N[(blockers & -blockers).bit_length() - 1]
+    attacks |= ray
+    ray = _E[sq]
+    blockers = ray & occ
+    if blockers:
+        ray ^= _E[(blockers & -blockers).bit_length() - 1]
+    attacks |= ray
+    ray = _S[sq]
+    blockers = ray & occ
+    if blockers:
+        ray ^= _S[blockers.bit_length() - 1]
+    attacks |= ray
+    ray = _W[sq]
+    blockers = ray & occ
+    if blockers:
+        ray ^= _W[blockers.bit_length() - 1]
+    return attacks | ray
+
+
+def bishop_attacks(sq, occ):
+    attacks = 0
+    ray = _NE[sq]
+    blockers = ray & occ
+    if blockers:
+        ray ^= _NE[(blockers & -blockers).bit_length() - 1]
+    attacks |= ray
+    ray = _NW[sq]
+    blockers = ray & occ
+    if blockers:
+        ray ^= _NW[(blockers & -blockers).bit_length() - 1]
+    attacks |= ray
+    ray = _SE[sq]
+    blockers = ray & occ
+    if blockers:
+        ray ^= _SE[blockers.bit_length() - 1]
+    attacks |= ray
+    ray = _SW[sq]
+    blockers = ray & occ
+    if blockers:
+        ray ^= _SW[blockers.bit_length() - 1]
+    return attacks | ray
+
+
+# Every square a queen on `sq` would see on an empty board (candidate pin lines)
+QUEEN_LINES = [rook_attacks(sq, 0) | bishop_attacks(sq, 0) for sq in range(64)]
+
+
+def _between_table():
+    table = [[0] * 64 for _ in range(64)]
+    for a in range(64):
+        for df, dr in _DIRECTIONS.values():
+            f, r = a % 8 + df, a // 8 + dr
+            between = 0
+            while 0 <= f < 8 and 0 <= r < 8:
+                sq = r * 8 + f
+                table[a][sq] = between
+                between |= 1 << sq
+                f += df
+                r += dr
+    return table
+
+
+# BETWEEN[a][b]: squares strictly between a and b on a shared line (0 if none)
+BETWEEN = _between_table()
+
+
+def iter_bits(b):
+    while b:
+        lsb = b & -b
+        yield lsb.bit_length() - 1
+        b ^= lsb
+
+
+def popcount(b):
+    return bin(b).count("1")
+
+
+# Zobrist keys. Fixed seed so hashes are stable across processes and runs
+# (the perft pool and anything stored on disk rely on that).
+def _zobrist_keys(seed=0x5EEDC4E55):
+    import random
+    rng = random.Random(seed)
+    pieces = [[rng.getrandbits(64) for _ in range(64)] for _ in range(12)]
+    castling_bits = [rng.getrandbits(64) for _ in range(4)]
+    castling = [0] * 16
+    for rights in range(16):
+        for i in range(4):
+            if rights & (1 << i):
+                castling[rights] ^= castling_bits[i]
+    ep_files = [rng.getrandbits(64) for _ in range(8)]
+    turn = rng.getrandbits(64)
+    return pieces, castling, ep_files, turn
+
+
+ZOBRIST_PIECES, ZOBRIST_CASTLING, ZOBRIST_EP, ZOBRIST_TURN = _zobrist_keys()
+
+
+# Castling rights that survive a move touching a given square
+_CASTLE_KEEP = [15] * 64
+_CASTLE_KEEP[0] &= ~WHITE_OOO
+_CASTLE_KEEP[7] &= ~WHITE_OO
+_CASTLE_KEEP[4] &= ~(WHITE_OO | WHITE_OOO)
+_CASTLE_KEEP[56] &= ~BLACK_OOO
+_CASTLE_KEEP[63] &= ~BLACK_OO
+_CASTLE_KEEP[60] &= ~(BLACK_OO | BLACK_OOO)
+
+
+class Board:
+    """
+    Mutable chess position with make/unmake.
+
+        board = Board()                  # starting position
+        board = Board("8/8/8/3pP3/8/8/8/8 w - d6 0 1")
+        for move in board.legal_moves():
+            board.push(move)
+            ...
+            board.pop()
+
+    Kings are optional so that lesson diagrams with only a few pieces load;
+    a side without a king is simply never in check.
+    """
+
+    def __init__(self, fen=STARTING_FEN):
+        self.set_fen(fen)
+
+    # ---------------- FEN ----------------
+
+    def set_fen(self, fen):
+        parts = fen.split()
+        if len(parts) < 4:
+            raise ValueError(f"Invalid FEN (expected at least 4 fields): {fen!r}")
+        placement, turn, castling, ep = parts[:4]
+        halfmove = parts[4] if len(parts) > 4 else "0"
+        fullmove = parts[5] if len(parts) > 5 else "1"
+
+        self.bb = [0] * 12
+        self.squares = [-1] * 64
+
+        rows = placement.split("/")
+        if len(rows) != 8:
+            raise ValueError(f"Invalid FEN placement (expected 8 ranks): {fen!r}")
+        for i, row in enumerate(rows):
+            rank = 7 - i
+            file = 0
+            for ch in row:
+                if ch.isdigit():
+                    file += int(ch)
+                else:
+                    piece = PIECE_SYMBOLS.find(ch)
+                    if piece < 0 or file > 7:
+                        raise ValueError(f"Invalid FEN placement: {fen!r}")
+                    sq = rank * 8 + file
+                    self.bb[piece] |= 1 << sq
+                    self.squares[sq] = piece
+                    file += 1
+            if file != 8:
+                raise ValueError(f"Invalid FEN rank {row!r}: {fen!r}")
+
+        if turn not in ("w", "b"):
+            raise ValueError(f"Invalid FEN side to move: {fen!r}")
+        self.turn = WHITE if turn == "w" else BLACK
+
+        self.castling = 0
+        if castling != "-":
+            for ch in castling:
+                bit = {"K": WHITE_OO, "Q": WHITE_OOO, "k": BLACK_OO, "q": BLACK_OOO}.get(ch)
+                if bit is None:
+                    raise ValueError(f"Invalid FEN castling field: {fen!r}")
+                self.castling |= bit
+        # Drop rights whose king or rook is not on its home square
+        sq = self.squares
+        if sq[4] != KING:
+            self.castling &= ~(WHITE_OO | WHITE_OOO)
+        if sq[7] != ROOK:
+            self.castling &= ~WHITE_OO
+        if sq[0] != ROOK:
+            self.castling &= ~WHITE_OOO
+        if sq[60] != 6 + KING:
+            self.castling &= ~(BLACK_OO | BLACK_OOO)
+        if sq[63] != 6 + ROOK:
+            self.castling &= ~BLACK_OO
+        if sq[56] != 6 + ROOK:
+            self.castling &= ~BLACK_OOO
+
+        self.ep = -1 if ep == "-" else parse_square(ep)
+        # Only a pawn that just double-pushed leaves an en passant square: rank 6 with
+        # White to move, rank 3 with Black to move
+        if self.ep >= 0 and self.ep // 8 != (5 if self.turn == WHITE else 2):
+            raise ValueError(f"Invalid FEN en passant square: {fen!r}")
+        try:
+            self.halfmove = int(halfmove)
+            self.fullmove = int(fullmove)
+        except ValueError:
+            raise ValueError(f"Invalid FEN move counters: {fen!r}")
+
+        self.occ = [0, 0]
+        for piece in range(12):
+            self.occ[piece // 6] |= self.bb[piece]
+        self.hash = self.zobrist_hash()
+        self._stack = []
+
+    def _ep_key(self):
+        """Zobrist key for the en passant square, only when a capture is actually possible"""
+        ep = self.ep
+        us = self.turn
+        if ep >= 0 and PAWN_ATTACKS[us ^ 1][ep] & self.bb[us * 6 + PAWN]:
+            return ZOBRIST_EP[ep & 7]
+        return 0
+
+    def zobrist_hash(self):
+        """Hash computed from scratch; `self.hash` is kept equal to this incrementally"""
+        h = 0
+        for sq, piece in enumerate(self.squares):
+            if piece >= 0:
+                h ^= ZOBRIST_PIECES[piece][sq]
+        h ^= ZOBRIST_CASTLING[self.castling] ^ self._ep_key()
+        if self.turn == BLACK:
+            h ^= ZOBRIST_TURN
+        return h
+
+    def fen(self):
+        rows = []
+        for rank in range(7, -1, -1):
+            row = ""
+            empty = 0
+            for file in range(8):
+                piece = self.squares[rank * 8 + file]
+                if piece < 0:
+                    empty += 1
+                else:
+                    if empty:
+                        row += str(empty)
+                        empty = 0
+                    row += PIECE_SYMBOLS[piece]
+            if empty:
+                row += str(empty)
+            rows.append(row)
+
+        castling = "".join(ch for bit, ch in ((WHITE_OO, "K"), (WHITE_OOO, "Q"), (BLACK_OO, "k"), (BLACK_OOO, "q"))
+                           if self.castling & bit) or "-"
+        ep = SQUARE_NAMES[self.ep] if self.ep >= 0 else "-"
+        return f"{'/'.join(rows)} {'wb'[self.turn]} {castling} {ep} {self.halfmove} {self.fullmove}"
+
+    def copy(self):
+        other = Board.__new__(Board)
+        other.bb = self.bb[:]
+        other.squares = self.squares[:]
+        other.occ = self.occ[:]
+        other.turn = self.turn
+        other.castling = self.castling
+        other.ep = self.ep
+        other.halfmove = self.halfmove
+        other.fullmove = self.fullmove
+        other.hash = self.hash
+        other._stack = []
+        return other
+
+    def __repr__(self):
+        return f"Board({self.fen()!r})"
+
+    # ---------------- QUERIES ----------------
+
+    def piece_at(self, sq):
+        """Lesson-style piece code ('wp', 'bk', ...) or None"""
+        piece = self.squares[sq]
+        return PIECE_CODES[piece] if piece >= 0 else None
+
+    def piece_map(self):
+        """{'e2': 'wp', ...} in the same shape as a lesson's `pieces` field"""
+        return {SQUARE_NAMES[sq]: PIECE_CODES[p] for sq, p in enumerate(self.squares) if p >= 0}
+
+    def king_square(self, color):
+        k = self.bb[color * 6 + KING]
+        return k.bit_length() - 1 if k else -1
+
+    def is_attacked(self, sq, by):
+        """Is `sq` attacked by any piece of colour `by`?"""
+        bb = self.bb
+        base = by * 6
+        if PAWN_ATTACKS[by ^ 1][sq] & bb[base + PAWN]:
+            return True
+        if KNIGHT_ATTACKS[sq] & bb[base + KNIGHT]:
+            return True
+        if KING_ATTACKS[sq] & bb[base + KING]:
+            return True
+        occ = self.occ[0] | self.occ[1]
+        queens = bb[base + QUEEN]
+        diag = bb[base + BISHOP] | queens
+        if diag and bishop_attacks(sq, occ) & diag:
+            return True
+        straight = bb[base + ROOK] | queens
+        if straight and rook_attacks(sq, occ) & straight:
+            return True
+        return False
+
+    def attackers(self, sq, by):
+        """Bitboard of pieces of colour `by` attacking `sq`"""
+        bb = self.bb
+        base = by * 6
+        occ = self.occ[0] | self.occ[1]
+        queens = bb[base + QUEEN]
+        return (
+            (PAWN_ATTACKS[by ^ 1][sq] & bb[base + PAWN])
+            | (KNIGHT_ATTACKS[sq] & bb[base + KNIGHT])
+            | (KING_ATTACKS[sq] & bb[base + KING])
+            | (bishop_attacks(sq, occ) & (bb[base + BISHOP] | queens))
+            | (rook_attacks(sq, occ) & (bb[base + ROOK] | queens))
+        )
+
+    def is_check(self):
+        k = self.bb[self.turn * 6 + KING]
+        return bool(k) and self.is_attacked(k.bit_length() - 1, self.turn ^ 1)
+
+    def is_checkmate(self):
+        return self.is_check() and not self.legal_moves()
+
+    def is_stalemate(self):
+        return not self.is_check() and not self.legal_moves()
+
+    def gives_check(self, move):
+        """Does `move` check the opponent? Worked out from attack sets without making the move."""
+        flag = move >> 12
+        if flag == EP_CAPTURE or flag == KING_CASTLE or flag == QUEEN_CASTLE:
+            self.push(move)
+            check = self.is_check()
+            self.pop()
+            return check
+
+        us = self.turn
+        bb = self.bb
+        king = bb[(us ^ 1) * 6 + KING]
+        if not king:
+            return False
+        ksq = king.bit_length() - 1
+        frm = move & 63
+        to = (move >> 6) & 63
+        from_bit = 1 << frm
+        occ = ((self.occ[0] | self.occ[1]) & ~from_bit) | (1 << to)
+
+        # Direct check by the piece that lands on `to`
+        kind = (flag & 3) + KNIGHT if flag & PROMOTION else self.squares[frm] % 6
+        if kind == PAWN:
+            if PAWN_ATTACKS[us][to] & king:
+                return True
+        elif kind == KNIGHT:
+            if KNIGHT_ATTACKS[to] & king:
+                return True
+        elif kind != KING:
+            if kind != ROOK and bishop_attacks(to, occ) & king:
+                return True
+            if kind != BISHOP and rook_attacks(to, occ) & king:
+                return True
+
+        # Discovered check: a slider behind the vacated square now sees the king
+        if not QUEEN_LINES[ksq] & from_bit:
+            return False
+        base = us * 6
+        queens = bb[base + QUEEN] & ~from_bit
+        if bishop_attacks(ksq, occ) & (bb[base + BISHOP] & ~from_bit | queens):
+            return True
+        if rook_attacks(ksq, occ) & (bb[base + ROOK] & ~from_bit | queens):
+            return True
+        return False
+
+    # ---------------- MOVE GENERATION ----------------
+
+    def pseudo_legal_moves(self):
+        us = self.turn
+        them = us ^ 1
+        bb = self.bb
+        own = self.occ[us]
+        enemy = self.occ[them]
+        occ = own | enemy
+        empty = ~occ & FULL
+        moves = []
+        append = moves.append
+        base = us * 6
+
+        # Pawns, set-wise
+        pawns = bb[base + PAWN]
+        if pawns:
+            if us == WHITE:
+                single = (pawns << 8) & empty
+                double = ((single & RANK_3) << 8) & empty
+                left = ((pawns & ~FILE_A) << 7) & enemy
+                right = ((pawns & ~FILE_H) << 9) & enemy
+                push_d, left_d, right_d = 8, 7, 9
+                promo_rank = RANK_8
+            else:
+                single = (pawns >> 8) & empty
+                double = ((single & RANK_6) >> 8) & empty
+                left = ((pawns & ~FILE_A) >> 9) & enemy
+                right = ((pawns & ~FILE_H) >> 7) & enemy
+                push_d, left_d, right_d = -8, -9, -7
+                promo_rank = RANK_1
+
+            for targets, delta, flag in ((single, push_d, QUIET), (left, left_d, CAPTURE), (right, right_d, CAPTURE)):
+                promos = targets & promo_rank
+                targets &= ~promo_rank
+                while targets:
+                    lsb = targets & -targets
+                    to = lsb.bit_length() - 1
+                    targets ^= lsb
+                    append((to - delta) | (to << 6) | (flag << 12))
+                while promos:
+                    lsb = promos & -promos
+                    to = lsb.bit_length() - 1
+                    promos ^= lsb
+                    frm = to - delta
+                    for promo_flag in (PROMOTION + 3, PROMOTION, PROMOTION + 2, PROMOTION + 1):
+                        append(frm | (to << 6) | ((promo_flag | flag) << 12))
+            while double:
+                lsb = double & -double
+                to = lsb.bit_length() - 1
+                double ^= lsb
+                append((to - 2 * push_d) | (to << 6) | (DOUBLE_PUSH << 12))
+
+            ep = self.ep
+            if ep >= 0:
+                captured_sq = ep - push_d
+                if self.squares[captured_sq] == them * 6 + PAWN and self.squares[ep] < 0:
+                    attackers = PAWN_ATTACKS[them][ep] & pawns
+                    while attackers:
+                        lsb = attackers & -attackers
+                        attackers ^= lsb
+                        append((lsb.bit_length() - 1) | (ep << 6) | (EP_CAPTURE << 12))
+
+        # Pieces
+        not_own = ~own & FULL
+        for ptype in (KNIGHT, BISHOP, ROOK, QUEEN, KING):
+            pieces = bb[base + ptype]
+            while pieces:
+                lsb = pieces & -pieces
+                frm = lsb.bit_length() - 1
+                pieces ^= lsb
+                if ptype == KNIGHT:
+                    targets = KNIGHT_ATTACKS[frm]
+                elif ptype == BISHOP:
+                    targets = bishop_attacks(frm, occ)
+                elif ptype == ROOK:
+                    targets = rook_attacks(frm, occ)
+                elif ptype == QUEEN:
+                    targets = bishop_attacks(frm, occ) | rook_attacks(frm, occ)
+                else:
+                    targets = KING_ATTACKS[frm]
+                targets &= not_own
+                captures = targets & enemy
+                quiets = targets ^ captures
+                while captures:
+                    lsb = captures & -captures
+                    captures ^= lsb
+                    append(frm | ((lsb.bit_length() - 1) << 6) | (CAPTURE << 12))
+                while quiets:
+                    lsb = quiets & -quiets
+                    quiets ^= lsb
+                    append(frm | ((lsb.bit_length() - 1) << 6))
+
+        # Castling: path empty, king not in check and not passing through attack
+        if self.castling:
+            if us == WHITE:
+                if self.castling & WHITE_OO and not occ & 0x60 and not self.is_attacked(4, them) \
+                        and not self.is_attacked(5, them) and not self.is_attacked(6, them):
+                    append(4 | (6 << 6) | (KING_CASTLE << 12))
+                if self.castling & WHITE_OOO and not occ & 0x0E and not self.is_attacked(4, them) \
+                        and not self.is_attacked(3, them) and not self.is_attacked(2, them):
+                    append(4 | (2 << 6) | (QUEEN_CASTLE << 12))
+            else:
+                if self.castling & BLACK_OO and not occ & (0x60 << 56) and not self.is_attacked(60, them) \
+                        and not self.is_attacked(61, them) and not self.is_attacked(62, them):
+                    append(60 | (62 << 6) | (KING_CASTLE << 12))
+                if self.castling & BLACK_OOO and not occ & (0x0E << 56) and not self.is_attacked(60, them) \
+                        and not self.is_attacked(59, them) and not self.is_attacked(58, them):
+                    append(60 | (58 << 6) | (QUEEN_CASTLE << 12))
+
+        return moves
+
+    def legal_moves(self):
+        us = self.turn
+        them = us ^ 1
+        king_bb_index = us * 6 + KING
+        bb = self.bb
+        pseudo = self.pseudo_legal_moves()
+        king = bb[king_bb_index]
+        if not king:
+            return pseudo
+
+        # Out of check, a non-king move whose piece is not on a line through our king
+        # cannot expose it, so only the remaining moves need a make/unmake test.
+        # In check, a non-king move must capture the checker or block it; with two
+        # checkers only the king may move.
+        king_sq = king.bit_length() - 1
+        checkers = self.attackers(king_sq, them)
+        if checkers:
+            risky = FULL
+            if checkers & (checkers - 1):
+                evasions = 0
+            else:
+                evasions = checkers | BETWEEN[king_sq][checkers.bit_length() - 1]
+        else:
+            risky = QUEEN_LINES[king_sq] | king
+            evasions = FULL
+
+        legal = []
+        push = self.push
+        pop = self.pop
+        is_attacked = self.is_attacked
+        for move in pseudo:
+            frm = move & 63
+            if frm != king_sq and not (evasions >> ((move >> 6) & 63)) & 1 and (move >> 12) != EP_CAPTURE:
+                continue
+            if not (risky >> frm) & 1 and (move >> 12) != EP_CAPTURE:
+                legal.append(move)
+                continue
+            push(move)
+            k = bb[king_bb_index]
+            if not k or not is_attacked(k.bit_length() - 1, them):
+                legal.append(move)
+            pop()
+        return legal
+
+    def is_legal(self, move):
+        return move in self.legal_moves()
+
+    def legal_move_map(self):
+        """
+        Legal moves grouped by origin square, in the shape the Learn board uses:
+
+            {"e2": [{"to": "e4"}], "e1": [{"to": "g1", "special": "castle_kingside"}], ...}
+
+        The four promotion choices collapse into one entry; the board asks which piece.
+        """
+        result = {}
+        for move in self.legal_moves():
+            flag = move >> 12
+            if flag & PROMOTION and (flag & 3) != QUEEN - KNIGHT:
+                continue
+            entry = {"to": SQUARE_NAMES[(move >> 6) & 63]}
+            if flag & PROMOTION:
+                entry["special"] = "promotion"
+            elif flag == KING_CASTLE:
+                entry["special"] = "castle_kingside"
+            elif flag == QUEEN_CASTLE:
+                entry["special"] = "castle_queenside"
+            elif flag == EP_CAPTURE:
+                entry["special"] = "en_passant"
+            result.setdefault(SQUARE_NAMES[move & 63], []).append(entry)
+        return result
+
+    def parse_uci(self, uci):
+        """Find the legal move matching a UCI string like 'e2e4' or 'e7e8q'"""
+        for move in self.legal_moves():
+            if move_to_uci(move) == uci:
+                return move
+        # Accept a bare from/to for promotions and default to a queen, as the Learn board does
+        if len(uci) == 4:
+            queen = uci + "q"
+            for move in self.legal_moves():
+                if move_to_uci(move) == queen:
+                    return move
+        raise ValueError(f"Illegal move {uci!r} in {self.fen()}")
+
+    def san(self, move):
+        """Standard algebraic notation for a legal move, with +/# suffix"""
+        flag = move >> 12
+        frm = move & 63
+        to = (move >> 6) & 63
+        if flag == KING_CASTLE:
+            text = "O-O"
+        elif flag == QUEEN_CASTLE:
+            text = "O-O-O"
+        else:
+            kind = self.squares[frm] % 6
+            capture = "x" if flag & CAPTURE else ""
+            if kind == PAWN:
+                text = (FILES[frm & 7] + capture if capture else "") + SQUARE_NAMES[to]
+                if flag & PROMOTION:
+                    text += "=" + "NBRQ"[flag & 3]
+            else:
+                # Disambiguate against other pieces of the same kind reaching `to`
+                rivals = [m & 63 for m in self.legal_moves()
+                          if (m >> 6) & 63 == to and m & 63 != frm and self.squares[m & 63] == self.squares[frm]]
+                prefix = ""
+                if rivals:
+                    if all(sq & 7 != frm & 7 for sq in rivals):
+                        prefix = FILES[frm & 7]
+                    elif all(sq >> 3 != frm >> 3 for sq in rivals):
+                        prefix = str((frm >> 3) + 1)
+                    else:
+                        prefix = SQUARE_NAMES[frm]
+                text = "NBRQK"[kind - 1] + prefix + capture + SQUARE_NAMES[to]
+        self.push(move)
+        if self.is_check():
+            text += "#" if not self.legal_moves() else "+"
+        self.pop()
+        return text
+
+    def parse_san(self, san):
+        """Find the legal move for a SAN string like 'Nf3', 'exd5', 'O-O' or 'e8=Q+'"""
+        text = san.rstrip("+#!?")
+        if text in ("O-O", "0-0", "O-O-O", "0-0-0"):
+            flag = KING_CASTLE if len(text) == 3 else QUEEN_CASTLE
+            for move in self.legal_moves():
+                if move >> 12 == flag:
+                    return move
+            raise ValueError(f"Illegal move {san!r} in {self.fen()}")
+
+        promotion = None
+        if "=" in text:
+            text, promo = text.split("=", 1)
+            promotion = "NBRQ".find(promo[:1].upper())
+        elif text and text[-1] in "NBRQ" and len(text) > 2 and text[-2] in "18":
+            promotion = "NBRQ".find(text[-1])
+            text = text[:-1]
+
+        kind = PAWN
+        if text and text[0] in "NBRQK":
+            kind = "PNBRQK".index(text[0])
+            text = text[1:]
+        text = text.replace("x", "").replace("-", "")
+        if len(text) < 2 or text[-2:] not in SQUARES:
+            raise ValueError(f"Invalid SAN {san!r}")
+        to = SQUARES[text[-2:]]
+        hint = text[:-2]
+        from_file = FILES.find(hint[0]) if hint and hint[0] in FILES else -1
+        from_rank = int(hint[-1]) - 1 if hint and hint[-1].isdigit() else -1
+
+        us = self.turn
+        piece = us * 6 + kind
+        target = self.squares[to]
+        if target >= 0 and target // 6 == us:
+            raise ValueError(f"Illegal move {san!r} in {self.fen()}")
+        flag = CAPTURE if target >= 0 else QUIET
+
+        # Work back from the destination to the candidate origins instead of
+        # generating every legal move; only the candidates get a legality test.
+        if kind == PAWN:
+            step = 8 if us == WHITE else -8
+            if from_file >= 0 and from_file != to & 7:
+                frm = (to - step) & ~7 | from_file
+                if to == self.ep:
+                    flag = EP_CAPTURE
+                elif target < 0:
+                    raise ValueError(f"Illegal move {san!r} in {self.fen()}")
+            elif target >= 0:
+                raise ValueError(f"Illegal move {san!r} in {self.fen()}")
+            else:
+                frm = to - step
+                if 0 <= frm < 64 and self.squares[frm] < 0 and (to >> 3) == (3 if us == WHITE else 4):
+                    frm -= step
+                    flag = DOUBLE_PUSH
+            if to >> 3 in (0, 7):
+                flag = flag | PROMOTION | (QUEEN - KNIGHT if promotion is None or promotion < 0 else promotion)
+            origins = (1 << frm) & self.bb[piece] if 0 <= frm < 64 else 0
+        else:
+            occ = self.occ[0] | self.occ[1]
+            if kind == KNIGHT:
+                origins = KNIGHT_ATTACKS[to]
+            elif kind == BISHOP:
+                origins = bishop_attacks(to, occ)
+            elif kind == ROOK:
+                origins = rook_attacks(to, occ)
+            elif kind == QUEEN:
+                origins = bishop_attacks(to, occ) | rook_attacks(to, occ)
+            else:
+                origins = KING_ATTACKS[to]
+            origins &= self.bb[piece]
+            if from_file >= 0:
+                origins &= FILE_A << from_file
+            if from_rank >= 0:
+                origins &= 0xFF << (from_rank * 8)
+
+        found = None
+        king_index = us * 6 + KING
+        for frm in iter_bits(origins):
+            move = frm | (to << 6) | (flag << 12)
+            self.push(move)
+            king = self.bb[king_index]
+            legal = not king or not self.is_attacked(king.bit_length() - 1, us ^ 1)
+            self.pop()
+            if not legal:
+                continue
+            if found is not None:
+                raise ValueError(f"Ambiguous SAN {san!r} in {self.fen()}")
+            found = move
+        if found is None:
+            raise ValueError(f"Illegal move {san!r} in {self.fen()}")
+        return found
+
+    # ---------------- MAKE / UNMAKE ----------------
+
+    def push(self, move):
+        frm = move & 63
+        to = (move >> 6) & 63
+        flag = move >> 12
+        bb = self.bb
+        squares = self.squares
+        occ = self.occ
+        us = self.turn
+        them = us ^ 1
+        piece = squares[frm]
+        from_bit = 1 << frm
+        to_bit = 1 << to
+
+        h = self.hash
+        self._stack.append((move, -1, self.castling, self.ep, self.halfmove, h))
+        if self.ep >= 0:
+            h ^= self._ep_key()
+        captured = -1
+
+        if flag == EP_CAPTURE:
+            cap_sq = to - 8 if us == WHITE else to + 8
+            captured = squares[cap_sq]
+            cap_bit = 1 << cap_sq
+            bb[captured] ^= cap_bit
+            occ[them] ^= cap_bit
+            squares[cap_sq] = -1
+            h ^= ZOBRIST_PIECES[captured][cap_sq]
+        elif flag & CAPTURE:
+            captured = squares[to]
+            bb[captured] ^= to_bit
+            occ[them] ^= to_bit
+            h ^= ZOBRIST_PIECES[captured][to]
+
+        bb[piece] ^= from_bit
+        squares[frm] = -1
+        if flag & PROMOTION:
+            placed = us * 6 + (flag & 3) + KNIGHT
+        else:
+            placed = piece
+        bb[placed] |= to_bit
+        squares[to] = placed
+        occ[us] ^= from_bit | to_bit
+        h ^= ZOBRIST_PIECES[piece][frm] ^ ZOBRIST_PIECES[placed][to]
+
+        if flag == KING_CASTLE or flag == QUEEN_CASTLE:
+            if flag == KING_CASTLE:
+                rook_from, rook_to = to + 1, to - 1
+            else:
+                rook_from, rook_to = to - 2, to + 1
+            rook = squares[rook_from]
+            mask = (1 << rook_from) | (1 << rook_to)
+            bb[rook] ^= mask
+            occ[us] ^= mask
+            squares[rook_from] = -1
+            squares[rook_to] = rook
+            h ^= ZOBRIST_PIECES[rook][rook_from] ^ ZOBRIST_PIECES[rook][rook_to]
+
+        if captured >= 0:
+            self._stack[-1] = (move, captured, self.castling, self.ep, self.halfmove, self.hash)
+
+        castling = self.castling
+        self.castling = castling & _CASTLE_KEEP[frm] & _CASTLE_KEEP[to]
+        if self.castling != castling:
+            h ^= ZOBRIST_CASTLING[castling] ^ ZOBRIST_CASTLING[self.castling]
+        if piece % 6 == PAWN or captured >= 0:
+            self.halfmove = 0
+        else:
+            self.halfmove += 1
+        if us == BLACK:
+            self.fullmove += 1
+        self.turn = them
+        if flag == DOUBLE_PUSH:
+            self.ep = (frm + to) >> 1
+            h ^= self._ep_key()
+        else:
+            self.ep = -1
+        self.hash = h ^ ZOBRIST_TURN
+
+    def pop(self):
+        move, captured, castling, ep, halfmove, h = self._stack.pop()
+        frm = move & 63
+        to = (move >> 6) & 63
+        flag = move >> 12
+        bb = self.bb
+        squares = self.squares
+        occ = self.occ
+        them = self.turn
+        us = them ^ 1
+        from_bit = 1 << frm
+        to_bit = 1 << to
+
+        placed = squares[to]
+        piece = us * 6 + PAWN if flag & PROMOTION else placed
+        bb[placed] ^= to_bit
+        bb[piece] |= from_bit
+        squares[frm] = piece
+        squares[to] = -1
+        occ[us] ^= from_bit | to_bit
+
+        if flag == EP_CAPTURE:
+            cap_sq = to - 8 if us == WHITE else to + 8
+            cap_bit = 1 << cap_sq
+            bb[captured] |= cap_bit
+            occ[them] |= cap_bit
+            squares[cap_sq] = captured
+        elif captured >= 0:
+            bb[captured] |= to_bit
+            occ[them] |= to_bit
+            squares[to] = captured
+
+        if flag == KING_CASTLE or flag == QUEEN_CASTLE:
+            if flag == KING_CASTLE:
+                rook_from, rook_to = to + 1, to - 1
+            else:
+                rook_from, rook_to = to - 2, to + 1
+            rook = squares[rook_to]
+            mask = (1 << rook_from) | (1 << rook_to)
+            bb[rook] ^= mask
+            occ[us] ^= mask
+            squares[rook_to] = -1
+            squares[rook_from] = rook
+
+        self.castling = castling
+        self.ep = ep
+        self.halfmove = halfmove
+        self.hash = h
+        if us == BLACK:
+            self.fullmove -= 1
+        self.turn = us
+        return move
@@ -0,0 +1,341 @@
+"""
+Endgame Tablebases
+
+Retrograde analysis for lone-king endings (KQK, KRK, KBNK, ...): every
+position of a material signature gets its distance to mate, worked out
+backwards from the checkmates with NumPy over whole frontiers at once.
+
+A table is one flat uint8 array over a perfect placement index: the strong
+side is White, pieces are ordered [white king, black king, white pieces...]
+and a position's index is
+
+    side_to_move * 64**n + ((wk * 64 + bk) * 64 + p1) * 64 + ...
+
+The stored value is the distance to mate in plies plus one, 0 for a draw and
+255 for an impossible placement. With White to move a value is always a
+win for White, with Black to move always a loss for Black. Tables are saved
+as .npy and opened memory-mapped, so a lookup reads one byte.
+
+    python -m app.scripts.build_endgames KQK KRK KBNK --out data/endgames
+
+    tables = EndgameTables("data/endgames")
+    tables.probe(Board("8/8/8/4k3/8/8/8/KQ6 b - - 0 1"))    # {"result": "loss", "plies": 18, ...}
+    tables.best_move(board)                                 # longest defence / fastest mate
+"""
+import os
+
+import numpy as np
+
+from app.chess.board import (
+    BETWEEN, KNIGHT, BISHOP, ROOK, QUEEN, KING, WHITE, BLACK, move_to_uci,
+)
+
+DRAW = 0
+ILLEGAL = 255
+
+PIECE_LETTERS = {"N": KNIGHT, "B": BISHOP, "R": ROOK, "Q": QUEEN}
+SLIDERS = (BISHOP, ROOK, QUEEN)
+
+
+# ---------------- GEOMETRY ----------------
+
+def _targets(deltas, repeat):
+    """(64, k) table of destination squares per origin, padded with -1"""
+    rows = []
+    for sq in range(64):
+        f, r = sq & 7, sq >> 3
+        row = []
+        for df, dr in deltas:
+            nf, nr = f + df, r + dr
+            while 0 <= nf < 8 and 0 <= nr < 8:
+                row.append(nr * 8 + nf)
+                if not repeat:
+                    break
+                nf += df
+                nr += dr
+        rows.append(row)
+    width = max(len(row) for row in rows)
+    return np.array([row + [-1] * (width - len(row)) for row in rows], dtype=np.int16)
+
+
+_KING_DELTAS = [(1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1)]
+_KNIGHT_DELTAS = [(1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)]
+_DIAGONAL = [(1, 1), (1, -1), (-1, 1), (-1, -1)]
+_STRAIGHT = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+MOVES = {
+    KING: _targets(_KING_DELTAS, False),
+    KNIGHT: _targets(_KNIGHT_DELTAS, False),
+    BISHOP: _targets(_DIAGONAL, True),
+    ROOK: _targets(_STRAIGHT, True),
+    QUEEN: _targets(_DIAGONAL + _STRAIGHT, True),
+}
+
+
+def _geometry(kind):
+    table = np.zeros((64, 64), dtype=bool)
+    for sq in range(64):
+        targets = MOVES[kind][sq]
+        table[sq, targets[targets >= 0]] = True
+    return table
+
+
+REACHES = {kind: _geometry(kind) for kind in MOVES}
+
+# ON_BETWEEN[a, b, c]: c lies strictly between a and b on a rank, file or diagonal
+ON_BETWEEN = np.zeros((64, 64, 64), dtype=bool)
+for _a in range(64):
+    for _b in range(64):
+        _bits = BETWEEN[_a][_b]
+        while _bits:
+            ON_BETWEEN[_a, _b, (_bits & -_bits).bit_length() - 1] = True
+            _bits &= _bits - 1
+
+
+def _attacks(kind, frm, to, blockers):
+    """Bool array: does a `kind` on `frm` attack `to`, with pieces on `blockers` in the way?"""
+    hit = REACHES[kind][frm, to]
+    if kind in SLIDERS:
+        for sq in blockers:
+            hit &= ~ON_BETWEEN[frm, to, sq]
+    return hit
+
+
+# ---------------- GENERATION ----------------
+
+def parse_signature(signature):
+    """'KBNK' -> [BISHOP, KNIGHT]: the strong side's pieces besides the king"""
+    signature = signature.upper()
+    if not signature.startswith("K") or not signature.endswith("K") or len(signature) < 3:
+        raise ValueError(f"Unsupported signature {signature!r}: expected K<pieces>K")
+    try:
+        return [PIECE_LETTERS[c] for c in signature[1:-1]]
+    except KeyError:
+        raise ValueError(f"Unsupported signature {signature!r}: pawns and extra kings are not handled")
+
+
+def canonical_signature(signature):
+    """'KNBK' -> 'KBNK': pieces in the order material_signature() reports them"""
+    kinds = sorted(parse_signature(signature), reverse=True)
+    return "K" + "".join("PNBRQ"[kind] for kind in kinds) + "K"
+
+
+def generate(signature, log=None):
+    """Distance-to-mate table for `signature` as a flat uint8 array (see module docstring)"""
+    signature = canonical_signature(signature)
+    extras = parse_signature(signature)
+    kinds = [KING, KING] + extras
+    n = len(kinds)
+    size = 64 ** n
+    place = [64 ** (n - 1 - i) for i in range(n)]
+    sq = np.indices((64,) * n, dtype=np.uint8).reshape(n, -1)
+    wk, bk = sq[0], sq[1]
+
+    valid = ~REACHES[KING][wk, bk] & (wk != bk)
+    for i in range(n):
+        for j in range(i + 1, n):
+            valid &= sq[i] != sq[j]
+
+    # Black is in check when a white piece (not the king: adjacency is invalid) hits bk
+    in_check = np.zeros(size, dtype=bool)
+    for i in range(2, n):
+        others = [sq[j] for j in range(n) if j not in (i, 1)]
+        in_check |= _attacks(kinds[i], sq[i], bk, others)
+    white_legal = valid & ~in_check
+    black_legal = valid
+
+    # Legal black king moves per position, captures included
+    moves_left = np.zeros(size, dtype=np.uint8)
+    for d in range(MOVES[KING].shape[1]):
+        to = MOVES[KING][bk, d]
+        ok = black_legal & (to >= 0)
+        to = np.where(to >= 0, to, 0).astype(np.uint8)
+        ok &= ~REACHES[KING][wk, to]
+        captured = np.full(size, -1, dtype=np.int8)
+        for i in range(2, n):
+            captured[sq[i] == to] = i
+        for j in range(2, n):
+            # The captured piece no longer attacks, and bk has left its square
+            attacker_live = captured != j
+            blockers = [np.where(captured == k, to, sq[k]) for k in range(n) if k not in (1, j)]
+            ok &= ~(attacker_live & _attacks(kinds[j], sq[j], to, blockers))
+        moves_left += ok
+    del sq, wk, bk
+
+    white = np.zeros(size, dtype=np.uint8)
+    black = np.zeros(size, dtype=np.uint8)
+    white[~white_legal] = ILLEGAL
+    black[~black_legal] = ILLEGAL
+
+    frontier = np.flatnonzero(black_legal & in_check & (moves_left == 0))
+    black[frontier] = 1
+    plies = 0
+    while len(frontier):
+        if log:
+            log(f"  {signature}: {len(frontier)} positions lost at ply {plies}")
+
+        # White moves into the lost positions: un-move each white piece
+        coords = [(frontier // place[i]) % 64 for i in range(n)]
+        won = []
+        for i in [0] + list(range(2, n)):
+            table = MOVES[kinds[i]]
+            others = [coords[j] for j in range(n) if j != i]
+            for d in range(table.shape[1]):
+                frm = table[coords[i], d]
+                ok = frm >= 0
+                frm = np.where(ok, frm, 0)
+                for other in others:
+                    ok &= frm != other
+                if kinds[i] in SLIDERS:
+                    for other in others:
+                        ok &= ~ON_BETWEEN[coords[i], frm, other]
+                pred = frontier + (frm - coords[i]) * place[i]
+                pred = pred[ok]
+                pred = pred[white[pred] == DRAW]
+                won.append(pred)
+        won = np.unique(np.concatenate(won)) if won else np.zeros(0, dtype=np.int64)
+        won = won[white_legal[won]]
+        white[won] = plies + 2
+
+        # Black moves into the won positions: un-move the black king
+        coords = [(won // place[i]) % 64 for i in range(n)]
+        preds = []
+        for d in range(MOVES[KING].shape[1]):
+            frm = MOVES[KING][coords[1], d]
+            ok = frm >= 0
+            frm = np.where(ok, frm, 0)
+            for j in range(n):
+                if j != 1:
+                    ok &= frm != coords[j]
+            pred = won + (frm - coords[1]) * place[1]
+            preds.append(pred[ok])
+        preds = np.concatenate(preds) if preds else np.zeros(0, dtype=np.int64)
+        preds = preds[black[preds] == DRAW]
+        np.subtract.at(moves_left, preds, 1)
+        frontier = np.unique(preds[moves_left[preds] == 0])
+        black[frontier] = plies + 3
+        plies += 2
+
+    return np.concatenate([white, black])
+
+
+def save_table(signature, table, out_dir):
+    signature = canonical_signature(signature)
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"{signature}.npy")
+    tmp = os.path.join(out_dir, f"{signature}.tmp.npy")
+    np.save(tmp, table)
+    os.replace(tmp, path)
+    return path
+
+
+# ---------------- LOOKUP ----------------
+
+def material_signature(board):
+    """(signature, strong colour) for a lone-king ending, else (None, None)"""
+    counts = [[], []]
+    for piece in board.squares:
+        if piece >= 0 and piece % 6 != KING:
+            counts[piece // 6].append(piece % 6)
+    if counts[WHITE] and counts[BLACK] or not (counts[WHITE] or counts[BLACK]):
+        return None, None
+    strong = WHITE if counts[WHITE] else BLACK
+    letters = "".join("PNBRQ"[kind] for kind in sorted(counts[strong], reverse=True))
+    return f"K{letters}K", strong
+
+
+class EndgameTables:
+    """Memory-mapped tables from a directory of <SIGNATURE>.npy files, opened on first use"""
+
+    def __init__(self, path):
+        self.path = path
+        self._tables = {}
+
+    def available(self):
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(name[:-4] for name in os.listdir(self.path) if name.endswith(".npy") and ".tmp" not in name)
+
+    def _table(self, signature):
+        """The signature's table, or None; a missing file is looked for again next time"""
+        if signature not in self._tables:
+            path = os.path.join(self.path, f"{signature}.npy")
+            if not os.path.exists(path):
+                return None
+            self._tables[signature] = np.load(path, mmap_mode="r")
+        return self._tables[signature]
+
+    def _index(self, board, signature, strong):
+        """Flat table index; a Black-strong position is mirrored onto White"""
+        kinds = parse_signature(signature)
+        flip = 56 if strong == BLACK else 0
+        squares = board.squares
+        own = strong * 6
+        kings = [board.king_square(strong) ^ flip, board.king_square(strong ^ 1) ^ flip]
+        pieces = []
+        for kind in kinds:
+            for sq in range(64):
+                if squares[sq] == own + kind and (sq ^ flip) not in pieces:
+                    pieces.append(sq ^ flip)
+                    break
+        index = 0
+        for sq in kings + pieces:
+            index = index * 64 + sq
+        side = 0 if board.turn == strong else 1
+        return side * 64 ** (2 + len(kinds)) + index
+
+    def value(self, board):
+        """Raw stored value for `board`, or None when no table covers it"""
+        signature, strong = material_signature(board)
+        if signature is None:
+            return None
+        table = self._table(signature)
+        if table is None:
+            return None
+        return int(table[self._index(board, signature, strong)])
+
+    def probe(self, board):
+        """{"result": "win"/"loss"/"draw" for the side to move, "plies", "moves"} or None"""
+        signature, _ = material_signature(board)
+        value = self.value(board)
+        if value is None or value == ILLEGAL:
+            return None
+        if value == DRAW:
+            return {"signature": signature, "result": "draw", "plies": None, "moves": None}
+        plies = value - 1
+        return {
+            "signature": signature,
+            "result": "win" if plies % 2 else "loss",
+            "plies": plies,
+            "moves": (plies + 1) // 2,
+        }
+
+    def _outcome(self, board, move):
+        """(result, plies) for the side that just moved; captures off the table are draws"""
+        board.push(move)
+        try:
+            probe = self.probe(board)
+        finally:
+            board.pop()
+        if probe is None or probe["result"] == "draw":
+            return "draw", 0
+        return ("win" if probe["result"] == "loss" else "loss"), probe["plies"] + 1
+
+    def best_move(self, board):
+        """
+        The table-perfect reply: the fastest mate when winning, the longest
+        defence when losing, a drawing move otherwise. None if the position is
+        not covered.
+        """
+        if self.probe(board) is None:
+            return None
+        best = None
+        for move in board.legal_moves():
+            result, plies = self._outcome(board, move)
+            rank = {"win": (2, -plies), "draw": (1, 0), "loss": (0, plies)}[result]
+            if best is None or rank > best[0]:
+                best = (rank, move, result, plies)
+        if best is None:
+            return None
+        _, move, result, plies = best
+        return {"move": move, "uci": move_to_uci(move), "result": result, "plies": plies}
@@ -0,0 +1,140 @@
+"""
+Static Evaluation
+
+Material plus piece-square tables, blended between middlegame and endgame
+king tables by the amount of material left. Scores are centipawns from the
+side to move's point of view, as negamax search expects.
+"""
+from app.chess.board import WHITE, iter_bits
+
+PIECE_VALUES = [100, 320, 330, 500, 900, 0]
+
+# Tables are written rank 8 first (as you look at a diagram) for White;
+# _white_table flips them so index = square with a1 = 0.
+_PAWN = [
+    0, 0, 0, 0, 0, 0, 0, 0,
+    50, 50, 50, 50, 50, 50, 50, 50,
+    10, 10, 20, 30, 30, 20, 10, 10,
+    5, 5, 10, 25, 25, 10, 5, 5,
+    0, 0, 0, 20, 20, 0, 0, 0,
+    5, -5, -10, 0, 0, -10, -5, 5,
+    5, 10, 10, -20, -20, 10, 10, 5,
+    0, 0, 0, 0, 0, 0, 0, 0,
+]
+_KNIGHT = [
+    -50, -40, -30, -30, -30, -30, -40, -50,
+    -40, -20, 0, 0, 0, 0, -20, -40,
+    -30, 0, 10, 15, 15, 10, 0, -30,
+    -30, 5, 15, 20, 20, 15, 5, -30,
+    -30, 0, 15, 20, 20, 15, 0, -30,
+    -30, 5, 10, 15, 15, 10, 5, -30,
+    -40, -20, 0, 5, 5, 0, -20, -40,
+    -50, -40, -30, -30, -30, -30, -40, -50,
+]
+_BISHOP = [
+    -20, -10, -10, -10, -10, -10, -10, -20,
+    -10, 0, 0, 0, 0, 0, 0, -10,
+    -10, 0, 5, 10, 10, 5, 0, -10,
+    -10, 5, 5, 10, 10, 5, 5, -10,
+    -10, 0, 10, 10, 10, 10, 0, -10,
+    -10, 10, 10, 10, 10, 10, 10, -10,
+    -10, 5, 0, 0, 0, 0, 5, -10,
+    -20, -10, -10, -10, -10, -10, -10, -20,
+]
+_ROOK = [
+    0, 0, 0, 0, 0, 0, 0, 0,
+    5, 10, 10, 10, 10, 10, 10, 5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    -5, 0, 0, 0, 0, 0, 0, -5,
+    0, 0, 0, 5, 5, 0, 0, 0,
+]
+_QUEEN = [
+    -20, -10, -10, -5, -5, -10, -10, -20,
+    -10, 0, 0, 0, 0, 0, 0, -10,
+    -10, 0, 5, 5, 5, 5, 0, -10,
+    -5, 0, 5, 5, 5, 5, 0, -5,
+    0, 0, 5, 5, 5, 5, 0, -5,
+    -10, 5, 5, 5, 5, 5, 0, -10,
+    -10, 0, 5, 0, 0, 0, 0, -10,
+    -20, -10, -10, -5, -5, -10, -10, -20,
+]
+_KING_MIDDLE = [
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -30, -40, -40, -50, -50, -40, -40, -30,
+    -20, -30, -30, -40, -40, -30, -30, -20,
+    -10, -20, -20, -20, -20, -20, -20, -10,
+    20, 20, 0, 0, 0, 0, 20, 20,
+    20, 30, 10, 0, 0, 10, 30, 20,
+]
+_KING_END = [
+    -50, -40, -30, -20, -20, -30, -40, -50,
+    -30, -20, -10, 0, 0, -10, -20, -30,
+    -30, -10, 20, 30, 30, 20, -10, -30,
+    -30, -10, 30, 40, 40, 30, -10, -30,
+    -30, -10, 30, 40, 40, 30, -10, -30,
+    -30, -10, 20, 30, 30, 20, -10, -30,
+    -30, -30, 0, 0, 0, 0, -30, -30,
+    -50, -30, -30, -30, -30, -30, -30, -50,
+]
+
+
+def _white_table(diagram):
+    return [diagram[(7 - sq // 8) * 8 + sq % 8] for sq in range(64)]
+
+
+def _tables(king):
+    """Material + placement per piece index (0..11), White tables mirrored for Black"""
+    white = [_PAWN, _KNIGHT, _BISHOP, _ROOK, _QUEEN, king]
+    tables = []
+    for kind in range(6):
+        table = _white_table(white[kind])
+        tables.append([PIECE_VALUES[kind] + v for v in table])
+    for kind in range(6):
+        table = tables[kind]
+        tables.append([table[sq ^ 56] for sq in range(64)])
+    return tables
+
+
+MIDDLEGAME = _tables(_KING_MIDDLE)
+ENDGAME = _tables(_KING_END)
+
+# Phase contribution per piece kind; the full starting set adds up to _PHASE_TOTAL
+_PHASE_WEIGHTS = [0, 1, 1, 2, 4, 0]
+_PHASE_TOTAL = 24
+
+
+def game_phase(board):
+    """24 with all pieces on the board, 0 with only kings and pawns"""
+    phase = 0
+    for piece in range(12):
+        weight = _PHASE_WEIGHTS[piece % 6]
+        if weight:
+            phase += weight * bin(board.bb[piece]).count("1")
+    return min(phase, _PHASE_TOTAL)
+
+
+def evaluate(board):
+    """Centipawn score for the side to move"""
+    middle = 0
+    end = 0
+    bb = board.bb
+    for piece in range(12):
+        b = bb[piece]
+        if not b:
+            continue
+        mg = MIDDLEGAME[piece]
+        eg = ENDGAME[piece]
+        sign = 1 if piece < 6 else -1
+        for sq in iter_bits(b):
+            middle += sign * mg[sq]
+            end += sign * eg[sq]
+
+    phase = game_phase(board)
+    score = (middle * phase + end * (_PHASE_TOTAL - phase)) // _PHASE_TOTAL
+    return score if board.turn == WHITE else -score
+
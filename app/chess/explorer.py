@@ -0,0 +1,244 @@
+"""
+Opening Explorer Index
+
+For every (position, move) seen in the first plies of a PGN collection the
+index stores white wins / draws / black wins. It is three parallel NumPy
+arrays sorted by Zobrist key and then move:
+
+    keys.npy    uint64    position hash (Board.hash before the move)
+    moves.npy   uint16    16-bit move
+    counts.npy  uint32    (n, 3) white wins, draws, black wins
+
+plus meta.json. The arrays are opened with mmap_mode="r", so a lookup is two
+binary searches over the key column and only touches a handful of pages; the
+process never loads the index into memory, which keeps millions of positions
+usable on a small instance.
+
+Each build goes into its own directory, and the CURRENT file beside them
+names the live one. The pointer is swapped only once a build is complete,
+so a running server never sees a mix of old and new arrays, and it reopens
+the index when CURRENT changes (see current_version()). The previous build
+is kept; older ones are removed.
+
+    data/openings/CURRENT                 20261019T101500123456Z
+    data/openings/20261019T101500123456Z/ keys.npy moves.npy counts.npy meta.json
+
+Building is a map-reduce over pgn.map_chunks(): each worker replays its games
+and returns its own aggregated (sorted, deduplicated) arrays, which the parent
+merges as they arrive.
+
+    python -m app.scripts.build_opening_index games.pgn --out data/openings
+
+    index = OpeningIndex("data/openings")
+    index.moves(Board())    # [{"uci": "e2e4", "san": "e4", "white": .., "draws": .., "black": .., "games": ..}, ...]
+"""
+import json
+import os
+import shutil
+from array import array
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.chess.board import Board, STARTING_FEN, move_to_uci
+from app.chess.pgn import map_chunks
+
+RESULT_COLUMN = {"1-0": 0, "1/2-1/2": 1, "0-1": 2}
+
+# Merge pending worker results once they hold this many rows
+MERGE_ROWS = 4_000_000
+
+# Names the live build directory inside the index directory
+POINTER = "CURRENT"
+
+
+def aggregate(keys, moves, counts):
+    """Sort rows by (key, move) and sum the counts of duplicates"""
+    if not len(keys):
+        return keys, moves, counts
+    order = np.lexsort((moves, keys))
+    keys, moves, counts = keys[order], moves[order], counts[order]
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = (keys[1:] != keys[:-1]) | (moves[1:] != moves[:-1])
+    starts = np.flatnonzero(first)
+    return keys[starts], moves[starts], np.add.reduceat(counts, starts, axis=0).astype(np.uint32)
+
+
+def _merge(parts):
+    return aggregate(
+        np.concatenate([p[0] for p in parts]),
+        np.concatenate([p[1] for p in parts]),
+        np.concatenate([p[2] for p in parts]),
+    )
+
+
+class CountPositions:
+    """Map step: replay the first `max_ply` plies of each decisive or drawn game"""
+
+    def __init__(self, max_ply=30):
+        self.max_ply = max_ply
+
+    def __call__(self, games):
+        keys, moves, results = array("Q"), array("H"), array("B")
+        n_games = 0
+        for game in games:
+            column = RESULT_COLUMN.get(game.headers.get("Result"))
+            if column is None:
+                continue
+            try:
+                board = Board(game.start_fen)
+            except ValueError:
+                continue
+            n_games += 1
+            for san in game.san_moves()[:self.max_ply]:
+                try:
+                    move = board.parse_san(san)
+                except ValueError:
+                    break
+                keys.append(board.hash)
+                moves.append(move)
+                results.append(column)
+                board.push(move)
+
+        results = np.frombuffer(results, dtype=np.uint8)
+        counts = np.zeros((len(results), 3), dtype=np.uint32)
+        counts[np.arange(len(results)), results] = 1
+        keys = np.frombuffer(keys, dtype=np.uint64)
+        moves = np.frombuffer(moves, dtype=np.uint16)
+        return n_games, aggregate(keys, moves, counts)
+
+
+def build_index(paths, out_dir, max_ply=30, min_games=1, header_filter=None, workers=None):
+    """
+    Build the index for one or more PGN files into `out_dir`. Moves played in
+    fewer than `min_games` games are dropped. Returns the meta dict.
+    """
+    counter = CountPositions(max_ply)
+    merged = []
+    pending_rows = 0
+    n_games = 0
+    for path in paths:
+        for games, part in map_chunks(path, counter, header_filter, workers):
+            n_games += games
+            merged.append(part)
+            pending_rows += len(part[0])
+            if pending_rows >= MERGE_ROWS:
+                merged = [_merge(merged)]
+                pending_rows = len(merged[0][0])
+
+    if merged:
+        keys, moves, counts = _merge(merged)
+    else:
+        keys, moves, counts = np.zeros(0, np.uint64), np.zeros(0, np.uint16), np.zeros((0, 3), np.uint32)
+    if min_games > 1:
+        keep = counts.sum(axis=1) >= min_games
+        keys, moves, counts = keys[keep], moves[keep], counts[keep]
+
+    built_at = datetime.now(timezone.utc)
+    version = built_at.strftime("%Y%m%dT%H%M%S%fZ")
+    meta = {
+        "version": version,
+        "games": n_games,
+        "rows": int(len(keys)),
+        "positions": int(len(np.unique(keys))) if len(keys) else 0,
+        "max_ply": max_ply,
+        "min_games": min_games,
+        "sources": [os.path.basename(p) for p in paths],
+        "built_at": built_at.isoformat(),
+    }
+    previous = current_version(out_dir)
+    build_dir = os.path.join(out_dir, version)
+    os.makedirs(build_dir)
+    for name, data in (("keys", keys), ("moves", moves), ("counts", counts)):
+        np.save(os.path.join(build_dir, f"{name}.npy"), np.ascontiguousarray(data))
+    with open(os.path.join(build_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+    # Only a complete build becomes live: the pointer is swapped in one rename
+    tmp = os.path.join(out_dir, f"{POINTER}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(out_dir, POINTER))
+    _prune(out_dir, keep={version, previous})
+    return meta
+
+
+def current_version(path):
+    """Name of the live build in an index directory, or None if nothing has been built"""
+    try:
+        with open(os.path.join(path, POINTER), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _prune(out_dir, keep):
+    """Remove build directories other than `keep`; a server may still be reading the previous one"""
+    for name in os.listdir(out_dir):
+        build_dir = os.path.join(out_dir, name)
+        if name not in keep and os.path.isfile(os.path.join(build_dir, "meta.json")):
+            shutil.rmtree(build_dir, ignore_errors=True)
+
+
+class OpeningIndex:
+    """
+    Read-only, memory-mapped view of the live build in an index directory
+    (FileNotFoundError if nothing has been built)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.version = current_version(path)
+        if self.version is None:
+            raise FileNotFoundError(f"No opening index in {path}")
+        build_dir = os.path.join(path, self.version)
+        self.keys = np.load(os.path.join(build_dir, "keys.npy"), mmap_mode="r")
+        self.move_codes = np.load(os.path.join(build_dir, "moves.npy"), mmap_mode="r")
+        self.counts = np.load(os.path.join(build_dir, "counts.npy"), mmap_mode="r")
+        with open(os.path.join(build_dir, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+
+    def is_current(self):
+        """False once a newer build has been switched in"""
+        return current_version(self.path) == self.version
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, key):
+        """(moves, counts) arrays for a Zobrist key; empty when the position is unknown"""
+        key = np.uint64(key)
+        lo = int(np.searchsorted(self.keys, key, side="left"))
+        hi = int(np.searchsorted(self.keys, key, side="right"))
+        return self.move_codes[lo:hi], self.counts[lo:hi]
+
+    def moves(self, board):
+        """Moves played from `board`, most popular first"""
+        codes, counts = self.lookup(board.hash)
+        if not len(codes):
+            return []
+        # A 64-bit key collision would show up as moves that are not legal here
+        legal = set(board.legal_moves())
+        result = []
+        for move, (white, draws, black) in zip(codes.tolist(), counts.tolist()):
+            if move not in legal:
+                continue
+            result.append({
+                "uci": move_to_uci(move),
+                "san": board.san(move),
+                "white": white,
+                "draws": draws,
+                "black": black,
+                "games": white + draws + black,
+            })
+        result.sort(key=lambda m: m["games"], reverse=True)
+        return result
+
+    def position(self, fen=STARTING_FEN):
+        board = Board(fen)
+        moves = self.moves(board)
+        return {
+            "fen": board.fen(),
+            "games": sum(m["games"] for m in moves),
+            "moves": moves,
+        }
@@ -0,0 +1,310 @@
+"""
+Compact Binary Game Format
+
+Stores a game in a small fraction of its PGN size:
+
+- moves are the board's 16-bit moves (from | to << 6 | flags << 12), two
+  bytes each, little-endian
+- [%clk] times are varint-coded differences from the same player's previous
+  clock, in tenths of a second
+- tag names and the most common tag values (results, "?", terminations...)
+  are one-byte dictionary codes; numeric values such as ratings are varints
+
+A record is laid out as
+
+    varint flags | varint tag count | tags | varint move count | moves | clocks
+
+where each tag is a name code (0 = literal name follows) and a value code.
+A value code below len(COMMON_VALUES) is a dictionary value; otherwise
+(code - len(COMMON_VALUES)) holds a kind in its low two bits: 0 literal
+string (length in the upper bits), 1 archive string table reference,
+2 non-negative integer.
+
+An archive is a file of length-prefixed records after ARCHIVE_MAGIC. Every
+literal string in an archive is also appended to a string table that writer
+and reader build in step, so a player's name or an event is written once per
+archive and then referenced by index.
+
+Decoding never copies the moves: they come back as a memoryview cast to
+unsigned shorts over the caller's buffer (or the archive's mmap).
+
+    from app.chess.gamecodec import encode_game, decode_game
+
+    data = encode_game(game.headers, game.moves, game.clocks())
+    decoded = decode_game(data)
+    decoded.headers, decoded.moves[0], decoded.clocks
+"""
+import mmap
+import sys
+from array import array
+
+from app.chess.board import Board, STARTING_FEN
+
+HAS_CLOCKS = 1
+
+TAG_NAMES = (
+    "Event", "Site", "Date", "Round", "White", "Black", "Result",
+    "WhiteElo", "BlackElo", "TimeControl", "ECO", "Opening", "Termination",
+    "UTCDate", "UTCTime", "WhiteRatingDiff", "BlackRatingDiff", "WhiteTitle",
+    "BlackTitle", "Variant", "FEN", "SetUp", "PlyCount", "EventDate",
+    "Annotator", "Time", "Mode", "WhiteFideId", "BlackFideId", "Board",
+)
+COMMON_VALUES = (
+    "?", "1-0", "0-1", "1/2-1/2", "*", "-", "????.??.??", "Normal",
+    "Time forfeit", "Abandoned", "Rules infraction", "Standard", "1",
+    "From Position", "Rated Blitz game", "Rated Rapid game",
+    "Rated Bullet game", "Rated Classical game", "Casual Blitz game",
+    "Casual Rapid game", "Casual Bullet game", "Casual Classical game",
+)
+_TAG_CODES = {name: i + 1 for i, name in enumerate(TAG_NAMES)}
+_VALUE_CODES = {value: i for i, value in enumerate(COMMON_VALUES)}
+_LITERAL, _REFERENCE, _INTEGER = 0, 1, 2
+
+ARCHIVE_MAGIC = b"CGA\x01"
+
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+def _varint(out, n):
+    while n > 0x7F:
+        out.append(n & 0x7F | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _read_varint(buf, pos):
+    n = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        n |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return n, pos
+        shift += 7
+
+
+def _zigzag(n):
+    return n << 1 if n >= 0 else (-n << 1) - 1
+
+
+def _unzigzag(n):
+    return n >> 1 if not n & 1 else -((n + 1) >> 1)
+
+
+class StringTable:
+    """Archive-wide string interning; writer and reader grow it in the same order"""
+
+    def __init__(self):
+        self.strings = []
+        self.index = {}
+
+    def add(self, value):
+        self.index[value] = len(self.strings)
+        self.strings.append(value)
+
+
+def _write_value(out, value, table):
+    code = _VALUE_CODES.get(value)
+    if code is not None:
+        _varint(out, code)
+        return
+    base = len(COMMON_VALUES)
+    if value.isdigit() and value.isascii() and str(int(value)) == value:
+        _varint(out, base + (int(value) << 2 | _INTEGER))
+    elif table is not None and value in table.index:
+        _varint(out, base + (table.index[value] << 2 | _REFERENCE))
+    else:
+        data = value.encode("utf-8")
+        _varint(out, base + (len(data) << 2 | _LITERAL))
+        out += data
+        if table is not None:
+            table.add(value)
+
+
+def _read_value(buf, pos, table):
+    code, pos = _read_varint(buf, pos)
+    if code < len(COMMON_VALUES):
+        return COMMON_VALUES[code], pos
+    code -= len(COMMON_VALUES)
+    kind, arg = code & 3, code >> 2
+    if kind == _INTEGER:
+        return str(arg), pos
+    if kind == _REFERENCE:
+        if table is None:
+            raise ValueError("String reference outside an archive")
+        return table.strings[arg], pos
+    value = bytes(buf[pos:pos + arg]).decode("utf-8")
+    if table is not None:
+        table.add(value)
+    return value, pos + arg
+
+
+def encode_game(headers, moves, clocks=None, table=None):
+    """
+    Bytes for one game: a tag dict, an iterable of 16-bit moves and optionally
+    one clock per move in tenths of a second. `table` is an archive's
+    StringTable; standalone records leave it None.
+    """
+    moves = array("H", moves)
+    out = bytearray()
+    _varint(out, HAS_CLOCKS if clocks is not None else 0)
+
+    _varint(out, len(headers))
+    for name, value in headers.items():
+        code = _TAG_CODES.get(name)
+        if code is None:
+            data = name.encode("utf-8")
+            _varint(out, 0)
+            _varint(out, len(data))
+            out += data
+        else:
+            _varint(out, code)
+        _write_value(out, value, table)
+
+    _varint(out, len(moves))
+    if not _LITTLE_ENDIAN:
+        moves.byteswap()
+    out += moves.tobytes()
+
+    if clocks is not None:
+        if len(clocks) != len(moves):
+            raise ValueError("clocks must have one entry per move")
+        previous = [0, 0]
+        for ply, clock in enumerate(clocks):
+            _varint(out, _zigzag(clock - previous[ply & 1]))
+            previous[ply & 1] = clock
+    return bytes(out)
+
+
+class DecodedGame:
+    """A decoded record; `moves` is a zero-copy view of unsigned 16-bit moves"""
+
+    __slots__ = ("headers", "moves", "clocks")
+
+    def __init__(self, headers, moves, clocks):
+        self.headers = headers
+        self.moves = moves
+        self.clocks = clocks
+
+    def __repr__(self):
+        return f"<DecodedGame {self.headers.get('White', '?')} vs {self.headers.get('Black', '?')}, {len(self.moves)} plies>"
+
+    @property
+    def start_fen(self):
+        return self.headers.get("FEN", STARTING_FEN)
+
+    def board(self):
+        """Board at the end of the game (with the moves on its undo stack)"""
+        board = Board(self.start_fen)
+        for move in self.moves:
+            board.push(move)
+        return board
+
+    def pgn(self):
+        from app.chess.pgn import format_game
+        return format_game(self.headers, self.moves, self.clocks)
+
+
+def decode_game(buf, table=None):
+    """DecodedGame from a record's bytes (bytes, bytearray, memoryview or mmap slice view)"""
+    view = memoryview(buf)
+    flags, pos = _read_varint(view, 0)
+
+    headers = {}
+    count, pos = _read_varint(view, pos)
+    for _ in range(count):
+        code, pos = _read_varint(view, pos)
+        if code:
+            name = TAG_NAMES[code - 1]
+        else:
+            length, pos = _read_varint(view, pos)
+            name = bytes(view[pos:pos + length]).decode("utf-8")
+            pos += length
+        headers[name], pos = _read_value(view, pos, table)
+
+    count, pos = _read_varint(view, pos)
+    moves = view[pos:pos + 2 * count].cast("B").cast("H")
+    if not _LITTLE_ENDIAN:
+        swapped = array("H", moves.tobytes())
+        swapped.byteswap()
+        moves = memoryview(swapped)
+    pos += 2 * count
+
+    clocks = None
+    if flags & HAS_CLOCKS:
+        clocks = []
+        previous = [0, 0]
+        for ply in range(count):
+            delta, pos = _read_varint(view, pos)
+            previous[ply & 1] += _unzigzag(delta)
+            clocks.append(previous[ply & 1])
+    return DecodedGame(headers, moves, clocks)
+
+
+def encode_moves(moves):
+    """Just a move list (e.g. a puzzle's solution) as 2 bytes per move"""
+    moves = array("H", moves)
+    if not _LITTLE_ENDIAN:
+        moves.byteswap()
+    return moves.tobytes()
+
+
+def decode_moves(buf):
+    """Inverse of encode_moves(), as a zero-copy view where the byte order allows"""
+    view = memoryview(buf).cast("B").cast("H")
+    if _LITTLE_ENDIAN:
+        return view
+    moves = array("H", view.tobytes())
+    moves.byteswap()
+    return memoryview(moves)
+
+
+# ---------------- ARCHIVES ----------------
+
+class ArchiveWriter:
+    """
+    Appends games to a new archive file.
+
+        with ArchiveWriter("games.cga") as archive:
+            for game in read_games("games.pgn"):
+                archive.write(game.headers, game.moves, game.clocks())
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "wb")
+        self._file.write(ARCHIVE_MAGIC)
+        self.table = StringTable()
+        self.games = 0
+
+    def write(self, headers, moves, clocks=None):
+        record = encode_game(headers, moves, clocks, self.table)
+        prefix = bytearray()
+        _varint(prefix, len(record))
+        self._file.write(prefix)
+        self._file.write(record)
+        self.games += 1
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_archive(path):
+    """Yield the DecodedGames of an archive, decoded straight from a memory map"""
+    with open(path, "rb") as f:
+        if f.read(len(ARCHIVE_MAGIC)) != ARCHIVE_MAGIC:
+            raise ValueError(f"{path} is not a game archive")
+        # The map outlives the file object; the move views keep it alive
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(buf)
+    table = StringTable()
+    pos = len(ARCHIVE_MAGIC)
+    while pos < len(view):
+        length, pos = _read_varint(view, pos)
+        yield decode_game(view[pos:pos + length], table)
+        pos += length
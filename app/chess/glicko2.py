@@ -0,0 +1,128 @@
+"""
+Glicko-2 Ratings
+
+Vectorised implementation of Glickman's Glicko-2 system
+(http://www.glicko.net/glicko/glicko2.pdf). Every player is a slot in
+rating/RD/volatility arrays, and a whole rating period is one batch of NumPy
+operations over all of that period's games. The volatility iteration
+(Illinois method) runs for every player at once, so a full recompute is
+one short loop over periods.
+
+    from app.chess.glicko2 import Ratings
+
+    ratings = Ratings(n_players)
+    ratings.update(white, black, white_score)     # one rating period's games (index arrays)
+    ratings.rating, ratings.rd, ratings.volatility
+"""
+import numpy as np
+
+SCALE = 173.7178
+DEFAULT_RATING = 1500.0
+DEFAULT_RD = 350.0
+DEFAULT_VOLATILITY = 0.06
+TAU = 0.5
+EPSILON = 1e-6
+MAX_ITERATIONS = 100
+
+
+def _g(phi):
+    return 1.0 / np.sqrt(1.0 + 3.0 * phi * phi / np.pi ** 2)
+
+
+def new_volatility(sigma, phi, v, delta, tau=TAU):
+    """Step 5 of the paper for arrays of players: the Illinois root-find, all at once"""
+    a = np.log(sigma * sigma)
+    phi2 = phi * phi
+    delta2 = delta * delta
+
+    def f(x):
+        ex = np.exp(x)
+        return ex * (delta2 - phi2 - v - ex) / (2.0 * (phi2 + v + ex) ** 2) - (x - a) / (tau * tau)
+
+    big = delta2 > phi2 + v
+    B = np.where(big, np.log(np.where(big, delta2 - phi2 - v, 1.0)), a - tau)
+    pending = ~big
+    for _ in range(MAX_ITERATIONS):
+        pending &= f(B) < 0
+        if not pending.any():
+            break
+        B = np.where(pending, B - tau, B)
+
+    A = a
+    fA, fB = f(A), f(B)
+    for _ in range(MAX_ITERATIONS):
+        active = np.abs(B - A) > EPSILON
+        if not active.any():
+            break
+        C = A + (A - B) * fA / (fB - fA)
+        fC = f(C)
+        flip = fC * fB <= 0
+        A = np.where(active, np.where(flip, B, A), A)
+        fA = np.where(active, np.where(flip, fB, fA / 2.0), fA)
+        B = np.where(active, C, B)
+        fB = np.where(active, fC, fB)
+    return np.exp(A / 2.0)
+
+
+class Ratings:
+    """Rating state for players 0..n-1; players join when first given a game"""
+
+    def __init__(self, n, rating=DEFAULT_RATING, rd=DEFAULT_RD, volatility=DEFAULT_VOLATILITY, tau=TAU):
+        self.mu = (np.array(np.broadcast_to(rating, n), dtype=float) - DEFAULT_RATING) / SCALE
+        self.phi = np.array(np.broadcast_to(rd, n), dtype=float) / SCALE
+        self.sigma = np.array(np.broadcast_to(volatility, n), dtype=float)
+        self.tau = tau
+        self.max_phi = DEFAULT_RD / SCALE
+        # Players only start losing certainty once they have played
+        self.active = np.zeros(n, dtype=bool)
+
+    @property
+    def rating(self):
+        return self.mu * SCALE + DEFAULT_RATING
+
+    @property
+    def rd(self):
+        return self.phi * SCALE
+
+    @property
+    def volatility(self):
+        return self.sigma
+
+    def update(self, white, black, score):
+        """
+        Close one rating period: `white`/`black` are player index arrays and
+        `score` White's result per game (1, 0.5 or 0). Returns the number of
+        games each player had in the period.
+        """
+        n = len(self.mu)
+        white = np.asarray(white, dtype=np.int64)
+        black = np.asarray(black, dtype=np.int64)
+        score = np.asarray(score, dtype=float)
+
+        # Each game seen from both sides
+        me = np.concatenate([white, black])
+        them = np.concatenate([black, white])
+        result = np.concatenate([score, 1.0 - score])
+
+        g = _g(self.phi[them])
+        expected = 1.0 / (1.0 + np.exp(-g * (self.mu[me] - self.mu[them])))
+        v_inv = np.bincount(me, g * g * expected * (1.0 - expected), minlength=n)
+        improvement = np.bincount(me, g * (result - expected), minlength=n)
+        games = np.bincount(me, minlength=n)
+
+        played = games > 0
+        self.active |= played
+        idle = self.active & ~played
+
+        v = 1.0 / v_inv[played]
+        delta = v * improvement[played]
+        sigma = new_volatility(self.sigma[played], self.phi[played], v, delta, self.tau)
+        phi_star = np.sqrt(self.phi[played] ** 2 + sigma * sigma)
+        phi = 1.0 / np.sqrt(1.0 / phi_star ** 2 + 1.0 / v)
+
+        self.mu[played] += phi * phi * improvement[played]
+        self.phi[played] = np.minimum(phi, self.max_phi)
+        self.sigma[played] = sigma
+        # Step 6 only, for players who sat the period out
+        self.phi[idle] = np.minimum(np.sqrt(self.phi[idle] ** 2 + self.sigma[idle] ** 2), self.max_phi)
+        return games
@@ -0,0 +1,174 @@
+"""
+Mate-in-N Solver
+
+Null-window alpha-beta over the attacker/defender tree: an attacker node
+succeeds if any move forces mate, a defender node fails as soon as one reply
+escapes. Checking moves are tried first, defender replies that refuted a
+sibling line (killers) are tried first, and proven results are kept in a
+transposition table keyed by Zobrist hash.
+
+    from app.chess import Board
+    from app.chess.mate import solve_mate
+
+    solve_mate(Board("6k1/5ppp/8/8/8/8/8/R7 w - - 0 1"), 1)   # ['a1a8']
+"""
+from app.chess.board import CAPTURE, move_to_uci
+
+
+class MateSearch:
+    def __init__(self, board):
+        self.board = board
+        # hash -> (largest n proven to have no mate, smallest n proven to mate)
+        self.table = {}
+        # hash -> the move that proved the mate there
+        self.best = {}
+        self.killers = {}
+        self.nodes = 0
+
+    # ---------------- ORDERING ----------------
+
+    def _attacker_moves(self, moves):
+        """(checks, captures + quiet moves) - checks are searched first"""
+        board = self.board
+        checks, captures, quiet = [], [], []
+        for move in moves:
+            if board.gives_check(move):
+                checks.append(move)
+            elif move >> 12 & CAPTURE:
+                captures.append(move)
+            else:
+                quiet.append(move)
+        return checks, captures + quiet
+
+    def _defender_moves(self, moves, ply):
+        killers = self.killers.get(ply)
+        if not killers:
+            return moves
+        front = [m for m in killers if m in moves]
+        return front + [m for m in moves if m not in front]
+
+    def _add_killer(self, ply, move):
+        killers = self.killers.setdefault(ply, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+
+    # ---------------- SEARCH ----------------
+
+    def attack(self, n, ply=0):
+        """Can the side to move force mate within `n` of its own moves? Returns the move or None."""
+        board = self.board
+        key = board.hash
+        no_mate, mate = self.table.get(key, (0, None))
+        if n <= no_mate:
+            return None
+
+        self.nodes += 1
+        moves = board.legal_moves()
+        if mate is not None and mate <= n:
+            # Known to mate; the first move is stored alongside so it can be replayed
+            found = self.best.get(key)
+            if found in moves:
+                return found
+
+        checks, others = self._attacker_moves(moves)
+        # Only a checking move can mate in one
+        candidates = checks if n == 1 else checks + others
+        for move in candidates:
+            board.push(move)
+            if n == 1:
+                ok = not board.legal_moves()
+            else:
+                ok = self.defend(n - 1, ply + 1)
+            board.pop()
+            if ok:
+                self.table[key] = (no_mate, n if mate is None else min(mate, n))
+                self.best[key] = move
+                return move
+
+        self.table[key] = (max(no_mate, n), mate)
+        return None
+
+    def defend(self, n, ply):
+        """After the attacker's move: does every reply still lose to mate within `n`?"""
+        board = self.board
+        self.nodes += 1
+        moves = board.legal_moves()
+        if not moves:
+            return board.is_check()
+        for move in self._defender_moves(moves, ply):
+            board.push(move)
+            ok = self.attack(n, ply + 1) is not None
+            board.pop()
+            if not ok:
+                self._add_killer(ply, move)
+                return False
+        return True
+
+    def mate_in(self, max_moves):
+        """(n, first move) for the shortest forced mate up to `max_moves`, or (None, None)"""
+        for n in range(1, max_moves + 1):
+            move = self.attack(n)
+            if move is not None:
+                return n, move
+        return None, None
+
+    def line(self, n, move):
+        """
+        Full solution line for a mate in `n` starting with `move`: after each
+        attacker move the defender plays the reply that holds out longest.
+        """
+        board = self.board
+        line = []
+        pushed = 0
+        while move is not None:
+            line.append(move)
+            board.push(move)
+            pushed += 1
+            replies = board.legal_moves()
+            if not replies or n == 1:
+                break
+            n -= 1
+            longest = None
+            for reply in replies:
+                board.push(reply)
+                for k in range(1, n + 1):
+                    if self.attack(k) is not None:
+                        break
+                board.pop()
+                if longest is None or k > longest[0]:
+                    longest = (k, reply)
+            k, reply = longest
+            line.append(reply)
+            board.push(reply)
+            pushed += 1
+            n = k
+            move = self.attack(n)
+        for _ in range(pushed):
+            board.pop()
+        return line
+
+
+def solve_mate(board, max_moves=3):
+    """UCI solution line for the shortest mate within `max_moves`, or None"""
+    search = MateSearch(board)
+    n, move = search.mate_in(max_moves)
+    if n is None:
+        return None
+    return [move_to_uci(m) for m in search.line(n, move)]
+
+
+def mating_moves(board, n):
+    """Every first move that forces mate within `n` moves (UCI strings)"""
+    search = MateSearch(board)
+    result = []
+    for move in board.legal_moves():
+        board.push(move)
+        if n == 1:
+            ok = board.is_check() and not board.legal_moves()
+        else:
+            ok = search.defend(n - 1, 1)
+        board.pop()
+        if ok:
+            result.append(move_to_uci(move))
+    return result
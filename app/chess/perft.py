@@ -0,0 +1,197 @@
+"""
+Perft - move generator verification
+
+Counts leaf nodes of the legal move tree and compares them with published
+node counts for the standard test positions. Subtrees are cached by Zobrist
+hash, and `--workers` splits the root moves over a process pool.
+
+    python -m app.chess.perft                 # verify the suite at default depths
+    python -m app.chess.perft --depth 5 --workers 0
+    python -m app.chess.perft --fen "<fen>" --depth 3 --divide
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.chess.board import Board, STARTING_FEN, move_to_uci
+
+# (name, fen, node counts for depth 1, 2, 3, ...)
+PERFT_SUITE = [
+    ("initial", STARTING_FEN,
+     [20, 400, 8902, 197281, 4865609, 119060324]),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     [48, 2039, 97862, 4085603, 193690690]),
+    ("position3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     [14, 191, 2812, 43238, 674624, 11030083]),
+    ("position4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     [6, 264, 9467, 422333, 15833292]),
+    ("position5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     [44, 1486, 62379, 2103487, 89941194]),
+    ("position6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     [46, 2079, 89890, 3894594, 164075551]),
+]
+
+
+def perft(board, depth):
+    """Number of leaf nodes `depth` plies below `board` (bulk-counted at the last ply)"""
+    moves = board.legal_moves()
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+    nodes = 0
+    push = board.push
+    pop = board.pop
+    for move in moves:
+        push(move)
+        nodes += perft(board, depth - 1)
+        pop()
+    return nodes
+
+
+# Cache entries above this count are dropped wholesale; at ~100 bytes each
+# this keeps a worker under a few hundred MB.
+CACHE_LIMIT = 2_000_000
+
+
+def perft_cached(board, depth, cache):
+    """
+    Same count as perft(), but transpositions are looked up in `cache`
+    (a dict keyed by hash and depth). Depth 1 is cheaper to count than to look up.
+    """
+    if depth <= 1:
+        return len(board.legal_moves()) if depth == 1 else 1
+    key = board.hash ^ depth
+    hit = cache.get(key)
+    if hit is not None and hit[0] == board.hash:
+        return hit[1]
+    nodes = 0
+    push = board.push
+    pop = board.pop
+    for move in board.legal_moves():
+        push(move)
+        nodes += perft_cached(board, depth - 1, cache)
+        pop()
+    if len(cache) >= CACHE_LIMIT:
+        cache.clear()
+    cache[key] = (board.hash, nodes)
+    return nodes
+
+
+def _subtree(args):
+    fen, uci, depth, use_cache = args
+    board = Board(fen)
+    board.push(board.parse_uci(uci))
+    if use_cache:
+        return uci, perft_cached(board, depth - 1, _worker_cache)
+    return uci, perft(board, depth - 1)
+
+
+# One cache per worker process, kept across tasks so later root moves reuse earlier subtrees
+_worker_cache = {}
+
+
+def divide(board, depth, use_cache=True, pool=None):
+    """
+    Per-root-move node counts, for diffing against another engine. With a
+    `pool` (a ProcessPoolExecutor) each root move is counted in a worker.
+    """
+    if pool is not None and depth > 1:
+        fen = board.fen()
+        jobs = [(fen, move_to_uci(m), depth, use_cache) for m in board.legal_moves()]
+        return dict(pool.map(_subtree, jobs))
+
+    cache = {}
+    result = {}
+    for move in board.legal_moves():
+        board.push(move)
+        if use_cache:
+            result[move_to_uci(move)] = perft_cached(board, depth - 1, cache)
+        else:
+            result[move_to_uci(move)] = perft(board, depth - 1)
+        board.pop()
+    return result
+
+
+def count(board, depth, use_cache=True, pool=None):
+    """Leaf count using whichever of the plain / cached / pooled counters is asked for"""
+    if pool is not None and depth > 1:
+        return sum(divide(board, depth, use_cache, pool).values())
+    if use_cache:
+        return perft_cached(board, depth, {})
+    return perft(board, depth)
+
+
+def make_pool(workers):
+    """ProcessPoolExecutor for `workers` processes (0 = one per core), or None for 1"""
+    if workers == 1:
+        return None
+    return ProcessPoolExecutor(max_workers=workers or os.cpu_count())
+
+
+def run_suite(depth=3, use_cache=True, workers=1, out=sys.stdout):
+    """
+    Run every suite position to `depth` (capped by known counts). Returns
+    (all_ok, results) where results holds one dict per position.
+    """
+    ok = True
+    results = []
+    pool = make_pool(workers)
+    try:
+        for name, fen, expected in PERFT_SUITE:
+            d = min(depth, len(expected))
+            board = Board(fen)
+            t0 = time.perf_counter()
+            nodes = count(board, d, use_cache, pool)
+            elapsed = time.perf_counter() - t0
+            passed = nodes == expected[d - 1]
+            ok = ok and passed
+            status = "ok" if passed else f"FAIL (expected {expected[d - 1]})"
+            nps = nodes / elapsed if elapsed > 0 else 0
+            print(f"{name:<10} depth {d}  {nodes:>10} nodes  {elapsed:7.2f}s  {nps:>9.0f} nps  {status}", file=out)
+            results.append({
+                "name": name,
+                "depth": d,
+                "nodes": nodes,
+                "seconds": round(elapsed, 4),
+                "nps": round(nps),
+                "ok": passed,
+            })
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    return ok, results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Perft move generator verification")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fen", help="run a single position instead of the suite")
+    parser.add_argument("--divide", action="store_true", help="print per-move counts")
+    parser.add_argument("--no-cache", action="store_true", help="count every node (raw move generator speed)")
+    parser.add_argument("--workers", type=int, default=1, help="processes to split root moves over (0 = all cores)")
+    args = parser.parse_args(argv)
+    use_cache = not args.no_cache
+
+    if args.fen:
+        board = Board(args.fen)
+        pool = make_pool(args.workers)
+        try:
+            if args.divide:
+                counts = divide(board, args.depth, use_cache, pool)
+                for uci in sorted(counts):
+                    print(f"{uci}: {counts[uci]}")
+                print(f"\nMoves: {len(counts)}  Nodes: {sum(counts.values())}")
+            else:
+                print(count(board, args.depth, use_cache, pool))
+        finally:
+            if pool is not None:
+                pool.shutdown()
+        return 0
+
+    ok, _ = run_suite(args.depth, use_cache, args.workers)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
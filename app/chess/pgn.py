@@ -0,0 +1,318 @@
+"""
+Streaming PGN Reader
+
+Memory-maps a PGN file and yields games lazily. Splitting the file into games
+and reading their tag pairs is done on raw bytes; movetext is only decoded
+(and SAN only replayed) when a game's `moves` are asked for, so a header
+filter can skip non-matching games almost for free.
+
+    from app.chess.pgn import read_games, HeaderFilter
+
+    for game in read_games("games.pgn", HeaderFilter(min_elo=2000)):
+        game.headers["White"], game.moves      # moves: array('H') of 16-bit moves
+
+map_games() runs a function over every game with a process pool, splitting
+the file at game boundaries so each worker scans its own byte range;
+map_chunks() hands each worker its whole range for map-reduce style jobs.
+"""
+import mmap
+import os
+import re
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from app.chess.board import Board, STARTING_FEN
+
+_TAG = re.compile(rb'\[\s*(\w+)\s+"((?:[^"\\]|\\.)*)"\s*\]')
+_COMMENT = re.compile(r"\{[^}]*\}|;[^\n]*")
+_TOKEN = re.compile(r"\(|\)|\$\d+|\d+\.(?:\.\.)?|1-0|0-1|1/2-1/2|\*|[^\s()$]+")
+_RESULTS = {"1-0", "0-1", "1/2-1/2", "*"}
+_COMMENT_OR_TOKEN = re.compile(r"\{[^}]*\}|;[^\n]*|" + _TOKEN.pattern)
+_CLOCK = re.compile(r"\[%clk\s+(\d+):(\d\d?):(\d\d?(?:\.\d+)?)\]")
+
+# The Seven Tag Roster, written first and in this order
+ROSTER = ("Event", "Site", "Date", "Round", "White", "Black", "Result")
+
+GAME_START = b"[Event "
+
+
+class PGNGame:
+    """One game: tag pairs plus the raw movetext, with moves decoded on first access"""
+
+    __slots__ = ("headers", "offset", "_movetext", "_moves")
+
+    def __init__(self, headers, movetext, offset):
+        self.headers = headers
+        self.offset = offset
+        self._movetext = movetext
+        self._moves = None
+
+    def __repr__(self):
+        return f"<PGNGame {self.headers.get('White', '?')} vs {self.headers.get('Black', '?')} @{self.offset}>"
+
+    @property
+    def start_fen(self):
+        return self.headers.get("FEN", STARTING_FEN)
+
+    def san_moves(self):
+        """Mainline SAN tokens, with comments, variations, NAGs and move numbers stripped"""
+        text = _COMMENT.sub(" ", self._movetext.decode("utf-8", "replace"))
+        sans = []
+        depth = 0
+        for token in _TOKEN.findall(text):
+            if token == "(":
+                depth += 1
+            elif token == ")":
+                depth = max(0, depth - 1)
+            elif depth or token[0] == "$" or token in _RESULTS or token[0].isdigit() and token.endswith("."):
+                continue
+            else:
+                sans.append(token)
+        return sans
+
+    def clocks(self):
+        """
+        Remaining time after each mainline move in tenths of a second, from
+        [%clk h:mm:ss] comments; None if any move lacks one
+        """
+        text = self._movetext.decode("utf-8", "replace")
+        clocks = []
+        depth = 0
+        for token in _COMMENT_OR_TOKEN.findall(text):
+            if token[0] in "{;":
+                match = _CLOCK.search(token)
+                if match and not depth and clocks and clocks[-1] is None:
+                    h, m, sec = match.groups()
+                    clocks[-1] = round((int(h) * 3600 + int(m) * 60 + float(sec)) * 10)
+            elif token == "(":
+                depth += 1
+            elif token == ")":
+                depth = max(0, depth - 1)
+            elif depth or token[0] == "$" or token in _RESULTS or token[0].isdigit() and token.endswith("."):
+                continue
+            else:
+                clocks.append(None)
+        clocks = clocks[:len(self.moves)]
+        return None if None in clocks else clocks
+
+    @property
+    def moves(self):
+        """Mainline as array('H') of 16-bit moves; stops at the first illegal or unreadable move"""
+        if self._moves is None:
+            board = Board(self.start_fen)
+            moves = array("H")
+            for san in self.san_moves():
+                try:
+                    move = board.parse_san(san)
+                except ValueError:
+                    break
+                moves.append(move)
+                board.push(move)
+            self._moves = moves
+        return self._moves
+
+    def board(self):
+        """Board at the end of the mainline (with the moves on its undo stack)"""
+        board = Board(self.start_fen)
+        for move in self.moves:
+            board.push(move)
+        return board
+
+
+class HeaderFilter:
+    """
+    Picklable header predicate, so it can travel to pool workers.
+
+        HeaderFilter(Event="Club Championship", min_elo=1800, result="1-0")
+
+    Keyword tags must match exactly; min_elo requires both players' Elo.
+    """
+
+    def __init__(self, min_elo=None, result=None, **tags):
+        self.min_elo = min_elo
+        self.result = result
+        self.tags = tags
+
+    def __call__(self, headers):
+        for tag, value in self.tags.items():
+            if headers.get(tag) != value:
+                return False
+        if self.result is not None and headers.get("Result") != self.result:
+            return False
+        if self.min_elo is not None:
+            try:
+                if min(int(headers["WhiteElo"]), int(headers["BlackElo"])) < self.min_elo:
+                    return False
+            except (KeyError, ValueError):
+                return False
+        return True
+
+
+_BOUNDARY = b"\n" + GAME_START
+
+
+def _game_starts(buf, start, end):
+    """Offsets of every game that starts in [start, end)"""
+    if start == 0 and buf[:len(GAME_START)] == GAME_START:
+        yield 0
+    pos = max(start - 1, 0)
+    while True:
+        nxt = buf.find(_BOUNDARY, pos)
+        if nxt < 0 or nxt + 1 >= end:
+            return
+        yield nxt + 1
+        pos = nxt + 1
+
+
+def _parse_game(buf, start, end, header_filter):
+    """PGNGame for buf[start:end], or None if the filter rejects it"""
+    split = buf.find(b"\n\n", start, end)
+    if split < 0:
+        split = buf.find(b"\n\r\n", start, end)     # CRLF files
+    if split < 0:
+        split = end
+    headers = {key.decode(): value.decode("utf-8", "replace").replace('\\"', '"')
+               for key, value in _TAG.findall(buf[start:split])}
+    if header_filter is not None and not header_filter(headers):
+        return None
+    return PGNGame(headers, buf[split:end].strip(), start)
+
+
+def _scan(buf, start, end, header_filter):
+    """Yield games beginning in [start, end) of an mmapped buffer"""
+    prev = None
+    for offset in _game_starts(buf, start, end):
+        if prev is not None:
+            game = _parse_game(buf, prev, offset, header_filter)
+            if game is not None:
+                yield game
+        prev = offset
+    if prev is not None:
+        # The last game may run past `end`, up to the next game start or EOF
+        stop = buf.find(_BOUNDARY, prev)
+        game = _parse_game(buf, prev, stop + 1 if stop >= 0 else len(buf), header_filter)
+        if game is not None:
+            yield game
+
+
+def read_games(path, header_filter=None):
+    """Lazily yield every game in `path` (optionally only those passing `header_filter`)"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            yield from _scan(buf, 0, len(buf), header_filter)
+
+
+def parse_games(data, header_filter=None):
+    """Games from PGN text already in memory (str or bytes), e.g. an upload"""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    games = list(_scan(data, 0, len(data), header_filter))
+    if not games and data.strip() and not data.lstrip().startswith(b"[") \
+            and (header_filter is None or header_filter({})):
+        # Bare movetext with no tag pairs, as pasted from most GUIs
+        games.append(PGNGame({}, data.strip(), 0))
+    return games
+
+
+def format_clock(tenths):
+    seconds, tenth = divmod(tenths, 10)
+    text = f"{seconds // 3600}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+    return f"{text}.{tenth}" if tenth else text
+
+
+def format_game(headers, moves, clocks=None, width=80):
+    """
+    PGN text for a game given its tag pairs and 16-bit moves (and optionally
+    [%clk] times in tenths of a second, one per move)
+    """
+    board = Board(headers.get("FEN", STARTING_FEN))
+    lines = []
+    for tag in ROSTER + tuple(t for t in headers if t not in ROSTER):
+        value = headers.get(tag, "*" if tag == "Result" else "?")
+        escaped = value.replace('"', '\\"')
+        lines.append(f'[{tag} "{escaped}"]')
+
+    words = []
+    for ply, move in enumerate(moves):
+        if board.turn == 0:
+            words.append(f"{board.fullmove}.")
+        elif ply == 0:
+            words.append(f"{board.fullmove}...")
+        words.append(board.san(move))
+        if clocks is not None:
+            words.append(f"{{ [%clk {format_clock(clocks[ply])}] }}")
+        board.push(move)
+    words.append(headers.get("Result", "*"))
+
+    movetext = []
+    line = ""
+    for word in words:
+        if line and len(line) + 1 + len(word) > width:
+            movetext.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    movetext.append(line)
+    return "\n".join(lines) + "\n\n" + "\n".join(movetext) + "\n"
+
+
+def read_range(path, start, end, header_filter=None):
+    """Lazily yield the games of `path` that start in the byte range [start, end)"""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            yield from _scan(buf, start, end, header_filter)
+
+
+def _map_chunk(args):
+    path, start, end, chunk_fn, header_filter = args
+    return chunk_fn(read_range(path, start, end, header_filter))
+
+
+def split_ranges(path, parts):
+    """Byte ranges covering `path`; each game belongs to the range its start falls in"""
+    size = os.path.getsize(path)
+    step = max(1, size // parts)
+    return [(i * step, size if i == parts - 1 else (i + 1) * step) for i in range(parts)]
+
+
+def map_chunks(path, chunk_fn, header_filter=None, workers=None, chunks_per_worker=4):
+    """
+    Split `path` into byte ranges and call `chunk_fn(games)` on each in a process
+    pool, where `games` iterates the games starting in that range. Yields one
+    result per chunk, in file order. This is the map step of a map-reduce;
+    `chunk_fn` and `header_filter` must be picklable.
+    """
+    workers = workers or os.cpu_count() or 1
+    ranges = split_ranges(path, workers * chunks_per_worker)
+    jobs = [(path, start, end, chunk_fn, header_filter) for start, end in ranges]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_map_chunk, jobs)
+
+
+class _EachGame:
+    """chunk_fn applying a per-game function and keeping the non-None results"""
+
+    def __init__(self, fn):
+        self.fn = fn
+
+    def __call__(self, games):
+        results = []
+        for game in games:
+            result = self.fn(game)
+            if result is not None:
+                results.append(result)
+        return results
+
+
+def map_games(path, fn, header_filter=None, workers=None, chunks_per_worker=4):
+    """
+    Apply `fn(game)` to every game using a process pool and yield the non-None
+    results, chunk by chunk in file order. `fn` and `header_filter` must be
+    picklable (module-level functions, HeaderFilter).
+    """
+    for results in map_chunks(path, _EachGame(fn), header_filter, workers, chunks_per_worker):
+        yield from results
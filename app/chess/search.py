@@ -0,0 +1,311 @@
+"""
+Alpha-Beta Search
+
+Iterative deepening negamax with a principal-variation window, quiescence
+search over captures, check extension and a Zobrist-keyed transposition
+table. Moves are ordered hash move first, then captures by MVV-LVA, then
+killer moves, then the history heuristic.
+
+Every search runs under a millisecond budget; when it runs out the best move
+of the deepest finished iteration is returned.
+
+    from app.chess import Board
+    from app.chess.search import Searcher
+
+    result = Searcher().search(Board(), max_depth=6, time_ms=500)
+    result["move"], result["score"], result["depth"]
+"""
+import time
+
+from app.chess.board import Board, CAPTURE, EP_CAPTURE, PROMOTION, move_to_uci
+from app.chess.evaluate import PIECE_VALUES, evaluate
+
+MATE = 100000
+MATE_BOUND = MATE - 1000      # scores beyond this are "mate in N"
+INFINITY = MATE + 1
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+MAX_PLY = 64
+TT_LIMIT = 1_000_000
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class Searcher:
+    """
+    Holds the transposition table and history between searches, so a process
+    that keeps one Searcher gets faster as a game goes on.
+    """
+
+    def __init__(self):
+        self.tt = {}
+        self.history = [0] * 4096
+        self.killers = [[0, 0] for _ in range(MAX_PLY)]
+        self.nodes = 0
+        self.root_best = None
+        self._deadline = None
+        self._path = []
+
+    # ---------------- ORDERING ----------------
+
+    def _order(self, board, moves, ply, hash_move):
+        squares = board.squares
+        killers = self.killers[ply]
+        history = self.history
+        scored = []
+        for move in moves:
+            if move == hash_move:
+                key = 10_000_000
+            else:
+                flag = move >> 12
+                if flag & CAPTURE:
+                    victim = 0 if flag == EP_CAPTURE else squares[(move >> 6) & 63] % 6
+                    attacker = squares[move & 63] % 6
+                    key = 1_000_000 + PIECE_VALUES[victim] * 10 - attacker
+                elif flag & PROMOTION:
+                    key = 900_000 + (flag & 3)
+                elif move == killers[0]:
+                    key = 800_000
+                elif move == killers[1]:
+                    key = 700_000
+                else:
+                    key = history[move & 4095]
+            scored.append((key, move))
+        scored.sort(reverse=True)
+        return [move for _, move in scored]
+
+    def _captures(self, board):
+        squares = board.squares
+        scored = []
+        for move in board.legal_moves():
+            flag = move >> 12
+            if flag & CAPTURE:
+                victim = 0 if flag == EP_CAPTURE else squares[(move >> 6) & 63] % 6
+                scored.append((PIECE_VALUES[victim] * 10 - squares[move & 63] % 6, move))
+            elif flag & PROMOTION and (flag & 3) == 3:
+                scored.append((8000, move))
+        scored.sort(reverse=True)
+        return [move for _, move in scored]
+
+    # ---------------- SEARCH ----------------
+
+    def _check_time(self):
+        if self._deadline is not None and time.perf_counter() > self._deadline:
+            raise SearchTimeout()
+
+    def quiesce(self, board, alpha, beta, ply):
+        self.nodes += 1
+        if not self.nodes & 1023:
+            self._check_time()
+
+        stand_pat = evaluate(board)
+        if stand_pat >= beta:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+        if ply >= MAX_PLY - 1:
+            return stand_pat
+
+        for move in self._captures(board):
+            board.push(move)
+            score = -self.quiesce(board, -beta, -alpha, ply + 1)
+            board.pop()
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+        return alpha
+
+    def negamax(self, board, depth, alpha, beta, ply):
+        self.nodes += 1
+        if not self.nodes & 1023:
+            self._check_time()
+
+        key = board.hash
+        if ply:
+            if board.halfmove >= 100 or key in self._path:
+                return 0
+            # Mate distance pruning
+            alpha = max(alpha, -MATE + ply)
+            beta = min(beta, MATE - ply - 1)
+            if alpha >= beta:
+                return alpha
+
+        in_check = board.is_check()
+        if in_check and ply < MAX_PLY - 1:
+            depth += 1
+        if depth <= 0 or ply >= MAX_PLY - 1:
+            return self.quiesce(board, alpha, beta, ply)
+
+        hash_move = 0
+        entry = self.tt.get(key)
+        if entry is not None:
+            e_depth, e_score, e_flag, hash_move = entry
+            if ply and e_depth >= depth:
+                if e_score > MATE_BOUND:
+                    e_score -= ply
+                elif e_score < -MATE_BOUND:
+                    e_score += ply
+                if e_flag == EXACT:
+                    return e_score
+                if e_flag == LOWER and e_score >= beta:
+                    return e_score
+                if e_flag == UPPER and e_score <= alpha:
+                    return e_score
+
+        moves = board.legal_moves()
+        if not moves:
+            return -MATE + ply if in_check else 0
+
+        original_alpha = alpha
+        best_score = -INFINITY
+        best_move = 0
+        self._path.append(key)
+        for i, move in enumerate(self._order(board, moves, ply, hash_move)):
+            board.push(move)
+            if i == 0:
+                score = -self.negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            else:
+                # Null window first; re-search only if the move might be better
+                score = -self.negamax(board, depth - 1, -alpha - 1, -alpha, ply + 1)
+                if alpha < score < beta:
+                    score = -self.negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            board.pop()
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if ply == 0:
+                    self.root_best = (move, score)
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                if not move >> 12 & CAPTURE:
+                    killers = self.killers[ply]
+                    if killers[0] != move:
+                        killers[1] = killers[0]
+                        killers[0] = move
+                    self.history[move & 4095] += depth * depth
+                break
+        self._path.pop()
+
+        if best_score >= beta:
+            flag = LOWER
+        elif best_score <= original_alpha:
+            flag = UPPER
+        else:
+            flag = EXACT
+        stored = best_score
+        if stored > MATE_BOUND:
+            stored += ply
+        elif stored < -MATE_BOUND:
+            stored -= ply
+        if len(self.tt) >= TT_LIMIT:
+            self.tt.clear()
+        self.tt[key] = (depth, stored, flag, best_move)
+        return best_score
+
+    def static_score(self, board):
+        """Quiescence score with no time limit: what captures alone win from `board`"""
+        self._deadline = None
+        return self.quiesce(board, -INFINITY, INFINITY, 0)
+
+    def principal_variation(self, board, limit=12):
+        """Follow hash moves from the root to rebuild the expected line"""
+        line = []
+        seen = set()
+        for _ in range(limit):
+            entry = self.tt.get(board.hash)
+            if entry is None or not entry[3] or board.hash in seen:
+                break
+            move = entry[3]
+            if move not in board.legal_moves():
+                break
+            seen.add(board.hash)
+            line.append(move)
+            board.push(move)
+        for _ in line:
+            board.pop()
+        return line
+
+    def search(self, board, max_depth=64, time_ms=None):
+        """
+        Best move for the side to move in `board`. Returns a dict with
+        move (int, 0 if there is none), uci, score (centipawns, side to move),
+        mate (moves to mate, negative if getting mated, or None), depth, nodes,
+        time_ms and pv (UCI strings).
+        """
+        started = time.perf_counter()
+        self._deadline = started + time_ms / 1000.0 if time_ms else None
+        self.nodes = 0
+        self.killers = [[0, 0] for _ in range(MAX_PLY)]
+        self.history = [h >> 2 for h in self.history]
+        self._path = [entry[-1] for entry in board._stack]
+        base = len(board._stack)
+
+        moves = board.legal_moves()
+        best_move, best_score, depth_done = (moves[0] if moves else 0), 0, 0
+        if len(moves) > 1:
+            for depth in range(1, max_depth + 1):
+                self.root_best = None
+                try:
+                    score = self.negamax(board, depth, -INFINITY, INFINITY, 0)
+                except SearchTimeout:
+                    # Unwind whatever the interrupted search left on the board
+                    while len(board._stack) > base:
+                        board.pop()
+                    self._path = self._path[:base]
+                    # The first root move searched is last iteration's best, so a
+                    # partial iteration's choice is at least as well founded
+                    if self.root_best is not None and self.root_best[1] > best_score:
+                        best_move, best_score = self.root_best
+                    break
+                best_move, best_score, depth_done = self.root_best[0], score, depth
+                if abs(score) > MATE_BOUND:
+                    break
+                elapsed = time.perf_counter() - started
+                if self._deadline is not None and elapsed * 2 > time_ms / 1000.0:
+                    # The next iteration would almost certainly not finish
+                    break
+
+        mate = None
+        if best_score > MATE_BOUND:
+            mate = (MATE - best_score + 1) // 2
+        elif best_score < -MATE_BOUND:
+            mate = -((MATE + best_score) // 2)
+        pv = self.principal_variation(board) if best_move else []
+        if not pv or pv[0] != best_move:
+            pv = [best_move] if best_move else []
+        return {
+            "move": best_move,
+            "uci": move_to_uci(best_move) if best_move else None,
+            "score": best_score,
+            "mate": mate,
+            "depth": depth_done,
+            "nodes": self.nodes,
+            "time_ms": round((time.perf_counter() - started) * 1000),
+            "pv": [move_to_uci(m) for m in pv],
+        }
+
+
+# One Searcher per process, so the table carries over between moves of a game
+_searcher = None
+
+
+def search_fen(fen, max_depth=64, time_ms=None, moves=()):
+    """
+    Process-pool entry point: search the position after the UCI `moves` from
+    `fen` (replayed, so repetitions count) and return the result dict (move as UCI only)
+    """
+    global _searcher
+    if _searcher is None:
+        _searcher = Searcher()
+    board = Board(fen)
+    for uci in moves:
+        board.push(board.parse_uci(uci))
+    result = _searcher.search(board, max_depth, time_ms)
+    result.pop("move")
+    return result
@@ -0,0 +1,227 @@
+"""
+Tactic Finder
+
+Finds short forced tactics in game positions and describes them as lesson
+records. A position qualifies when the side to move has
+
+- a forced mate within `max_mate` moves with a single winning first move, or
+- a fork, pin or skewer (recognised from the piece geometry after the move)
+  that the alpha-beta search confirms: it must be the search's best move and
+  win at least `min_gain` centipawns more than captures alone would.
+
+Mates are looked for first, so a tactic is never reported where a mate in
+`max_mate` exists (the lesson validator flags tactic lessons that overlook
+a mate in two).
+
+    from app.chess import Board
+    from app.chess.tactics import find_tactic
+
+    find_tactic(Board("2q1k3/pp3ppp/2n5/8/4N3/8/PP3PPP/3Q2K1 w - - 0 1"))
+    # {"task": "tactic", "motif": "fork", "correctMoves": [["e4", "d6"]], ...}
+"""
+from app.chess.board import (
+    Board, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, SQUARE_NAMES,
+    KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, bishop_attacks, rook_attacks, iter_bits,
+)
+from app.chess.mate import MateSearch, mating_moves
+from app.chess.search import Searcher, MATE_BOUND
+
+# Motif values: only the order matters, and the king outranks everything
+MOTIF_VALUES = [1, 3, 3, 5, 9, 100]
+PIECE_NAMES = ["pawn", "knight", "bishop", "rook", "queen", "king"]
+
+DIAGONALS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+STRAIGHTS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+TITLES = {
+    "fork": "⚔️ Find the Fork",
+    "pin": "📌 Find the Pin",
+    "skewer": "🗡️ Find the Skewer",
+    "mate": "♚ Find the Checkmate",
+}
+
+
+def piece_attacks(kind, color, sq, occ):
+    """Squares a piece of `kind`/`color` on `sq` attacks, given occupancy `occ`"""
+    if kind == PAWN:
+        return PAWN_ATTACKS[color][sq]
+    if kind == KNIGHT:
+        return KNIGHT_ATTACKS[sq]
+    if kind == BISHOP:
+        return bishop_attacks(sq, occ)
+    if kind == ROOK:
+        return rook_attacks(sq, occ)
+    if kind == QUEEN:
+        return bishop_attacks(sq, occ) | rook_attacks(sq, occ)
+    return KING_ATTACKS[sq]
+
+
+# ---------------- MOTIFS ----------------
+# Each classifier looks at the board *after* `to` has been moved to, with the
+# opponent of the mover to play.
+
+def is_fork(board, to):
+    """The moved piece attacks two or more targets worth attacking"""
+    squares = board.squares
+    piece = squares[to]
+    kind, color = piece % 6, piece // 6
+    enemy = color ^ 1
+    occ = board.occ[0] | board.occ[1]
+    targets = 0
+    for sq in iter_bits(piece_attacks(kind, color, to, occ) & board.occ[enemy]):
+        target = squares[sq] % 6
+        # Kings and bigger pieces are always targets; equal or smaller ones only if loose
+        if target == KING or MOTIF_VALUES[target] > MOTIF_VALUES[kind] or not board.is_attacked(sq, enemy):
+            targets += 1
+    return targets >= 2
+
+
+def _line_pairs(board, to):
+    """(front, back) enemy piece kinds lined up on each ray from the slider on `to`"""
+    squares = board.squares
+    piece = squares[to]
+    kind, color = piece % 6, piece // 6
+    if kind == BISHOP:
+        directions = DIAGONALS
+    elif kind == ROOK:
+        directions = STRAIGHTS
+    elif kind == QUEEN:
+        directions = DIAGONALS + STRAIGHTS
+    else:
+        return
+    file, rank = to & 7, to >> 3
+    for df, dr in directions:
+        found = []
+        f, r = file + df, rank + dr
+        while 0 <= f < 8 and 0 <= r < 8 and len(found) < 2:
+            occupant = squares[r * 8 + f]
+            if occupant >= 0:
+                if occupant // 6 == color:
+                    break
+                found.append(occupant % 6)
+            f += df
+            r += dr
+        if len(found) == 2:
+            yield found[0], found[1]
+
+
+def is_pin(board, to):
+    """The moved slider pins an enemy piece to a more valuable one behind it"""
+    mover = board.squares[to] % 6
+    for front, back in _line_pairs(board, to):
+        if MOTIF_VALUES[back] > MOTIF_VALUES[front] and MOTIF_VALUES[back] > MOTIF_VALUES[mover]:
+            return True
+    return False
+
+
+def is_skewer(board, to):
+    """The moved slider attacks the king or queen with a piece behind it on the line"""
+    for front, back in _line_pairs(board, to):
+        if front in (KING, QUEEN) and MOTIF_VALUES[front] > MOTIF_VALUES[back] and back != PAWN:
+            return True
+    return False
+
+
+def classify(board, move):
+    """Motif name for `move` (fork, pin or skewer) from the geometry it creates, or None"""
+    to = (move >> 6) & 63
+    board.push(move)
+    try:
+        if is_fork(board, to):
+            return "fork"
+        if is_skewer(board, to):
+            return "skewer"
+        if is_pin(board, to):
+            return "pin"
+        return None
+    finally:
+        board.pop()
+
+
+# ---------------- PUZZLES ----------------
+
+def _lesson(board, task, motif, moves, text, **extra):
+    record = {
+        "title": TITLES[motif],
+        "text": text,
+        "fen": board.fen(),
+        "pieces": board.piece_map(),
+        "task": task,
+        "targetSquare": SQUARE_NAMES[(moves[0] >> 6) & 63],
+        "correctMoves": [[SQUARE_NAMES[m & 63], SQUARE_NAMES[(m >> 6) & 63]] for m in moves],
+        "motif": motif,
+        "hash": f"{board.hash:016x}",
+    }
+    record.update(extra)
+    return record
+
+
+def find_tactic(board, max_mate=2, depth=4, time_ms=200, min_gain=250, max_advantage=300, searcher=None):
+    """
+    Lesson record for the tactic available to the side to move, or None.
+    Positions already more than `max_advantage` centipawns from level are not
+    searched for material tactics: they are slow to confirm and make poor puzzles.
+    `searcher` lets a caller reuse one Searcher (and its tables) across positions.
+    """
+    side = "White" if board.turn == 0 else "Black"
+
+    n, move = MateSearch(board).mate_in(max_mate)
+    if n is not None:
+        solutions = mating_moves(board, n)
+        if len(solutions) != 1:
+            return None
+        text = f"{side} to move and mate in {n}." if n > 1 else f"{side} to move: deliver checkmate in one move!"
+        return _lesson(board, "checkmate", "mate", [move], text, mateIn=n)
+
+    candidates = {}
+    for move in board.legal_moves():
+        motif = classify(board, move)
+        if motif:
+            candidates[move] = motif
+    if not candidates:
+        return None
+
+    searcher = searcher or Searcher()
+    baseline = searcher.static_score(board)
+    if abs(baseline) > max_advantage:
+        return None
+    deep = searcher.search(board, max_depth=depth, time_ms=time_ms)
+    move = deep["move"]
+    gain = deep["score"] - baseline
+    if move not in candidates or abs(deep["score"]) > MATE_BOUND:
+        return None
+    if gain < min_gain or deep["score"] < 100:
+        return None
+
+    motif = candidates[move]
+    piece = PIECE_NAMES[board.squares[move & 63] % 6]
+    text = f"{side} to move: win material with a {piece} {motif}!"
+    return _lesson(board, "tactic", motif, [move], text, gain=gain)
+
+
+def mine_game(game, min_ply=8, seen=None, searcher=None, **options):
+    """
+    Lesson records for the tactics found along a PGNGame's mainline. Positions
+    whose hash is in `seen` are skipped, and new ones added to it.
+    """
+    seen = set() if seen is None else seen
+    try:
+        board = Board(game.start_fen)
+    except ValueError:
+        return []
+    found = []
+    for ply, move in enumerate(game.moves):
+        if ply >= min_ply and board.hash not in seen:
+            seen.add(board.hash)
+            record = find_tactic(board, searcher=searcher, **options)
+            if record is not None:
+                record["source"] = {
+                    "white": game.headers.get("White"),
+                    "black": game.headers.get("Black"),
+                    "event": game.headers.get("Event"),
+                    "date": game.headers.get("Date"),
+                    "ply": ply,
+                }
+                found.append(record)
+        board.push(move)
+    return found
@@ -8,3 +8,101 @@ class Config:
     """Base configuration"""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-change-in-production'
     DEBUG = os.environ.get('FLASK_DEBUG', 'True').lower() == 'true'
+
+    # Chat session state (easter egg stage). 'memory' keeps it per worker,
+    # 'redis' shares it across gunicorn workers via REDIS_URL.
+    CHAT_SESSION_BACKEND = os.environ.get('CHAT_SESSION_BACKEND', 'memory')
+    CHAT_SESSION_TTL = 300  # seconds
+    CHAT_SESSION_CLEANUP_INTERVAL = 3600  # seconds between sweeps of legacy chat_sessions docs
+    CHAT_REPLY_DELAY = (0.3, 0.9)  # simulated "thinking" pause, seconds
+
+    # Chat intent analytics, aggregated per worker and flushed in batches.
+    # 'firestore' writes to chat_analytics/<date>, 'local' appends JSON lines.
+    CHAT_ANALYTICS_BACKEND = os.environ.get('CHAT_ANALYTICS_BACKEND', 'firestore')
+    CHAT_ANALYTICS_PATH = os.environ.get('CHAT_ANALYTICS_PATH', 'chat_analytics.jsonl')
+    CHAT_ANALYTICS_FLUSH_INTERVAL = 300  # seconds
+    REDIS_URL = os.environ.get('REDIS_URL')
+
+    # Per-client rate limits for public endpoints: (requests, period in seconds).
+    # 'memory' counts per worker, 'redis' shares counters across workers.
+    RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+    RATE_LIMITS = {
+        'chat': (30, 60),
+        'enquiry': (5, 3600),
+        'play': (60, 60),
+        'online': (120, 60),
+        'analysis': (5, 3600),
+    }
+    # Proxies in front of the app (Render's router is one). Each appends the
+    # address it saw to X-Forwarded-For, so only that many entries from the
+    # right are trusted as the client address; anything before them is
+    # client-supplied. Set 0 when serving directly.
+    PROXY_HOPS = int(os.environ.get('PROXY_HOPS', 1))
+
+    # /learn/lessons.json is served from memory; after this many seconds the
+    # meta/lessons manifest is checked and the collection reloaded if it changed.
+    LESSONS_CACHE_TTL = 300
+
+    # Play-vs-computer: engine searches run in this many worker processes, with
+    # at most ENGINE_QUEUE_PER_WORKER searches per process queued or running
+    # (more get 503). /play/move replays at most PLAY_MAX_MOVES moves of the
+    # game. Strength level -> (max search depth, time budget in ms).
+    ENGINE_WORKERS = int(os.environ.get('ENGINE_WORKERS', 2))
+    ENGINE_QUEUE_PER_WORKER = 4
+    PLAY_MAX_MOVES = 600
+    PLAY_LEVELS = {
+        1: (1, 100),
+        2: (2, 250),
+        3: (3, 500),
+        4: (5, 1000),
+        5: (64, 2500),
+    }
+
+    # Opening explorer index built by app/scripts/build_opening_index.py
+    OPENING_INDEX_DIR = os.environ.get('OPENING_INDEX_DIR', 'data/openings')
+
+    # Endgame distance-to-mate tables built by app/scripts/build_endgames.py
+    ENDGAME_TABLE_DIR = os.environ.get('ENDGAME_TABLE_DIR', 'data/endgames')
+
+    # Most positions /admin/evaluate scores in one request
+    EVAL_BATCH_LIMIT = 2000
+
+    # Uploaded-game analysis: engine processes, the fixed search depth per
+    # position (so marks don't depend on load) with a time limit per search
+    # as a backstop for slow tactical positions, and how finished games are
+    # batched into Firestore writes. Uploads are also rate limited
+    # (RATE_LIMITS['analysis']) and a student may have one unfinished job.
+    ANALYSIS_WORKERS = int(os.environ.get('ANALYSIS_WORKERS', 1))
+    ANALYSIS_DEPTH = 4
+    ANALYSIS_MOVE_MS = 500
+    ANALYSIS_MAX_GAMES = 20
+    ANALYSIS_MAX_UPLOAD_BYTES = 1024 * 1024
+    ANALYSIS_FLUSH_GAMES = 10
+    ANALYSIS_FLUSH_INTERVAL = 2.0  # seconds
+
+    # Glicko-2 ratings: results are rated in periods of this many days;
+    # tau limits how fast volatility can change
+    RATING_PERIOD_DAYS = 7
+    RATING_TAU = 0.5
+
+    # Live tournament streams (SSE): heartbeat interval, how long one stream
+    # stays open before the browser reconnects, events kept for reconnects,
+    # and how often a watched tournament is reloaded for other workers' changes
+    LIVE_HEARTBEAT_SECONDS = 15.0
+    LIVE_STREAM_SECONDS = 1800.0
+    LIVE_BACKLOG = 500
+    LIVE_REFRESH_SECONDS = 15.0
+
+    # Every SSE stream (tournament or online game) holds a request thread:
+    # at most this many per process, leaving the rest of gunicorn's threads
+    # for ordinary requests. Viewers beyond it get 503 + Retry-After.
+    SSE_MAX_STREAMS = int(os.environ.get('SSE_MAX_STREAMS', 20))
+    SSE_RETRY_AFTER_SECONDS = 30
+
+    # Online games: finished games are written in batches of up to this many,
+    # at least every ONLINE_FLUSH_INTERVAL seconds; unaccepted challenges
+    # expire; game streams heartbeat (and check the clocks) this often
+    ONLINE_FLUSH_GAMES = 20
+    ONLINE_FLUSH_INTERVAL = 5.0  # seconds
+    ONLINE_CHALLENGE_SECONDS = 600.0
+    ONLINE_HEARTBEAT_SECONDS = 5.0
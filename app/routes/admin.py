@@ -1,13 +1,16 @@
 """
 Admin Routes
 """
-from flask import Blueprint, render_template, request, jsonify, make_response
+from flask import Blueprint, render_template, request, jsonify, make_response, current_app
 from datetime import datetime, timedelta, timezone
 from collections import defaultdict
 from firebase_admin import auth, firestore
 from app.utils.firebase_init import db
-from app.utils.helpers import now_utc, coerce_dt, calculate_fee_status
+from app.utils.helpers import now_utc, coerce_dt, calculate_fee_status, cleanup_stale_chat_sessions
 from app.utils.auth_utils import admin_required
+from app.utils.chat_analytics import load_summary
+from app.utils.analysis_queue import upload_text, parse_upload, job_progress
+from app.utils.ratings import record_results, update_ratings
 from dateutil.relativedelta import relativedelta
 
 bp = Blueprint('admin', __name__, url_prefix='/admin')
@@ -15,6 +18,10 @@ bp = Blueprint('admin', __name__, url_prefix='/admin')
 @bp.route("/")
 @admin_required
 def admin_dashboard():
+    # Sweep stale chat_sessions docs; chat state lives in the session store now.
+    # Throttled, so most dashboard loads skip the Firestore query.
+    cleanup_stale_chat_sessions(min_interval=current_app.config.get("CHAT_SESSION_CLEANUP_INTERVAL", 3600))
+
     try:
         current_time = now_utc()
         
@@ -138,6 +145,35 @@ def admin_dashboard():
             'new_enquiry_count': 0, 'new_applicant_count': 0, 'new_payment_count': 0
         }, now_utc=now_utc)
         
+@bp.route("/chat-analytics")
+@admin_required
+def admin_chat_analytics():
+    """Which chat intents are asked, and what falls through to the fallback"""
+    analytics = current_app.extensions["chat_analytics"]
+    pending_counts, pending_unmatched = analytics.pending()
+
+    try:
+        totals, unmatched = load_summary(current_app.config, days=14)
+    except Exception as e:
+        print(f"Chat analytics load error: {e}")
+        totals, unmatched = {}, []
+
+    # Fold in this worker's not-yet-flushed numbers so the panel is current
+    for intent, n in pending_counts.items():
+        totals[intent] = totals.get(intent, 0) + n
+    unmatched = pending_unmatched[::-1] + unmatched
+
+    total_messages = sum(totals.values())
+    rows = sorted(totals.items(), key=lambda kv: kv[1], reverse=True)
+    return render_template(
+        "admin_chat_analytics.html",
+        rows=rows,
+        total_messages=total_messages,
+        fallback_count=totals.get("fallback", 0),
+        unmatched=unmatched[:50],
+    )
+
+
 @bp.route("/enquiries")
 @admin_required
 def admin_enquiries():
@@ -962,4 +998,134 @@ def update_student_rating():
 
     except Exception as e:
         print("UPDATE RATING ERROR:", e)
-        return jsonify({"success": False, "error": "Server error"}), 500
\ No newline at end of file
+        return jsonify({"success": False, "error": "Server error"}), 500
+
+
+@bp.route("/results", methods=["POST"])
+@admin_required
+def record_game_results():
+    """
+    Record rated game results.
+    Body: {"results": [{"white": uid, "black": uid, "result": "1-0" | "0-1" | "1/2-1/2",
+                        "played_at": optional ISO date}], "source": optional}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        results = data.get("results")
+        if not isinstance(results, list) or not results:
+            return jsonify({"success": False, "error": "results is required"}), 400
+
+        try:
+            count = record_results(results, current_app.config["RATING_PERIOD_DAYS"],
+                                   source=data.get("source", "game"))
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+        return jsonify({"success": True, "recorded": count})
+
+    except Exception as e:
+        print("RECORD RESULTS ERROR:", e)
+        return jsonify({"success": False, "error": "Server error"}), 500
+
+
+@bp.route("/ratings/update", methods=["POST"])
+@admin_required
+def run_rating_update():
+    """Rate all results from rating periods that have closed since the last update"""
+    try:
+        summary = update_ratings(current_app.config)
+        return jsonify({"success": True, **summary})
+
+    except Exception as e:
+        print("RATING UPDATE ERROR:", e)
+        return jsonify({"success": False, "error": "Server error"}), 500
+
+@bp.route("/evaluate", methods=["POST"])
+@admin_required
+def evaluate_positions():
+    """
+    Static evaluation of many positions at once, for annotating a game.
+
+    Body: {"fens": [...]}  or  {"moves": ["e2e4", ...], "fen": start (optional)}
+    With moves, the start position and the position after every move are scored.
+    """
+    from app.chess import Board
+    from app.chess.batch_eval import evaluate_fens
+
+    data = request.get_json() or {}
+    fens = data.get("fens")
+    if fens is None and data.get("moves") is not None:
+        try:
+            board = Board(data.get("fen") or Board().fen())
+            fens = [board.fen()]
+            for uci in data["moves"]:
+                board.push(board.parse_uci(str(uci).strip().lower()))
+                fens.append(board.fen())
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e), "ply": len(fens) if fens else 0}), 400
+    if not isinstance(fens, list) or not fens:
+        return jsonify({"success": False, "error": "fens or moves is required"}), 400
+    limit = current_app.config.get("EVAL_BATCH_LIMIT", 2000)
+    if len(fens) > limit:
+        return jsonify({"success": False, "error": f"At most {limit} positions per request"}), 400
+
+    try:
+        result = evaluate_fens([str(fen) for fen in fens])
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    evaluations = [
+        {"fen": fen, "score": int(score), "material": int(material),
+         "mobility": int(mobility), "king_safety": int(safety)}
+        for fen, score, material, mobility, safety in zip(
+            fens, result["score"], result["material"], result["mobility"], result["king_safety"])
+    ]
+    return jsonify({"success": True, "count": len(evaluations), "evaluations": evaluations})
+
+
+@bp.route("/analysis", methods=["POST"])
+@admin_required
+def upload_student_games():
+    """
+    Queue a PGN for engine analysis on a student's behalf.
+    Multipart `pgn` file plus `student_id` field, or JSON {"student_id": ..., "pgn": "..."}.
+    """
+    try:
+        decoded = auth.verify_session_cookie(request.cookies.get("session"))
+        student_id = request.form.get("student_id") or (request.get_json(silent=True) or {}).get("student_id")
+        if not student_id:
+            return jsonify({"success": False, "error": "student_id is required"}), 400
+
+        student_doc = db.collection("users").document(student_id).get()
+        if not student_doc.exists or student_doc.to_dict().get("role") != "student":
+            return jsonify({"success": False, "error": "Student not found"}), 404
+
+        try:
+            text = upload_text(request, current_app.config["ANALYSIS_MAX_UPLOAD_BYTES"])
+            games = parse_upload(text, current_app.config["ANALYSIS_MAX_GAMES"])
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+        job_id = current_app.extensions["analysis_queue"].submit(student_id, games, uploaded_by=decoded["uid"])
+        return jsonify({"success": True, "job_id": job_id, "games": len(games)}), 202
+
+    except Exception as e:
+        print("ANALYSIS UPLOAD ERROR:", e)
+        return jsonify({"success": False, "error": "Server error"}), 500
+
+
+@bp.route("/analysis/<job_id>")
+@admin_required
+def get_student_analysis(job_id):
+    """Progress and finished game annotations of any student's analysis job"""
+    try:
+        analysis_queue = current_app.extensions["analysis_queue"]
+        analysis_queue.recover()
+        job, games = analysis_queue.store.get_job(job_id)
+        if job is None:
+            return jsonify({"success": False, "error": "Analysis not found"}), 404
+        return jsonify({"success": True, "job": job_progress(job), "uid": job.get("uid"), "games": games})
+
+    except Exception as e:
+        print("GET ANALYSIS ERROR:", e)
+        return jsonify({"success": False, "error": "Server error"}), 500
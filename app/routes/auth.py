@@ -7,6 +7,7 @@ from firebase_admin import auth
 from app.utils.firebase_init import db
 from app.utils.helpers import now_utc
 from app.utils.auth_utils import get_current_user
+from app.utils.rate_limit import rate_limit
 # Note: auth routes don't use decorators, they handle their own authentication
 
 bp = Blueprint('auth', __name__)
@@ -16,6 +17,7 @@ bp = Blueprint('auth', __name__)
 
 
 @bp.route("/enquiry", methods=["GET", "POST"])
+@rate_limit("enquiry")
 def enquiry():
     if request.method == "POST":
         import re
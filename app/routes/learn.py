@@ -0,0 +1,137 @@
+"""
+Learn Routes - Lesson bundle and move data for the interactive lesson board
+"""
+from functools import lru_cache
+
+from flask import Blueprint, Response, current_app, request, jsonify
+
+from app.chess import Board
+from app.chess.endgame import EndgameTables
+from app.chess.explorer import OpeningIndex
+from app.utils.lesson_bundle import get_lesson_bundle
+
+bp = Blueprint('learn', __name__, url_prefix='/learn')
+
+
+@lru_cache(maxsize=4096)
+def moves_for_position(position):
+    """Legal move map for a FEN with its move counters stripped (they never change the moves)"""
+    board = Board(position)
+    return {
+        "fen": board.fen(),
+        "turn": "wb"[board.turn],
+        "check": board.is_check(),
+        "moves": board.legal_move_map(),
+    }
+
+
+def position_key(fen):
+    """Placement, side, castling and en passant - the part of a FEN that decides legal moves"""
+    return " ".join(fen.split()[:4])
+
+
+@bp.route("/moves")
+def moves():
+    fen = request.args.get("fen", "").strip()
+    if not fen:
+        return jsonify({"success": False, "error": "fen is required"}), 400
+    try:
+        data = moves_for_position(position_key(fen))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    response = jsonify({"success": True, **data})
+    # Same FEN, same answer - let browsers and proxies keep it
+    response.headers["Cache-Control"] = "public, max-age=86400"
+    return response
+
+
+def get_opening_index():
+    """
+    The memory-mapped explorer index (FileNotFoundError if not built). A
+    rebuild switches the index's CURRENT pointer; the new build is opened on
+    the next request and the cached answers from the old one are dropped.
+    """
+    index = current_app.extensions.get("opening_index")
+    if index is None or not index.is_current():
+        index = OpeningIndex(current_app.config["OPENING_INDEX_DIR"])
+        current_app.extensions["opening_index"] = index
+        explorer_for_position.cache_clear()
+    return index
+
+
+@lru_cache(maxsize=4096)
+def explorer_for_position(index, position):
+    return index.position(position)
+
+
+@bp.route("/explorer")
+def explorer():
+    """Moves played from a position in the indexed games, with white/draw/black counts"""
+    fen = request.args.get("fen", "").strip()
+    if not fen:
+        return jsonify({"success": False, "error": "fen is required"}), 400
+    try:
+        data = explorer_for_position(get_opening_index(), position_key(fen))
+    except FileNotFoundError:
+        return jsonify({"success": False, "error": "Opening explorer is not available"}), 503
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    response = jsonify({"success": True, **data})
+    response.headers["Cache-Control"] = "public, max-age=3600"
+    return response
+
+
+def get_endgame_tables():
+    tables = current_app.extensions.get("endgame_tables")
+    if tables is None:
+        tables = EndgameTables(current_app.config["ENDGAME_TABLE_DIR"])
+        current_app.extensions["endgame_tables"] = tables
+    return tables
+
+
+@bp.route("/endgame")
+def endgame():
+    """
+    Tablebase result for an endgame drill position and the table-perfect move
+    for the side to move: the fastest mate, or the longest defence.
+    """
+    fen = request.args.get("fen", "").strip()
+    if not fen:
+        return jsonify({"success": False, "error": "fen is required"}), 400
+    try:
+        board = Board(position_key(fen))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+
+    tables = get_endgame_tables()
+    probe = tables.probe(board)
+    if probe is None:
+        return jsonify({"success": False, "error": "No endgame table covers this position"}), 404
+
+    best = tables.best_move(board)
+    if best is not None:
+        best = {"uci": best["uci"], "san": board.san(best["move"]),
+                "result": best["result"], "plies": best["plies"]}
+    response = jsonify({"success": True, "fen": board.fen(), **probe, "best": best})
+    response.headers["Cache-Control"] = "public, max-age=86400"
+    return response
+
+
+@bp.route("/lessons.json")
+def lessons_bundle():
+    try:
+        bundle = get_lesson_bundle()
+    except Exception as e:
+        print(f"Lesson bundle error: {e}")
+        return jsonify({"success": False, "error": "Could not load lessons"}), 500
+
+    response = Response(bundle.body, mimetype="application/json")
+    response.set_etag(bundle.etag)
+    if request.args.get("v") == bundle.etag:
+        # learn.html links the bundle by its ETag, so that URL's content never changes
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    else:
+        response.headers["Cache-Control"] = "public, max-age=300, stale-while-revalidate=86400"
+    return response.make_conditional(request)
@@ -1,7 +1,7 @@
 """
 Main Routes - Basic Pages
 """
-from flask import Blueprint, render_template, send_from_directory
+from flask import Blueprint, render_template, send_from_directory, url_for
 import os
 
 bp = Blueprint('main', __name__)
@@ -14,7 +14,17 @@ def home():
 
 @bp.route("/learn")
 def learn():
-    return render_template("learn.html")
+    # Inline the first lesson so the board draws on first paint; the rest comes from the bundle
+    from app.utils.lesson_bundle import get_lesson_bundle
+    try:
+        bundle = get_lesson_bundle()
+        first_lesson = bundle.lessons[0] if bundle.lessons else None
+        lessons_url = url_for('learn.lessons_bundle', v=bundle.etag)
+    except Exception as e:
+        print(f"Lesson bundle error: {e}")
+        first_lesson = None
+        lessons_url = url_for('learn.lessons_bundle')
+    return render_template("learn.html", first_lesson=first_lesson, lessons_url=lessons_url)
 
 
 @bp.route("/assets/<path:filename>")
@@ -0,0 +1,249 @@
+"""
+Play Routes - Play against the computer or another student
+"""
+from flask import Blueprint, current_app, request, jsonify
+from firebase_admin import auth
+
+from app.chess import Board, move_to_uci
+from app.utils.auth_utils import student_required
+from app.utils.engine_pool import EngineBusy
+from app.utils.firebase_init import db
+from app.utils.rate_limit import rate_limit
+from app.utils.sse import stream_response
+
+bp = Blueprint('play', __name__, url_prefix='/play')
+
+
+def game_status(board):
+    if not board.legal_moves():
+        return "checkmate" if board.is_check() else "stalemate"
+    if board.halfmove >= 100:
+        return "draw"
+    return None
+
+
+@bp.route("/move", methods=["POST"])
+@rate_limit("play")
+def move():
+    """
+    Body: {"fen": "...", "moves": ["e2e4", ...] (optional), "move": "e2e4" (optional), "level": 1-5}
+
+    `moves` are the game's moves so far, played from `fen` (the starting
+    position); send them so the engine knows which positions have already
+    occurred and can see repetitions. If `move` is given it is checked and
+    played next (the player's move), then the engine replies. 503 with
+    Retry-After when the engine is busy.
+    """
+    data = request.get_json() or {}
+    levels = current_app.config["PLAY_LEVELS"]
+
+    try:
+        level = int(data.get("level", 3))
+    except (TypeError, ValueError):
+        level = 0
+    if level not in levels:
+        return jsonify({"success": False, "error": f"level must be one of {sorted(levels)}"}), 400
+
+    try:
+        board = Board(data.get("fen") or "")
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    start_fen = board.fen()
+
+    history = data.get("moves") or []
+    max_moves = current_app.config.get("PLAY_MAX_MOVES", 600)
+    if not isinstance(history, list) or len(history) > max_moves:
+        return jsonify({"success": False, "error": f"moves must be a list of at most {max_moves} moves"}), 400
+    played = []
+    for uci in history + ([data["move"]] if data.get("move") else []):
+        uci = str(uci).strip().lower()
+        try:
+            board.push(board.parse_uci(uci))
+        except ValueError:
+            return jsonify({"success": False, "error": f"Illegal move: {uci}"}), 400
+        played.append(uci)
+
+    status = game_status(board)
+    if status:
+        return jsonify({"success": True, "move": None, "fen": board.fen(), "status": status})
+
+    depth, time_ms = levels[level]
+    try:
+        result = current_app.extensions["engine_pool"].search(start_fen, depth, time_ms, played)
+    except EngineBusy:
+        response = jsonify({"success": False, "error": "The engine is busy, please try again"})
+        response.status_code = 503
+        response.headers["Retry-After"] = "2"
+        return response
+    except Exception as e:
+        print(f"Engine error: {e}")
+        return jsonify({"success": False, "error": "Engine unavailable, please try again"}), 503
+
+    reply = board.parse_uci(result["uci"])
+    board.push(reply)
+    return jsonify({
+        "success": True,
+        "move": move_to_uci(reply),
+        "fen": board.fen(),
+        "status": game_status(board),
+        "score": result["score"],
+        "mate": result["mate"],
+        "depth": result["depth"],
+        "nodes": result["nodes"],
+        "time_ms": result["time_ms"],
+        "pv": result["pv"],
+    })
+
+
+# ---------------- ONLINE GAMES ----------------
+
+def _session_uid():
+    """
+    uid from the session cookie, verified locally: no Firestore read and no
+    revocation check, so a move never waits on a network call
+    """
+    try:
+        return auth.verify_session_cookie(request.cookies.get("session") or "")["uid"]
+    except Exception:
+        return None
+
+
+def _player(uid):
+    user = db.collection("users").document(uid).get().to_dict() or {}
+    return {"uid": uid, "name": str(user.get("name") or "Student"), "rating": user.get("rating")}
+
+
+def _game_or_404(game_id):
+    game = current_app.extensions["online_games"].get(game_id)
+    if game is None:
+        return None, (jsonify({"success": False, "error": "Game not found"}), 404)
+    return game, None
+
+
+@bp.route("/online/challenge", methods=["POST"])
+@student_required
+@rate_limit("online")
+def create_challenge():
+    """
+    Body: {"opponent": uid (optional, open challenge without), "minutes": 10,
+           "increment": 5, "colour": "white" | "black" | "random"}
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        uid = _session_uid()
+        try:
+            minutes = int(data.get("minutes", 10))
+            increment = int(data.get("increment", 5))
+        except (TypeError, ValueError):
+            return jsonify({"success": False, "error": "minutes and increment must be numbers"}), 400
+        if not 1 <= minutes <= 180 or not 0 <= increment <= 60:
+            return jsonify({"success": False, "error": "minutes must be 1-180 and increment 0-60"}), 400
+        colour = {"white": 0, "black": 1, "random": None}.get(data.get("colour", "random"), "bad")
+        if colour == "bad":
+            return jsonify({"success": False, "error": "colour must be white, black or random"}), 400
+        opponent = data.get("opponent") or None
+        if opponent == uid:
+            return jsonify({"success": False, "error": "You cannot challenge yourself"}), 400
+
+        game = current_app.extensions["online_games"].create(_player(uid), opponent, colour, minutes, increment)
+        return jsonify({"success": True, "game_id": game.id})
+
+    except Exception as e:
+        print(f"Online challenge error: {e}")
+        return jsonify({"success": False, "error": "Server error"}), 500
+
+
+@bp.route("/online/challenges")
+@student_required
+def list_challenges():
+    """Open challenges, and those addressed to the student"""
+    return jsonify({"success": True, "challenges": current_app.extensions["online_games"].challenges_for(_session_uid())})
+
+
+@bp.route("/online/<game_id>/accept", methods=["POST"])
+@student_required
+@rate_limit("online")
+def accept_challenge(game_id):
+    game, error = _game_or_404(game_id)
+    if error:
+        return error
+    try:
+        game.accept(_player(_session_uid()))
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 409
+    return jsonify({"success": True, "game_id": game.id})
+
+
+@bp.route("/online/<game_id>/move", methods=["POST"])
+@rate_limit("online")
+def online_move(game_id):
+    """
+    Body: {"move": "e2e4", "ply": moves seen so far}
+    Checked and applied in memory; both players get it on their event stream.
+    """
+    uid = _session_uid()
+    if uid is None:
+        return jsonify({"success": False, "error": "Not logged in"}), 401
+    game, error = _game_or_404(game_id)
+    if error:
+        return error
+    data = request.get_json(silent=True) or {}
+    ply = data.get("ply")
+    try:
+        state = game.play(uid, data.get("move", ""), int(ply) if ply is not None else None)
+    except (TypeError, ValueError) as e:
+        return jsonify({"success": False, "error": str(e)}), 409
+    return jsonify({"success": True, "game": state})
+
+
+def _game_action(game_id, action):
+    """Run a player's action on a game, mapping failures to JSON errors"""
+    uid = _session_uid()
+    if uid is None:
+        return jsonify({"success": False, "error": "Not logged in"}), 401
+    game, error = _game_or_404(game_id)
+    if error:
+        return error
+    try:
+        action(game, uid)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 409
+    return jsonify({"success": True})
+
+
+@bp.route("/online/<game_id>/resign", methods=["POST"])
+@rate_limit("online")
+def online_resign(game_id):
+    return _game_action(game_id, lambda game, uid: game.resign(uid))
+
+
+@bp.route("/online/<game_id>/draw", methods=["POST"])
+@rate_limit("online")
+def online_draw(game_id):
+    """Offer a draw, or accept the opponent's offer"""
+    return _game_action(game_id, lambda game, uid: game.offer_draw(uid))
+
+
+@bp.route("/online/<game_id>")
+def online_game(game_id):
+    game, error = _game_or_404(game_id)
+    if error:
+        return error
+    with game.lock:
+        return jsonify({"success": True, "game": game.state()})
+
+
+@bp.route("/online/<game_id>/events")
+def online_game_events(game_id):
+    """Server-Sent Events for players and spectators (see app/utils/online_games.py)"""
+    game, error = _game_or_404(game_id)
+    if error:
+        return error
+    config = current_app.config
+    events = game.stream(
+        request.headers.get("Last-Event-ID"),
+        heartbeat=config.get("ONLINE_HEARTBEAT_SECONDS", 5.0),
+        lifetime=config.get("LIVE_STREAM_SECONDS", 1800.0),
+    )
+    return stream_response(current_app.extensions["sse_slots"], events,
+                           retry_after=config.get("SSE_RETRY_AFTER_SECONDS", 30))
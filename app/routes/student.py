@@ -1,12 +1,15 @@
 """
 Student Routes
 """
-from flask import Blueprint, render_template, request, jsonify, redirect
+from flask import Blueprint, render_template, request, jsonify, redirect, current_app
 from firebase_admin import auth, firestore
 from app.utils.firebase_init import db
 from app.utils.helpers import now_utc, coerce_dt, cleanup_old_payments
 from app.utils.auth_utils import student_required
 from app.utils.helpers import now_utc, coerce_dt, calculate_fee_status
+from app.utils.analysis_queue import upload_text, parse_upload, job_progress
+from app.utils.rate_limit import rate_limit
+from app.utils.rating_history import RANGES, load_history
 
 bp = Blueprint('student', __name__, url_prefix='/student')
 
@@ -531,15 +534,95 @@ def change_student_password():
 @bp.route("/profile/rating-history")
 @student_required
 def get_rating_history():
-    """Get student's rating history (if you implement rating tracking)"""
+    """
+    Rating history for the profile chart, served from the monthly rollups.
+    ?range=3m|6m|1y|3y|all (default 1y) and ?points=<chart resolution> (default 60).
+    """
     try:
         session_cookie = request.cookies.get("session")
         decoded = auth.verify_session_cookie(session_cookie)
         student_id = decoded["uid"]
-        
-        # For now, return empty array - you can implement rating history tracking
-        return jsonify({"success": True, "history": []})
-        
+
+        window = request.args.get("range", "1y")
+        if window not in RANGES:
+            return jsonify({"success": False, "error": f"range must be one of {', '.join(RANGES)}"}), 400
+        try:
+            resolution = min(max(int(request.args.get("points", 60)), 3), 500)
+        except ValueError:
+            return jsonify({"success": False, "error": "points must be a number"}), 400
+
+        history, source = load_history(student_id, RANGES[window], resolution)
+        return jsonify({"success": True, "history": history, "range": window, "source": source})
+
     except Exception as e:
         print(f"Get rating history error: {e}")
-        return jsonify({"success": False, "error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"success": False, "error": str(e)}), 500
+
+
+# ---------------- GAME ANALYSIS ----------------
+
+@bp.route("/analysis", methods=["POST"])
+@student_required
+@rate_limit("analysis")
+def upload_games_for_analysis():
+    """
+    Queue a PGN (multipart file `pgn` or JSON {"pgn": "..."}) for engine analysis.
+    Returns the job id at once; poll GET /student/analysis/<job_id> for progress.
+    409 while the student's previous upload is still being analysed.
+    """
+    try:
+        decoded = auth.verify_session_cookie(request.cookies.get("session"))
+        uid = decoded["uid"]
+        analysis_queue = current_app.extensions["analysis_queue"]
+
+        active = analysis_queue.active_job(uid)
+        if active is not None:
+            return jsonify({"success": False, "job_id": active["id"],
+                            "error": "Your previous upload is still being analysed"}), 409
+
+        try:
+            text = upload_text(request, current_app.config["ANALYSIS_MAX_UPLOAD_BYTES"])
+            games = parse_upload(text, current_app.config["ANALYSIS_MAX_GAMES"])
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+
+        job_id = analysis_queue.submit(uid, games, uploaded_by=uid)
+        return jsonify({"success": True, "job_id": job_id, "games": len(games)}), 202
+
+    except Exception as e:
+        print(f"Analysis upload error: {e}")
+        return jsonify({"success": False, "error": "Server error"}), 500
+
+
+@bp.route("/analysis")
+@student_required
+def list_analysis_jobs():
+    """The student's recent analysis jobs with their progress"""
+    try:
+        decoded = auth.verify_session_cookie(request.cookies.get("session"))
+        analysis_queue = current_app.extensions["analysis_queue"]
+        analysis_queue.recover()
+        jobs = [job_progress(job) for job in analysis_queue.store.list_jobs(decoded["uid"])]
+        return jsonify({"success": True, "jobs": jobs})
+
+    except Exception as e:
+        print(f"List analysis jobs error: {e}")
+        return jsonify({"success": False, "error": "Server error"}), 500
+
+
+@bp.route("/analysis/<job_id>")
+@student_required
+def get_analysis_job(job_id):
+    """Progress of one job, with the annotations of every game finished so far"""
+    try:
+        decoded = auth.verify_session_cookie(request.cookies.get("session"))
+        analysis_queue = current_app.extensions["analysis_queue"]
+        analysis_queue.recover()
+        job, games = analysis_queue.store.get_job(job_id)
+        if job is None or job.get("uid") != decoded["uid"]:
+            return jsonify({"success": False, "error": "Analysis not found"}), 404
+        return jsonify({"success": True, "job": job_progress(job), "games": games})
+
+    except Exception as e:
+        print(f"Get analysis job error: {e}")
+        return jsonify({"success": False, "error": "Server error"}), 500
@@ -0,0 +1,212 @@
+"""
+Tournament Routes - Swiss events run by the academy
+"""
+from flask import Blueprint, current_app, request, jsonify
+
+from app.tournaments.store import (
+    create_tournament, load_tournament, update_tournament, list_tournaments, rate_completed_rounds,
+)
+from app.utils.auth_utils import admin_required
+from app.utils.firebase_init import db
+from app.utils.sse import stream_response
+
+bp = Blueprint('tournaments', __name__, url_prefix='/tournaments')
+
+
+def _not_found(tid):
+    return jsonify({"success": False, "error": f"Tournament {tid} not found"}), 404
+
+
+@bp.route("/")
+def tournament_list():
+    try:
+        return jsonify({"success": True, "tournaments": list_tournaments()})
+    except Exception as e:
+        print("TOURNAMENT LIST ERROR:", e)
+        return jsonify({"success": False, "error": "Server error"}), 500
+
+
+@bp.route("/<tid>")
+def tournament_detail(tid):
+    """Tournament info, every round's boards and the current standings"""
+    try:
+        tournament = load_tournament(tid)
+        if tournament is None:
+            return _not_found(tid)
+        return jsonify({
+            "success": True,
+            "tournament": tournament.summary(),
+            "rounds": [tournament.round_view(i) for i in range(len(tournament.rounds))],
+            "standings": tournament.standings_table(),
+        })
+    except Exception as e:
+        print("TOURNAMENT DETAIL ERROR:", e)
+        return jsonify({"success": False, "error": "Server error"}), 500
+
+
+@bp.route("/<tid>/live")
+def tournament_live(tid):
+    """
+    Server-Sent Events stream of pairings, results and standings changes
+    (see app/tournaments/live.py). Starts with a snapshot unless the browser
+    reconnects with a Last-Event-ID it can resume from. 503 with Retry-After
+    when this process already has SSE_MAX_STREAMS streams open.
+    """
+    try:
+        broadcaster = current_app.extensions["live_tournaments"].get(tid)
+    except Exception as e:
+        print("TOURNAMENT LIVE ERROR:", e)
+        return jsonify({"success": False, "error": "Server error"}), 500
+    if broadcaster is None:
+        return _not_found(tid)
+
+    config = current_app.config
+    events = broadcaster.stream(
+        request.headers.get("Last-Event-ID"),
+        heartbeat=config.get("LIVE_HEARTBEAT_SECONDS", 15.0),
+        lifetime=config.get("LIVE_STREAM_SECONDS", 1800.0),
+    )
+    return stream_response(current_app.extensions["sse_slots"], events,
+                           retry_after=config.get("SSE_RETRY_AFTER_SECONDS", 30))
+
+
+@bp.route("/create", methods=["POST"])
+@admin_required
+def new_tournament():
+    """Body: {"name": "...", "rounds": 5, "date": optional, "bye_points": 1 | 0.5 (optional)}"""
+    try:
+        data = request.get_json(silent=True) or {}
+        name = (data.get("name") or "").strip()
+        if not name:
+            return jsonify({"success": False, "error": "name is required"}), 400
+        try:
+            rounds = int(data.get("rounds", 5))
+            bye_points = float(data.get("bye_points", 1.0))
+        except (TypeError, ValueError):
+            return jsonify({"success": False, "error": "rounds and bye_points must be numbers"}), 400
+        if not 1 <= rounds <= 20:
+            return jsonify({"success": False, "error": "rounds must be between 1 and 20"}), 400
+        if bye_points not in (0.0, 0.5, 1.0):
+            return jsonify({"success": False, "error": "bye_points must be 0, 0.5 or 1"}), 400
+
+        tournament = create_tournament(name, rounds, date=data.get("date"), bye_points=bye_points)
+        return jsonify({"success": True, "tournament": tournament.summary()})
+
+    except Exception as e:
+        print("CREATE TOURNAMENT ERROR:", e)
+        return jsonify({"success": False, "error": "Server error"}), 500
+
+
+@bp.route("/<tid>/players", methods=["POST"])
+@admin_required
+def register_players(tid):
+    """
+    Body: {"student_ids": [uid, ...]} and/or
+          {"players": [{"name": "...", "rating": 1500}, ...]} for guests, whose games are not rated
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        students = []
+        for uid in data.get("student_ids") or []:
+            doc = db.collection("users").document(uid).get()
+            if not doc.exists:
+                return jsonify({"success": False, "error": f"Student {uid} not found"}), 400
+            user = doc.to_dict()
+            students.append((uid, user.get("name", uid), int(user.get("rating") or 0)))
+        guests = []
+        for i, guest in enumerate(data.get("players") or []):
+            name = (guest.get("name") or "").strip()
+            if not name:
+                return jsonify({"success": False, "error": f"Player {i}: name is required"}), 400
+            guests.append((name, int(guest.get("rating") or 0)))
+
+        def register(tournament, transaction):
+            for uid, name, rating in students:
+                tournament.add_player(uid, name, rating)
+            for name, rating in guests:
+                tournament.add_player(f"guest-{len(tournament.players) + 1}", name, rating, guest=True)
+
+        try:
+            tournament, _ = update_tournament(tid, register)
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        if tournament is None:
+            return _not_found(tid)
+
+        current_app.extensions["live_tournaments"].publish(tournament)
+        return jsonify({"success": True, "players": tournament.players})
+
+    except Exception as e:
+        print("TOURNAMENT PLAYERS ERROR:", e)
+        return jsonify({"success": False, "error": "Server error"}), 500
+
+
+@bp.route("/<tid>/pair", methods=["POST"])
+@admin_required
+def pair_next_round(tid):
+    """Pair the next round; the previous one must have all its results in"""
+    try:
+        try:
+            tournament, _ = update_tournament(tid, lambda tournament, transaction: tournament.pair_next_round())
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        if tournament is None:
+            return _not_found(tid)
+
+        current_app.extensions["live_tournaments"].publish(tournament)
+        return jsonify({"success": True, "round": tournament.round_view(len(tournament.rounds) - 1)})
+
+    except Exception as e:
+        print("TOURNAMENT PAIRING ERROR:", e)
+        return jsonify({"success": False, "error": "Server error"}), 500
+
+
+@bp.route("/<tid>/result", methods=["POST"])
+@admin_required
+def enter_result(tid):
+    """
+    Body: {"round": 1, "board": 1, "result": "1-0" | "0-1" | "1/2-1/2"}
+    Results can be corrected until the round is sent for rating (POST /<tid>/rate).
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        try:
+            round_number, board_number = int(data.get("round", 0)), int(data.get("board", 0))
+            tournament, board = update_tournament(
+                tid, lambda tournament, transaction: tournament.set_result(round_number, board_number,
+                                                                           data.get("result")))
+        except (TypeError, ValueError) as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        if tournament is None:
+            return _not_found(tid)
+
+        current_app.extensions["live_tournaments"].publish(tournament)
+        return jsonify({
+            "success": True,
+            "board": board,
+            "status": tournament.status,
+            "standings": tournament.standings_table(),
+        })
+
+    except Exception as e:
+        print("TOURNAMENT RESULT ERROR:", e)
+        return jsonify({"success": False, "error": "Server error"}), 500
+
+
+@bp.route("/<tid>/rate", methods=["POST"])
+@admin_required
+def rate_tournament(tid):
+    """
+    Send every completed round not yet rated to the rating system, once the
+    organiser has checked the results; those results can no longer be corrected
+    """
+    try:
+        tournament, rated = rate_completed_rounds(tid, current_app.config["RATING_PERIOD_DAYS"])
+        if tournament is None:
+            return _not_found(tid)
+        return jsonify({"success": True, "rated": rated,
+                        "rounds_rated": sum(1 for rnd in tournament.rounds if rnd["rated"])})
+
+    except Exception as e:
+        print("TOURNAMENT RATING ERROR:", e)
+        return jsonify({"success": False, "error": "Server error"}), 500
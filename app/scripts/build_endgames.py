@@ -0,0 +1,45 @@
+"""
+Build Endgame Tables
+
+Generates distance-to-mate tables for lone-king endings (see
+app/chess/endgame.py) into the directory /learn/endgame reads.
+
+    python -m app.scripts.build_endgames                      # KQK KRK KBNK
+    python -m app.scripts.build_endgames KQK --out data/endgames
+"""
+import argparse
+import sys
+import time
+
+from app.chess.endgame import canonical_signature, generate, save_table
+from app.config import Config
+
+DEFAULT_SIGNATURES = ["KQK", "KRK", "KBNK"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate endgame distance-to-mate tables")
+    parser.add_argument("signatures", nargs="*", default=DEFAULT_SIGNATURES, help="material, e.g. KQK KBNK")
+    parser.add_argument("--out", default=Config.ENDGAME_TABLE_DIR, help="table directory")
+    parser.add_argument("--verbose", action="store_true", help="print every retrograde step")
+    args = parser.parse_args(argv)
+
+    try:
+        signatures = [canonical_signature(s) for s in args.signatures]
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    for signature in signatures:
+        started = time.perf_counter()
+        table = generate(signature, log=print if args.verbose else None)
+        path = save_table(signature, table, args.out)
+        decided = table[(table != 0) & (table != 255)]
+        longest = int(decided.max()) // 2 if len(decided) else 0  # stored plies + 1
+        print(f"✅ {signature}: {table.nbytes / 1e6:.1f} MB, longest mate {longest} moves, "
+              f"{time.perf_counter() - started:.1f}s -> {path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
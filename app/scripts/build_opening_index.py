@@ -0,0 +1,41 @@
+"""
+Build the Opening Explorer Index
+
+Reads one or more PGN files and writes the memory-mapped index that
+/learn/explorer serves (see app/chess/explorer.py).
+
+    python -m app.scripts.build_opening_index games.pgn more.pgn --out data/openings
+    python -m app.scripts.build_opening_index big.pgn --min-games 2 --min-elo 1800 --workers 0
+"""
+import argparse
+import os
+import sys
+import time
+
+from app.chess.explorer import build_index
+from app.chess.pgn import HeaderFilter
+from app.config import Config
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the opening explorer index from PGN files")
+    parser.add_argument("pgn", nargs="+", help="PGN files to index")
+    parser.add_argument("--out", default=Config.OPENING_INDEX_DIR, help="index directory")
+    parser.add_argument("--max-ply", type=int, default=30, help="plies indexed per game")
+    parser.add_argument("--min-games", type=int, default=1, help="drop moves seen in fewer games")
+    parser.add_argument("--min-elo", type=int, default=None, help="only games where both players are rated this high")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes (0 = all cores)")
+    args = parser.parse_args(argv)
+
+    header_filter = HeaderFilter(min_elo=args.min_elo) if args.min_elo else None
+    started = time.perf_counter()
+    meta = build_index(args.pgn, args.out, max_ply=args.max_ply, min_games=args.min_games,
+                       header_filter=header_filter, workers=args.workers or None)
+    elapsed = time.perf_counter() - started
+    print(f"✅ Indexed {meta['games']} games: {meta['positions']} positions, {meta['rows']} moves "
+          f"in {elapsed:.1f}s -> {os.path.join(args.out, meta['version'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
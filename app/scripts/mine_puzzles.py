@@ -0,0 +1,182 @@
+"""
+Tactics Puzzle Miner
+
+Scans PGN collections for positions with a short forced tactic (fork, pin,
+skewer or mate in N, see app/chess/tactics.py) and writes them as lesson
+records, one JSON object per line, in the same shape as the `lessons` in
+populate_lessons.py (fen, pieces, task, targetSquare, correctMoves) plus
+motif, hash and source fields.
+
+Each file is cut into byte ranges that worker processes mine independently:
+a few per worker so small files still use every core, and at most
+CHUNK_MAX_KB each (roughly 150 games, a few minutes of mining) so progress
+is checkpointed often on large ones. Candidates are deduplicated by Zobrist hash, and after every
+finished range its puzzles are appended to the output and the range is
+recorded in a checkpoint file. Running the same command again after an
+interruption resumes with the ranges not yet done.
+
+    python -m app.scripts.mine_puzzles games.pgn --out puzzles.jsonl
+    python -m app.scripts.mine_puzzles big.pgn --out puzzles.jsonl --min-elo 1800 --workers 0
+    python -m app.scripts.mine_puzzles big.pgn --out puzzles.jsonl --restart
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from app.chess.pgn import HeaderFilter, read_range
+from app.chess.search import Searcher
+from app.chess.tactics import mine_game
+
+# Work unit size: CHUNKS_PER_WORKER ranges per worker, clamped to these bounds
+CHUNKS_PER_WORKER = 4
+CHUNK_MIN_KB = 4
+CHUNK_MAX_KB = 256
+
+# One Searcher per worker process, reused across games
+_searcher = None
+
+
+def mine_range(path, start, end, header_filter, options):
+    """Worker: (start, games read, puzzle records) for the games starting in [start, end)"""
+    global _searcher
+    if _searcher is None:
+        _searcher = Searcher()
+    seen = set()
+    games = 0
+    records = []
+    for game in read_range(path, start, end, header_filter):
+        games += 1
+        records.extend(mine_game(game, seen=seen, searcher=_searcher, **options))
+    return start, games, records
+
+
+def chunk_size(size, workers):
+    """Bytes per work unit for a file of `size` bytes mined by `workers` processes"""
+    chunk = -(-size // (workers * CHUNKS_PER_WORKER))
+    return max(CHUNK_MIN_KB * 1024, min(chunk, CHUNK_MAX_KB * 1024))
+
+
+def byte_ranges(size, chunk_bytes):
+    return [(start, min(start + chunk_bytes, size)) for start in range(0, size, chunk_bytes)]
+
+
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return {"sources": {}, "games": 0, "puzzles": 0}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, checkpoint):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def load_seen(path):
+    """Hashes of the puzzles already written, so a resumed run never repeats one"""
+    seen = set()
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    seen.add(json.loads(line)["hash"])
+    return seen
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mine tactics puzzles from PGN files")
+    parser.add_argument("pgn", nargs="+", help="PGN files to scan")
+    parser.add_argument("--out", default="puzzles.jsonl", help="output JSONL of lesson records")
+    parser.add_argument("--checkpoint", default=None, help="progress file (default: <out>.checkpoint.json)")
+    parser.add_argument("--restart", action="store_true", help="ignore any previous progress and output")
+    parser.add_argument("--workers", type=int, default=0, help="worker processes (0 = all cores)")
+    parser.add_argument("--chunk-kb", type=int, default=0,
+                        help="PGN kilobytes per work unit (0 = from the file size and worker count)")
+    parser.add_argument("--min-elo", type=int, default=None, help="only games where both players are rated this high")
+    parser.add_argument("--min-ply", type=int, default=8, help="skip the opening plies of each game")
+    parser.add_argument("--max-mate", type=int, default=2, help="longest mate searched for, in moves")
+    parser.add_argument("--depth", type=int, default=4, help="search depth used to confirm material tactics")
+    parser.add_argument("--time-ms", type=int, default=200, help="search time per candidate position")
+    parser.add_argument("--min-gain", type=int, default=250, help="centipawns a tactic must win")
+    args = parser.parse_args(argv)
+
+    checkpoint_path = args.checkpoint or args.out + ".checkpoint.json"
+    if args.restart:
+        for path in (args.out, checkpoint_path):
+            if os.path.exists(path):
+                os.remove(path)
+    checkpoint = load_checkpoint(checkpoint_path)
+    seen = load_seen(args.out)
+
+    workers = args.workers or os.cpu_count() or 1
+    jobs = []
+    for path in args.pgn:
+        key = os.path.abspath(path)
+        size = os.path.getsize(path)
+        source = checkpoint["sources"].get(key)
+        # A resumed file keeps the ranges it was started with, whatever --workers is now
+        chunk_bytes = args.chunk_kb * 1024 or (source["chunk_bytes"] if source else chunk_size(size, workers))
+        source = checkpoint["sources"].setdefault(key, {"size": size, "chunk_bytes": chunk_bytes, "done": []})
+        if source["size"] != size or source["chunk_bytes"] != chunk_bytes:
+            print(f"❌ {path} or --chunk-kb changed since the checkpoint was written; rerun with --restart")
+            return 1
+        done = set(source["done"])
+        jobs.extend((key, start, end) for start, end in byte_ranges(size, chunk_bytes) if start not in done)
+
+    if not jobs:
+        print(f"✅ Nothing left to do: {checkpoint['games']} games, {checkpoint['puzzles']} puzzles in {args.out}")
+        return 0
+
+    header_filter = HeaderFilter(min_elo=args.min_elo) if args.min_elo else None
+    options = {
+        "min_ply": args.min_ply,
+        "max_mate": args.max_mate,
+        "depth": args.depth,
+        "time_ms": args.time_ms,
+        "min_gain": args.min_gain,
+    }
+    print(f"Mining {len(jobs)} chunk(s); {checkpoint['games']} games and {len(seen)} puzzles already done")
+
+    started = time.perf_counter()
+    games_this_run = 0
+    with open(args.out, "a", encoding="utf-8") as out, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(mine_range, path, start, end, header_filter, options): path
+                   for path, start, end in jobs}
+        for i, future in enumerate(as_completed(futures), 1):
+            path = futures[future]
+            start, games, records = future.result()
+            new = 0
+            for record in records:
+                if record["hash"] in seen:
+                    continue
+                seen.add(record["hash"])
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                new += 1
+            # Puzzles reach the disk before the chunk is marked done; a crash in
+            # between only means the chunk is mined again and its repeats skipped
+            out.flush()
+            os.fsync(out.fileno())
+            checkpoint["sources"][path]["done"].append(start)
+            checkpoint["games"] += games
+            checkpoint["puzzles"] += new
+            save_checkpoint(checkpoint_path, checkpoint)
+
+            games_this_run += games
+            rate = games_this_run / (time.perf_counter() - started)
+            print(f"  [{i}/{len(jobs)}] +{new} puzzles, {checkpoint['puzzles']} total "
+                  f"({checkpoint['games']} games, {rate:.1f} games/s)")
+
+    print(f"✅ {checkpoint['puzzles']} puzzles from {checkpoint['games']} games in {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
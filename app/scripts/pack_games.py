@@ -0,0 +1,113 @@
+"""
+Pack PGN Files into Compact Game Archives
+
+Converts PGN to the binary archive format of app/chess/gamecodec.py and back.
+`pack --verify` reads the archive again and checks every game against the
+PGN it came from: tags, moves and [%clk] times must all survive the round
+trip, and the regenerated PGN must parse back to the same game.
+
+    python -m app.scripts.pack_games pack games.pgn --out games.cga --verify
+    python -m app.scripts.pack_games unpack games.cga --out games.pgn
+"""
+import argparse
+import os
+import sys
+import time
+
+from app.chess.gamecodec import ArchiveWriter, read_archive
+from app.chess.pgn import parse_games, read_games
+
+
+def _same_tags(source, regenerated):
+    """format_game fills in missing roster tags (Date "?", ...), so only the source's own tags must match"""
+    return all(regenerated.get(tag) == value for tag, value in source.items())
+
+
+def verify(pgn_path, archive_path):
+    """Number of games that do not round-trip (and prints the first few)"""
+    failures = 0
+    games = 0
+    decoded_games = read_archive(archive_path)
+    for game in read_games(pgn_path):
+        games += 1
+        decoded = next(decoded_games, None)
+        problem = None
+        if decoded is None:
+            problem = "missing from the archive"
+        elif decoded.headers != game.headers:
+            problem = "tags differ"
+        elif list(decoded.moves) != list(game.moves):
+            problem = "moves differ"
+        elif decoded.clocks != game.clocks():
+            problem = "clocks differ"
+        else:
+            reparsed = parse_games(decoded.pgn())
+            if len(reparsed) != 1 or list(reparsed[0].moves) != list(game.moves) \
+                    or not _same_tags(game.headers, reparsed[0].headers) or reparsed[0].clocks() != game.clocks():
+                problem = "regenerated PGN does not parse back to the same game"
+        if problem:
+            failures += 1
+            if failures <= 5:
+                print(f"❌ Game {games} ({game.headers.get('White', '?')} vs {game.headers.get('Black', '?')}): {problem}")
+    if next(decoded_games, None) is not None:
+        print("❌ The archive holds more games than the PGN")
+        failures += 1
+    return failures
+
+
+def pack(args):
+    started = time.perf_counter()
+    with ArchiveWriter(args.out) as archive:
+        for path in args.pgn:
+            for game in read_games(path):
+                # Like PGNGame.moves, a game with an unreadable move keeps the moves before it
+                archive.write(game.headers, game.moves, game.clocks())
+    elapsed = time.perf_counter() - started
+
+    pgn_size = sum(os.path.getsize(path) for path in args.pgn)
+    out_size = os.path.getsize(args.out)
+    print(f"✅ Packed {archive.games} games in {elapsed:.1f}s: {pgn_size:,} -> {out_size:,} bytes "
+          f"({pgn_size / max(out_size, 1):.1f}x smaller)")
+
+    if args.verify:
+        if len(args.pgn) != 1:
+            print("❌ --verify needs a single PGN file")
+            return 1
+        failures = verify(args.pgn[0], args.out)
+        if failures:
+            print(f"❌ {failures} game(s) did not round-trip")
+            return 1
+        print("✅ Every game round-trips")
+    return 0
+
+
+def unpack(args):
+    games = 0
+    with open(args.out, "w", encoding="utf-8") as out:
+        for game in read_archive(args.archive):
+            out.write(game.pgn())
+            out.write("\n")
+            games += 1
+    print(f"✅ Wrote {games} games to {args.out}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert between PGN and compact game archives")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    pack_parser = commands.add_parser("pack", help="PGN files -> archive")
+    pack_parser.add_argument("pgn", nargs="+", help="PGN files to pack")
+    pack_parser.add_argument("--out", required=True, help="archive to write")
+    pack_parser.add_argument("--verify", action="store_true", help="check every game round-trips")
+
+    unpack_parser = commands.add_parser("unpack", help="archive -> PGN")
+    unpack_parser.add_argument("archive", help="archive to read")
+    unpack_parser.add_argument("--out", required=True, help="PGN file to write")
+
+    args = parser.parse_args(argv)
+    return pack(args) if args.command == "pack" else unpack(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
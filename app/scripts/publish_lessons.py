@@ -0,0 +1,152 @@
+"""
+Incremental Lesson Publisher
+
+Publishes the lessons in populate_lessons.py to Firestore through the Admin
+SDK. Each lesson doc carries a content hash, and the meta/lessons manifest
+keeps every published hash, so a run reads one doc to work out what changed
+and then writes only new or changed lessons (and deletes removed ones) in
+batched commits. The manifest `version` is bumped whenever anything is
+written; the /learn/lessons.json cache watches it.
+
+    python -m app.scripts.publish_lessons            # validate, diff, publish
+    python -m app.scripts.publish_lessons --dry-run  # show the plan only
+"""
+import argparse
+import hashlib
+import json
+import sys
+
+from app.chess import Board
+from app.chess.mate import solve_mate
+
+# Firestore allows at most 500 writes per batch; one slot is kept for the manifest
+BATCH_LIMIT = 499
+
+
+def lesson_document(lesson):
+    """The Firestore doc for one lesson, in the shape the Learn page reads"""
+    doc = {
+        "id": lesson["id"],
+        "title": lesson["title"],
+        "text": lesson["text"],
+        "fen": lesson["fen"],
+        "task": lesson["task"],
+        "pieces": dict(lesson["pieces"]),
+        "correctMoves": [{"from": frm, "to": to} for frm, to in lesson["correctMoves"]],
+        "legalMoves": Board(lesson["fen"]).legal_move_map(),
+    }
+    if lesson.get("targetSquare"):
+        doc["targetSquare"] = lesson["targetSquare"]
+    if lesson["task"] == "checkmate":
+        doc["solution"] = solve_mate(Board(lesson["fen"]), lesson.get("mateIn", 1))
+    return doc
+
+
+def content_hash(doc):
+    canonical = json.dumps(doc, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def plan(lessons, published):
+    """
+    (upserts, deletes, hashes): docs to write keyed by doc id, doc ids to
+    delete, and the full hash map the manifest should hold afterwards.
+    """
+    upserts = {}
+    hashes = {}
+    for lesson in lessons:
+        doc_id = str(lesson["id"])
+        doc = lesson_document(lesson)
+        digest = content_hash(doc)
+        hashes[doc_id] = digest
+        if published.get(doc_id) != digest:
+            doc["contentHash"] = digest
+            upserts[doc_id] = doc
+    deletes = sorted(set(published) - set(hashes))
+    return upserts, deletes, hashes
+
+
+def published_hashes(db):
+    """{doc id: hash} currently in Firestore, plus the manifest version"""
+    manifest = db.collection("meta").document("lessons").get()
+    data = manifest.to_dict() if manifest.exists else {}
+    if "hashes" in data:
+        return data["hashes"], data.get("version", 0)
+
+    # First run (or a manifest written by hand): read just the hash field of each doc
+    hashes = {}
+    for doc in db.collection("lessons").select(["contentHash"]).stream():
+        hashes[doc.id] = (doc.to_dict() or {}).get("contentHash")
+    return hashes, data.get("version", 0)
+
+
+def publish(db, upserts, deletes, hashes, version):
+    """Write the diff in batches; the manifest goes in the last batch so it never runs ahead"""
+    from firebase_admin import firestore
+
+    collection = db.collection("lessons")
+    writes = [("set", doc_id, doc) for doc_id, doc in upserts.items()]
+    writes += [("delete", doc_id, None) for doc_id in deletes]
+
+    batch = db.batch()
+    pending = 0
+    commits = 0
+    for op, doc_id, doc in writes:
+        if op == "set":
+            batch.set(collection.document(doc_id), doc)
+        else:
+            batch.delete(collection.document(doc_id))
+        pending += 1
+        if pending == BATCH_LIMIT:
+            batch.commit()
+            commits += 1
+            batch = db.batch()
+            pending = 0
+
+    batch.set(db.collection("meta").document("lessons"), {
+        "version": version + 1,
+        "hashes": hashes,
+        "count": len(hashes),
+        "updated_at": firestore.SERVER_TIMESTAMP,
+    })
+    batch.commit()
+    return commits + 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publish lessons to Firestore incrementally")
+    parser.add_argument("--dry-run", action="store_true", help="print what would change without writing")
+    args = parser.parse_args(argv)
+
+    from app.scripts.populate_lessons import lessons
+    from app.scripts.validate_lessons import report
+
+    if not report(lessons):
+        print("❌ Fix the lessons above before publishing.")
+        return 1
+
+    from app.utils.firebase_init import db
+
+    published, version = published_hashes(db)
+    upserts, deletes, hashes = plan(lessons, published)
+
+    for doc_id in upserts:
+        print(f"  {'~' if doc_id in published else '+'} lesson {doc_id}")
+    for doc_id in deletes:
+        print(f"  - lesson {doc_id}")
+
+    if not upserts and not deletes:
+        print(f"✅ {len(hashes)} lessons already up to date (version {version}); nothing written.")
+        return 0
+    if args.dry_run:
+        print(f"Dry run: {len(upserts)} to write, {len(deletes)} to delete.")
+        return 0
+
+    commits = publish(db, upserts, deletes, hashes, version)
+    print(f"🚀 Published {len(upserts)} lessons, deleted {len(deletes)} "
+          f"in {commits} batch(es); manifest version {version + 1}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+"""
+Recompute Student Ratings
+
+Replays every stored game/tournament result through Glicko-2 and rewrites
+each student's rating and complete rating history (see app/utils/ratings.py).
+Use it to backfill history after importing old results, or after results were
+recorded late for periods that had already been rated. With --update only the
+periods closed since the last run are rated, as POST /admin/ratings/update does.
+
+    python -m app.scripts.recompute_ratings
+    python -m app.scripts.recompute_ratings --update
+"""
+import argparse
+import sys
+import time
+
+from app.config import Config
+from app.utils.ratings import recompute_ratings, update_ratings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recompute Glicko-2 ratings from stored results")
+    parser.add_argument("--update", action="store_true", help="only rate periods closed since the last run")
+    args = parser.parse_args(argv)
+
+    config = {key: getattr(Config, key) for key in dir(Config) if key.isupper()}
+    started = time.perf_counter()
+    try:
+        if args.update:
+            summary = update_ratings(config)
+        else:
+            summary = recompute_ratings(config)
+    except Exception as e:
+        print(f"❌ Rating {'update' if args.update else 'recompute'} failed: {e}")
+        return 1
+
+    print(f"✅ Rated {summary['results']} results over {summary['periods']} period(s) for "
+          f"{summary['players']} players in {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""
+Lesson Integrity Validator
+
+Replays every lesson in populate_lessons.py on the server-side move generator
+and reports lessons whose fields disagree with each other:
+
+- `pieces` must be exactly the pieces in `fen` (the board is drawn from `pieces`)
+- every entry in `correctMoves` must be legal in `fen`
+- `targetSquare`, when set, must be where every correct move lands
+- the move must do what the task says (capture, castle, en passant, promote,
+  check)
+- checkmate lessons are solved with the mate search: every correct move must
+  force mate in `mateIn` (default 1) and every mating move must be accepted
+- tactic lessons must not overlook a forced mate in two
+
+    python -m app.scripts.validate_lessons
+"""
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from app.chess import Board, SQUARE_NAMES
+from app.chess.board import (
+    CAPTURE, EP_CAPTURE, KING_CASTLE, QUEEN_CASTLE, PROMOTION, move_flag,
+)
+from app.chess.mate import mating_moves, solve_mate
+
+# Below this many lessons a process pool costs more to start than it saves
+PARALLEL_THRESHOLD = 200
+
+
+def _check_move(board, lesson, frm, to):
+    """Problems with one correct move, or [] if it is fine"""
+    if frm not in SQUARE_NAMES or to not in SQUARE_NAMES:
+        return [f"move {frm}-{to} uses an invalid square"]
+    try:
+        move = board.parse_uci(frm + to)
+    except ValueError:
+        return [f"move {frm}-{to} is not legal in the FEN"]
+
+    errors = []
+    target = lesson.get("targetSquare")
+    if target and to != target:
+        errors.append(f"move {frm}-{to} does not land on targetSquare {target}")
+
+    task = lesson.get("task")
+    flag = move_flag(move)
+    if task == "capture" and not flag & CAPTURE:
+        errors.append(f"move {frm}-{to} is not a capture")
+    elif task == "castle" and flag not in (KING_CASTLE, QUEEN_CASTLE):
+        errors.append(f"move {frm}-{to} is not a castling move")
+    elif task == "en_passant" and flag != EP_CAPTURE:
+        errors.append(f"move {frm}-{to} is not an en passant capture")
+    elif task == "promote" and not flag & PROMOTION:
+        errors.append(f"move {frm}-{to} is not a promotion")
+    elif task == "check" and not board.gives_check(move):
+        errors.append(f"move {frm}-{to} does not give check")
+    return errors
+
+
+def _check_solutions(board, lesson, moves):
+    """Compare the hand-entered answers with what the mate search finds"""
+    given = {frm + to for frm, to in moves}
+    task = lesson.get("task")
+    errors = []
+    if task == "checkmate":
+        n = lesson.get("mateIn", 1)
+        solutions = {uci[:4] for uci in mating_moves(board, n)}
+        if not solutions:
+            errors.append(f"no mate in {n} exists in this position")
+        for uci in sorted(given - solutions):
+            if solutions:
+                errors.append(f"move {uci[:2]}-{uci[2:]} does not force mate in {n}")
+        for uci in sorted(solutions - given):
+            errors.append(f"{uci[:2]}-{uci[2:]} also mates in {n} but is not in correctMoves")
+    elif task == "tactic":
+        line = solve_mate(board, 2)
+        if line and line[0][:4] not in given:
+            errors.append(f"overlooks a forced mate: {' '.join(line)}")
+    return errors
+
+
+def validate_lesson(lesson):
+    """(lesson id, [problems]) for a single lesson dict"""
+    try:
+        board = Board(lesson["fen"])
+    except (KeyError, ValueError) as e:
+        return lesson.get("id"), [f"bad FEN: {e}"]
+
+    errors = []
+    expected = board.piece_map()
+    pieces = lesson.get("pieces") or {}
+    mismatched = [sq for sq in sorted(set(expected) | set(pieces)) if expected.get(sq) != pieces.get(sq)]
+    if mismatched:
+        errors.append(f"pieces disagree with the FEN on {', '.join(mismatched)}")
+
+    moves = lesson.get("correctMoves") or []
+    if lesson.get("task") not in ("none", "free_practice", "move_piece", "endgame") and not moves:
+        errors.append(f"task {lesson.get('task')!r} has no correctMoves")
+    for frm, to in moves:
+        errors.extend(_check_move(board, lesson, frm, to))
+    if not errors:
+        errors.extend(_check_solutions(board, lesson, moves))
+
+    return lesson.get("id"), errors
+
+
+def validate_lessons(lessons, workers=None):
+    """
+    {lesson id: [problems]} for every lesson that has any. Large sets are
+    split over a process pool; the built-in set is small enough to run inline.
+    """
+    if len(lessons) >= PARALLEL_THRESHOLD:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(validate_lesson, lessons, chunksize=32))
+    else:
+        results = [validate_lesson(lesson) for lesson in lessons]
+    return {lesson_id: errors for lesson_id, errors in results if errors}
+
+
+def report(lessons, out=sys.stdout):
+    """Print a report; returns True when every lesson is consistent"""
+    t0 = time.perf_counter()
+    problems = validate_lessons(lessons)
+    elapsed = (time.perf_counter() - t0) * 1000.0
+
+    titles = {lesson.get("id"): lesson.get("title", "") for lesson in lessons}
+    for lesson_id, errors in problems.items():
+        print(f"❌ Lesson {lesson_id} ({titles.get(lesson_id)}):", file=out)
+        for error in errors:
+            print(f"   - {error}", file=out)
+    if problems:
+        print(f"{len(problems)} of {len(lessons)} lessons have problems ({elapsed:.1f} ms)", file=out)
+    else:
+        print(f"✅ All {len(lessons)} lessons valid ({elapsed:.1f} ms)", file=out)
+    return not problems
+
+
+def main():
+    from app.scripts.populate_lessons import lessons
+    return 0 if report(lessons) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,7 @@
+"""
+Swiss tournaments: pairing, incrementally updated standings and the
+tournament record kept in Firestore
+"""
+from app.tournaments.pairing import PairingPlayer, pair_round
+from app.tournaments.standings import Standings
+from app.tournaments.tournament import Tournament, RESULT_POINTS
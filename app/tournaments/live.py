@@ -0,0 +1,166 @@
+"""
+Live Tournament Updates
+
+Server-Sent Events for people following a tournament. Each tournament being
+watched has one Broadcaster per process holding its latest state. When the
+organiser pairs a round or enters a result, the routes hand the updated
+Tournament to the broadcaster. It works out what changed and formats each
+event once; every open stream then writes the same text. N viewers cost one
+diff, not N Firestore reads.
+
+    event: snapshot   everything: tournament, rounds, standings (on connect)
+    event: tournament summary (status, players, rounds played) when it changes
+    event: pairings   a newly paired round
+    event: result     {round, board, result}
+    event: standings  {rows: the rows that changed, order: ids in rank order}
+
+Reconnects with Last-Event-ID, heartbeats and stream lifetime are handled
+by app/utils/sse.py.
+
+With several workers a result is entered on one of them only. The other
+workers' broadcasters reload the tournament at most every
+LIVE_REFRESH_SECONDS while someone is watching: one read per process, not
+per viewer.
+"""
+import threading
+import time
+
+from app.tournaments.store import load_tournament
+from app.utils.sse import EventLog, format_event, sse_stream
+
+
+def _state(tournament):
+    """The parts of a tournament that viewers see, keyed for diffing"""
+    return {
+        "tournament": tournament.summary(),
+        "rounds": [tournament.round_view(i) for i in range(len(tournament.rounds))],
+        "standings": tournament.standings_table(),
+    }
+
+
+def diff_states(old, new):
+    """(event, data) pairs that turn viewers' `old` state into `new`"""
+    events = []
+    if old["tournament"] != new["tournament"]:
+        events.append(("tournament", new["tournament"]))
+    for index, rnd in enumerate(new["rounds"]):
+        if index >= len(old["rounds"]):
+            events.append(("pairings", rnd))
+            continue
+        for before, after in zip(old["rounds"][index]["boards"], rnd["boards"]):
+            if before["result"] != after["result"]:
+                events.append(("result", {"round": rnd["round"], "board": after["board"], "result": after["result"]}))
+    previous = {row["id"]: row for row in old["standings"]}
+    changed = [row for row in new["standings"] if previous.get(row["id"]) != row]
+    if changed:
+        events.append(("standings", {"rows": changed, "order": [row["id"] for row in new["standings"]]}))
+    return events
+
+
+class Broadcaster:
+    """Latest state of one tournament plus the log of events derived from it"""
+
+    def __init__(self, tournament, backlog=500, refresh=15.0):
+        self.tid = tournament.id
+        self.refresh = refresh
+        self.log = EventLog(backlog)
+        self.subscribers = 0
+        self.idle_since = time.monotonic()
+        self._state = _state(tournament)
+        self._snapshot = None                    # (seq, formatted text)
+        self._lock = threading.Lock()
+        self._next_refresh = time.monotonic() + refresh
+        self._refreshing = False
+
+    def update(self, tournament):
+        """Publish whatever changed between the last state and `tournament`"""
+        state = _state(tournament)
+        with self._lock:
+            events = diff_states(self._state, state)
+            self._state = state
+            self.log.publish(events)
+        return len(events)
+
+    def snapshot(self):
+        """(seq, formatted snapshot event), formatted at most once per state"""
+        with self._lock:
+            seq = self.log.seq
+            if self._snapshot is None or self._snapshot[0] != seq:
+                self._snapshot = (seq, format_event(self.log.event_id(seq), "snapshot", self._state))
+            return self._snapshot
+
+    def maybe_refresh(self):
+        """Reload from Firestore if it is time, so results entered on other workers show up"""
+        now = time.monotonic()
+        with self._lock:
+            if self._refreshing or now < self._next_refresh:
+                return
+            self._refreshing = True
+        try:
+            tournament = load_tournament(self.tid)
+            if tournament is not None:
+                self.update(tournament)
+        except Exception as e:
+            print(f"Live refresh failed for tournament {self.tid}: {e}")
+        finally:
+            with self._lock:
+                self._refreshing = False
+                self._next_refresh = time.monotonic() + self.refresh
+
+    def stream(self, last_event_id=None, heartbeat=15.0, lifetime=1800.0):
+        """Generator of SSE text for one viewer"""
+        with self._lock:
+            self.subscribers += 1
+        try:
+            yield from sse_stream(self.log, last_event_id, self.snapshot, heartbeat, lifetime,
+                                  on_heartbeat=self.maybe_refresh)
+        finally:
+            with self._lock:
+                self.subscribers -= 1
+                if not self.subscribers:
+                    self.idle_since = time.monotonic()
+
+
+class LiveTournaments:
+    """Broadcasters by tournament id, created on first viewer, dropped when idle"""
+
+    def __init__(self, backlog=500, refresh=15.0, idle=600.0):
+        self.backlog = backlog
+        self.refresh = refresh
+        self.idle = idle
+        self._broadcasters = {}
+        self._lock = threading.Lock()
+
+    def get(self, tid):
+        """The tournament's broadcaster, loading it on first use; None if it does not exist"""
+        with self._lock:
+            self._sweep()
+            broadcaster = self._broadcasters.get(tid)
+        if broadcaster is not None:
+            return broadcaster
+        tournament = load_tournament(tid)
+        if tournament is None:
+            return None
+        with self._lock:
+            return self._broadcasters.setdefault(tid, Broadcaster(tournament, self.backlog, self.refresh))
+
+    def publish(self, tournament):
+        """Push the organiser's change to viewers in this process, if there are any"""
+        with self._lock:
+            broadcaster = self._broadcasters.get(tournament.id)
+        if broadcaster is not None:
+            broadcaster.update(tournament)
+
+    def _sweep(self):
+        """Forget tournaments nobody has watched for a while (lock held)"""
+        now = time.monotonic()
+        for tid, broadcaster in list(self._broadcasters.items()):
+            if not broadcaster.subscribers and now - broadcaster.idle_since > self.idle:
+                del self._broadcasters[tid]
+
+
+def init_live_tournaments(app):
+    app.extensions["live_tournaments"] = LiveTournaments(
+        backlog=app.config.get("LIVE_BACKLOG", 500),
+        refresh=app.config.get("LIVE_REFRESH_SECONDS", 15.0),
+    )
@@ -0,0 +1,252 @@
+"""
+Swiss Pairing
+
+Pairs a round the way the Dutch system does: players are ranked by score and
+rating and split into score brackets, and inside each bracket the top half
+(S1) is matched against the bottom half (S2). The matching is a minimum-cost
+assignment (Hungarian algorithm, vectorised with NumPy) over a cost matrix
+that forbids rematches and pairs of players who both must have the same
+colour (absolute preferences: a colour difference of two, or the same colour
+twice running), penalises other colour clashes and prefers the Dutch
+S1[i] v S2[i] order. An odd bracket leaves one player over, who floats down
+to the next bracket; players who could only be paired in a forbidden pair
+float down as well. If the last bracket still cannot be paired without one,
+brackets above it are reopened and the merged group is searched depth-first.
+
+    from app.tournaments.pairing import pair_round
+
+    pairs, bye = pair_round(players)      # players: list of PairingPlayer
+    # pairs: [(white_id, black_id), ...] best board first; bye: id or None
+"""
+import numpy as np
+
+# Pairs costing FORBIDDEN or more are only made when nothing else works;
+# then a colour repeat is preferred to a rematch
+FORBIDDEN = 500_000
+REMATCH = 1_000_000
+ABSOLUTE_CLASH = FORBIDDEN      # both players need the same colour
+COLOUR_CLASH = 10
+DOUBLE_FLOAT = 5000
+
+# The depth-first search gives up after this many steps and accepts a forbidden pair
+SEARCH_LIMIT = 200_000
+
+
+class PairingPlayer:
+    """What the pairing needs to know about a player after the rounds so far"""
+
+    __slots__ = ("id", "score", "rating", "colours", "opponents", "had_bye")
+
+    def __init__(self, id, score=0.0, rating=0, colours="", opponents=(), had_bye=False):
+        self.id = id
+        self.score = score
+        self.rating = rating
+        self.colours = colours          # "w"/"b" per game played, in order
+        self.opponents = set(opponents)
+        self.had_bye = had_bye
+
+    def __repr__(self):
+        return f"<PairingPlayer {self.id} {self.score} {self.colours}>"
+
+    def colour_preference(self):
+        """(colour wanted or None, strength): 2 absolute, 1 strong, 0 mild or none"""
+        if not self.colours:
+            return None, 0
+        diff = self.colours.count("w") - self.colours.count("b")
+        last = self.colours[-1]
+        other = "b" if last == "w" else "w"
+        if abs(diff) >= 2:
+            return ("b" if diff > 0 else "w"), 2
+        if self.colours[-2:] in ("ww", "bb"):
+            return other, 2
+        if diff:
+            return ("b" if diff > 0 else "w"), 1
+        return other, 0
+
+
+def assignment(cost):
+    """
+    Minimum-cost assignment for an (n, m) cost matrix with n <= m (the
+    Hungarian algorithm with potentials; the column scan is vectorised).
+    Returns the column chosen for each row.
+    """
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    p = np.zeros(m + 1, dtype=np.int64)      # row matched to each column, 1-based, 0 = none
+    way = np.zeros(m + 1, dtype=np.int64)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            free = np.flatnonzero(~used)
+            reduced = cost[i0 - 1, free - 1] - u[i0] - v[free]
+            better = reduced < minv[free]
+            minv[free[better]] = reduced[better]
+            way[free[better]] = j0
+            j1 = free[np.argmin(minv[free])]
+            delta = minv[j1]
+            u[p[used]] += delta
+            v[used] -= delta
+            minv[free] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    result = np.zeros(n, dtype=np.int64)
+    for j in range(1, m + 1):
+        if p[j]:
+            result[p[j] - 1] = j - 1
+    return result
+
+
+def _rank_key(player):
+    return (-player.score, -player.rating, str(player.id))
+
+
+def pair_cost(a, b):
+    """Cost of pairing a with b, whichever colours they get"""
+    if b.id in a.opponents:
+        return REMATCH
+    want_a, strength_a = a.colour_preference()
+    want_b, strength_b = b.colour_preference()
+    if want_a is not None and want_a == want_b:
+        if strength_a == 2 and strength_b == 2:
+            return ABSOLUTE_CLASH
+        return COLOUR_CLASH * (1 + min(strength_a, strength_b))
+    return 0
+
+
+def allocate_colours(a, b, board):
+    """(white, black) for a pair; `a` is the higher-ranked player"""
+    want_a, strength_a = a.colour_preference()
+    want_b, strength_b = b.colour_preference()
+    if want_a is None and want_b is None:
+        # First round: the top seed gets White on board 1, colours alternate down the boards
+        return (a, b) if board % 2 == 0 else (b, a)
+    if want_a is not None and (want_a != want_b or strength_a >= strength_b):
+        return (a, b) if want_a == "w" else (b, a)
+    return (b, a) if want_b == "w" else (a, b)
+
+
+def _pair_bracket(group, floated):
+    """
+    Hungarian pairing of one bracket: (pairs, left over). `floated` holds the
+    ids of players already floated down this round.
+    """
+    if len(group) < 2:
+        return [], list(group)
+    half = len(group) // 2
+    s1, s2 = group[:half], group[half:]
+    cost = np.empty((len(s2), len(s2)))
+    for i, a in enumerate(s1):
+        for j, b in enumerate(s2):
+            cost[i, j] = pair_cost(a, b) + abs(i - j)
+    if len(s2) > len(s1):
+        # A dummy S1 row: whoever it takes floats down, preferably the lowest ranked
+        cost[-1] = [len(s2) - 1 - j + (DOUBLE_FLOAT if b.id in floated else 0) for j, b in enumerate(s2)]
+    columns = assignment(cost)
+
+    pairs, left = [], []
+    for i, a in enumerate(s1):
+        b = s2[columns[i]]
+        if cost[i, columns[i]] >= FORBIDDEN:
+            left.extend((a, b))
+        else:
+            pairs.append((a, b))
+    if len(s2) > len(s1):
+        left.append(s2[columns[-1]])
+    return pairs, sorted(left, key=_rank_key)
+
+
+def _search(players):
+    """
+    Cheapest pairing of `players` without forbidden pairs, found by depth-first search
+    (candidates tried cheapest first), or None
+    """
+    steps = 0
+
+    def solve(rest):
+        nonlocal steps
+        if not rest:
+            return []
+        a, others = rest[0], rest[1:]
+        options = sorted(range(len(others)), key=lambda k: (pair_cost(a, others[k]), k))
+        for k in options:
+            steps += 1
+            if steps > SEARCH_LIMIT or pair_cost(a, others[k]) >= FORBIDDEN:
+                return None
+            tail = solve(others[:k] + others[k + 1:])
+            if tail is not None:
+                return [(a, others[k])] + tail
+        return None
+
+    return solve(players)
+
+
+def pair_round(players):
+    """
+    Pair the next round. Returns ([(white id, black id), ...] in board order,
+    id of the player given the bye or None).
+    """
+    ranked = sorted(players, key=_rank_key)
+    bye = None
+    if len(ranked) % 2:
+        # The lowest-ranked player who has not had a bye yet
+        candidates = [p for p in ranked if not p.had_bye] or ranked
+        bye = candidates[-1]
+        ranked.remove(bye)
+
+    brackets = []
+    for player in ranked:
+        if brackets and brackets[-1][0].score == player.score:
+            brackets[-1].append(player)
+        else:
+            brackets.append([player])
+
+    paired = []         # pairs per bracket, so the search can reopen them
+    carry = []
+    floated = set()
+    for bracket in brackets:
+        pairs, carry = _pair_bracket(carry + bracket, floated)
+        floated.update(p.id for p in carry)
+        paired.append(pairs)
+
+    # Whatever is left at the bottom is paired together with reopened brackets above it
+    reopened = list(carry)
+    while reopened:
+        solution = _search(sorted(reopened, key=_rank_key))
+        if solution is not None:
+            paired.append(solution)
+            break
+        if not paired:
+            # No pairing without forbidden pairs exists at all: accept the cheapest assignment
+            paired.append(_force_pairs(sorted(reopened, key=_rank_key)))
+            break
+        reopened += [p for pair in paired.pop() for p in pair]
+
+    boards = [pair for pairs in paired for pair in pairs]
+    boards.sort(key=lambda pair: min(_rank_key(pair[0]), _rank_key(pair[1])))
+    result = []
+    for board, (a, b) in enumerate(boards):
+        if _rank_key(b) < _rank_key(a):
+            a, b = b, a
+        white, black = allocate_colours(a, b, board)
+        result.append((white.id, black.id))
+    return result, bye.id if bye else None
+
+
+def _force_pairs(players):
+    """Cheapest pairing allowing forbidden pairs, for when no other exists"""
+    half = len(players) // 2
+    s1, s2 = players[:half], players[half:]
+    cost = np.array([[pair_cost(a, b) for b in s2] for a in s1], dtype=float)
+    columns = assignment(cost)
+    return [(a, s2[columns[i]]) for i, a in enumerate(s1)]
@@ -0,0 +1,92 @@
+"""
+Tournament Standings
+
+Scores and tie-breaks kept up to date one result at a time:
+
+- Buchholz: the sum of the player's opponents' scores
+- Sonneborn-Berger: the sum, over the player's games, of the points scored
+  against each opponent times that opponent's score
+
+When a player's score changes by d, each of their opponents' Buchholz changes
+by d and their Sonneborn-Berger by d times what they scored against them, so
+a result only touches the two players and their previous opponents: O(rounds)
+per result, O(results) for a whole event. Byes count for the player's score
+but add nothing to tie-breaks.
+
+    standings = Standings(ratings)          # {player id: rating}
+    standings.add_result(white, black, 1.0)
+    standings.table()                       # ranked rows
+"""
+
+
+class Standings:
+    def __init__(self, ratings):
+        self.ratings = dict(ratings)
+        self.score = {pid: 0.0 for pid in ratings}
+        self.buchholz = {pid: 0.0 for pid in ratings}
+        self.sonneborn = {pid: 0.0 for pid in ratings}
+        # pid -> list of [opponent, points scored against them]
+        self.games = {pid: [] for pid in ratings}
+        self.byes = {pid: 0 for pid in ratings}
+
+    def add_player(self, pid, rating):
+        self.ratings[pid] = rating
+        for table in (self.score, self.buchholz, self.sonneborn):
+            table.setdefault(pid, 0.0)
+        self.games.setdefault(pid, [])
+        self.byes.setdefault(pid, 0)
+
+    def _change_score(self, pid, delta):
+        if not delta:
+            return
+        self.score[pid] += delta
+        for opponent, points in self.games[pid]:
+            self.buchholz[opponent] += delta
+            self.sonneborn[opponent] += (1.0 - points) * delta
+
+    def add_result(self, white, black, white_points):
+        """A finished game; white_points is 1, 0.5 or 0"""
+        black_points = 1.0 - white_points
+        self._change_score(white, white_points)
+        self._change_score(black, black_points)
+        self.games[white].append([black, white_points])
+        self.games[black].append([white, black_points])
+        self.buchholz[white] += self.score[black]
+        self.buchholz[black] += self.score[white]
+        self.sonneborn[white] += white_points * self.score[black]
+        self.sonneborn[black] += black_points * self.score[white]
+
+    def remove_result(self, white, black, white_points):
+        """Undo add_result(), for correcting a mistyped result"""
+        black_points = 1.0 - white_points
+        self.buchholz[white] -= self.score[black]
+        self.buchholz[black] -= self.score[white]
+        self.sonneborn[white] -= white_points * self.score[black]
+        self.sonneborn[black] -= black_points * self.score[white]
+        self.games[white].remove([black, white_points])
+        self.games[black].remove([white, black_points])
+        self._change_score(white, -white_points)
+        self._change_score(black, -black_points)
+
+    def add_bye(self, pid, points=1.0):
+        self.byes[pid] += 1
+        self._change_score(pid, points)
+
+    def table(self):
+        """Rows ranked by score, Buchholz, Sonneborn-Berger, then rating"""
+        order = sorted(
+            self.score,
+            key=lambda pid: (-self.score[pid], -self.buchholz[pid], -self.sonneborn[pid],
+                             -self.ratings.get(pid, 0), str(pid)),
+        )
+        return [
+            {
+                "rank": rank,
+                "id": pid,
+                "score": self.score[pid],
+                "buchholz": round(self.buchholz[pid], 2),
+                "sonneborn_berger": round(self.sonneborn[pid], 2),
+                "games": len(self.games[pid]),
+            }
+            for rank, pid in enumerate(order, 1)
+        ]
@@ -0,0 +1,99 @@
+"""
+Tournament Store
+
+Loads and saves Tournament objects in the `tournaments` collection, and
+hands the results of each completed round to the rating system
+(app/utils/ratings.py) exactly once, when the organiser asks for it.
+
+Changes go through update_tournament(), a Firestore transaction: two
+arbiters entering results at the same moment each see the other's result
+instead of overwriting it. Rating a round writes its results and the
+round's `rated` flag in the same transaction.
+"""
+from firebase_admin import firestore
+
+from app.tournaments.tournament import Tournament
+from app.utils.firebase_init import db
+from app.utils.helpers import now_utc
+from app.utils.ratings import BATCH_LIMIT, result_writes
+
+
+def _collection():
+    return db.collection("tournaments")
+
+
+def create_tournament(name, rounds_planned, date=None, bye_points=1.0):
+    ref = _collection().document()
+    tournament = Tournament(ref.id, name, date=date, rounds_planned=rounds_planned, bye_points=bye_points)
+    data = tournament.to_dict()
+    data["created_at"] = now_utc()
+    ref.set(data)
+    return tournament
+
+
+def load_tournament(tid):
+    """The tournament, or None if there is no such document"""
+    doc = _collection().document(tid).get()
+    if not doc.exists:
+        return None
+    return Tournament.from_dict(doc.id, doc.to_dict())
+
+
+def update_tournament(tid, change):
+    """
+    Load the tournament, call `change(tournament, transaction)` and save it,
+    all in one transaction; `transaction` is for any other writes that must
+    commit with it. Firestore reruns the whole thing if the document changed
+    meanwhile, so `change` must not have other side effects. Returns
+    (tournament, what `change` returned), or (None, None) if there is no such
+    tournament. An exception from `change` aborts without writing.
+    """
+    ref = _collection().document(tid)
+
+    @firestore.transactional
+    def run(transaction):
+        doc = ref.get(transaction=transaction)
+        if not doc.exists:
+            return None, None
+        tournament = Tournament.from_dict(doc.id, doc.to_dict())
+        outcome = change(tournament, transaction)
+        data = tournament.to_dict()
+        data["updated_at"] = now_utc()
+        transaction.set(ref, data, merge=True)
+        return tournament, outcome
+
+    return run(db.transaction())
+
+
+def list_tournaments(limit=50):
+    docs = _collection().order_by("created_at", direction=firestore.Query.DESCENDING).limit(limit).stream()
+    return [Tournament.from_dict(doc.id, doc.to_dict()).summary() for doc in docs]
+
+
+def rate_completed_rounds(tid, days):
+    """
+    Record the results of every completed round not yet sent for rating and
+    mark those rounds rated. Each transaction writes a batch of rounds'
+    results together with their `rated` flags, so a failure leaves nothing
+    half done. Returns (tournament, number of results recorded), or
+    (None, 0) if there is no such tournament.
+    """
+    def rate_some(tournament, transaction):
+        writes = 0
+        for index, results in list(tournament.unrated_results()):
+            if writes and writes + len(results) > BATCH_LIMIT:
+                break
+            for _, ref, doc in result_writes(results, days, source="tournament", tournament_id=tournament.id):
+                transaction.set(ref, doc)
+            tournament.rounds[index]["rated"] = True
+            writes += len(results)
+        return writes
+
+    total = 0
+    while True:
+        tournament, recorded = update_tournament(tid, rate_some)
+        if tournament is None:
+            return None, 0
+        total += recorded
+        if not any(True for _ in tournament.unrated_results()):
+            return tournament, total
@@ -0,0 +1,187 @@
+"""
+Swiss Tournament
+
+A tournament as stored in Firestore (tournaments/{id}): its players, and its
+rounds as lists of boards with results. Loading replays the results into
+Standings once (O(results)); after that every pairing or result updates the
+standings in place.
+
+    tournaments/{id}    name, date, rounds_planned, status, bye_points,
+                        players: [{id, name, rating, guest}],
+                        rounds: [{"boards": [{"white", "black", "result"}], "bye", "rated"}]
+"""
+from app.tournaments.pairing import PairingPlayer, pair_round
+from app.tournaments.standings import Standings
+
+RESULT_POINTS = {"1-0": 1.0, "0-1": 0.0, "1/2-1/2": 0.5}
+STATUSES = ("registration", "running", "finished")
+
+
+class Tournament:
+    def __init__(self, id, name, date=None, rounds_planned=5, players=(), rounds=(),
+                 status="registration", bye_points=1.0):
+        self.id = id
+        self.name = name
+        self.date = date
+        self.rounds_planned = rounds_planned
+        self.status = status
+        self.bye_points = bye_points
+        self.players = [dict(p) for p in players]
+        self.rounds = [{"boards": [dict(b) for b in r["boards"]], "bye": r.get("bye"), "rated": r.get("rated", False)}
+                       for r in rounds]
+        self.standings = Standings({p["id"]: p.get("rating", 0) for p in self.players})
+        for rnd in self.rounds:
+            if rnd["bye"] is not None:
+                self.standings.add_bye(rnd["bye"], self.bye_points)
+            for board in rnd["boards"]:
+                if board.get("result") in RESULT_POINTS:
+                    self.standings.add_result(board["white"], board["black"], RESULT_POINTS[board["result"]])
+
+    @classmethod
+    def from_dict(cls, id, data):
+        return cls(
+            id,
+            data.get("name", ""),
+            date=data.get("date"),
+            rounds_planned=data.get("rounds_planned", 5),
+            players=data.get("players", []),
+            rounds=data.get("rounds", []),
+            status=data.get("status", "registration"),
+            bye_points=data.get("bye_points", 1.0),
+        )
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "date": self.date,
+            "rounds_planned": self.rounds_planned,
+            "status": self.status,
+            "bye_points": self.bye_points,
+            "players": self.players,
+            "rounds": self.rounds,
+        }
+
+    # ---------------- PLAYERS ----------------
+
+    def add_player(self, pid, name, rating=0, guest=False):
+        if self.status != "registration":
+            raise ValueError("Registration is closed")
+        if any(p["id"] == pid for p in self.players):
+            raise ValueError(f"{name} is already registered")
+        self.players.append({"id": pid, "name": name, "rating": rating, "guest": guest})
+        self.standings.add_player(pid, rating)
+
+    def _pairing_players(self):
+        state = {p["id"]: PairingPlayer(p["id"], rating=p.get("rating", 0)) for p in self.players}
+        for rnd in self.rounds:
+            if rnd["bye"] is not None:
+                state[rnd["bye"]].had_bye = True
+            for board in rnd["boards"]:
+                white, black = state[board["white"]], state[board["black"]]
+                white.colours += "w"
+                black.colours += "b"
+                white.opponents.add(black.id)
+                black.opponents.add(white.id)
+        for pid, player in state.items():
+            player.score = self.standings.score[pid]
+        return list(state.values())
+
+    # ---------------- ROUNDS ----------------
+
+    def round_complete(self, index):
+        return all(board.get("result") in RESULT_POINTS for board in self.rounds[index]["boards"])
+
+    def pair_next_round(self):
+        """Pair and append the next round; returns it"""
+        if len(self.players) < 2:
+            raise ValueError("At least two players are needed")
+        if self.rounds and not self.round_complete(len(self.rounds) - 1):
+            raise ValueError(f"Round {len(self.rounds)} still has games without a result")
+        if len(self.rounds) >= self.rounds_planned:
+            raise ValueError("All rounds have been played")
+        pairs, bye = pair_round(self._pairing_players())
+        rnd = {
+            "boards": [{"white": white, "black": black, "result": None} for white, black in pairs],
+            "bye": bye,
+            "rated": False,
+        }
+        self.rounds.append(rnd)
+        if bye is not None:
+            self.standings.add_bye(bye, self.bye_points)
+        self.status = "running"
+        return rnd
+
+    def set_result(self, round_number, board_number, result):
+        """Enter or correct a result (rounds and boards numbered from 1); returns the board"""
+        if result not in RESULT_POINTS:
+            raise ValueError(f"result must be one of {', '.join(RESULT_POINTS)}")
+        if not 1 <= round_number <= len(self.rounds):
+            raise ValueError(f"No round {round_number}")
+        rnd = self.rounds[round_number - 1]
+        if not 1 <= board_number <= len(rnd["boards"]):
+            raise ValueError(f"No board {board_number} in round {round_number}")
+        if rnd["rated"]:
+            raise ValueError(f"Round {round_number} has already been sent for rating")
+        board = rnd["boards"][board_number - 1]
+        previous = board.get("result")
+        if previous in RESULT_POINTS:
+            self.standings.remove_result(board["white"], board["black"], RESULT_POINTS[previous])
+        board["result"] = result
+        self.standings.add_result(board["white"], board["black"], RESULT_POINTS[result])
+        if len(self.rounds) == self.rounds_planned and self.round_complete(len(self.rounds) - 1):
+            self.status = "finished"
+        return board
+
+    def unrated_results(self):
+        """
+        (round index, results for app.utils.ratings) of complete rounds not yet
+        rated; games against guests are not rated. Each result carries the
+        id "<tournament>-<round>-<board>", so recording it twice is harmless.
+        """
+        guests = {p["id"] for p in self.players if p.get("guest")}
+        for index, rnd in enumerate(self.rounds):
+            if not rnd["rated"] and self.round_complete(index):
+                yield index, [
+                    {"id": f"{self.id}-{index + 1}-{n}", "white": b["white"], "black": b["black"],
+                     "result": b["result"]}
+                    for n, b in enumerate(rnd["boards"], 1)
+                    if b["white"] not in guests and b["black"] not in guests
+                ]
+
+    # ---------------- VIEWS ----------------
+
+    def names(self):
+        return {p["id"]: p["name"] for p in self.players}
+
+    def standings_table(self):
+        names = self.names()
+        rows = self.standings.table()
+        for row in rows:
+            row["name"] = names.get(row["id"], "?")
+            row["rating"] = self.standings.ratings.get(row["id"], 0)
+        return rows
+
+    def round_view(self, index):
+        names = self.names()
+        rnd = self.rounds[index]
+        return {
+            "round": index + 1,
+            "boards": [
+                {"board": n, "white": b["white"], "black": b["black"], "result": b.get("result"),
+                 "white_name": names.get(b["white"], "?"), "black_name": names.get(b["black"], "?")}
+                for n, b in enumerate(rnd["boards"], 1)
+            ],
+            "bye": rnd["bye"],
+            "bye_name": names.get(rnd["bye"]) if rnd["bye"] is not None else None,
+        }
+
+    def summary(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "date": self.date,
+            "status": self.status,
+            "rounds_planned": self.rounds_planned,
+            "rounds_played": len(self.rounds),
+            "players": len(self.players),
+        }
@@ -0,0 +1,309 @@
+"""
+Background Game Analysis
+
+Students (or the coach, on a student's behalf) upload PGNs and get every move
+annotated by the engine (see app/chess/analysis.py). Nothing is analysed on
+the request thread: submit() records the job and hands each game to a pool of
+engine processes, and returns straight away. Finished games are put on a
+queue that a writer thread drains, committing them to Firestore in batches
+together with the job's progress counters, which is what the polling
+endpoints read.
+
+Each pool process keeps its Searcher and its evaluation cache (by Zobrist
+hash) across games, so common openings are searched once per process.
+
+Queued games live only in this process's memory. Each job records the
+queue instance that owns it, and the first request after a restart marks
+jobs still "queued" or "running" under another instance as failed, so
+they don't poll forever. A student can have one unfinished job at a time.
+
+    analysis_jobs/{job_id}              uid, status, total, done, failed, worker, error,
+                                        created_at, updated_at
+    analysis_jobs/{job_id}/games/{n}    index, headers, status, moves, summary (or error)
+"""
+import multiprocessing
+import queue
+import secrets
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from app.chess.analysis import analyze_game
+from app.chess.pgn import parse_games
+from app.utils.helpers import now_utc
+
+# Tags worth keeping with the results; the rest of a PGN's headers are dropped
+KEPT_HEADERS = ("Event", "Site", "Date", "Round", "White", "Black", "Result",
+                "WhiteElo", "BlackElo", "TimeControl", "ECO", "Opening")
+
+
+def upload_text(req, max_bytes):
+    """PGN text from a multipart `pgn` file or a JSON {"pgn": "..."} body"""
+    file = req.files.get("pgn")
+    if file is not None:
+        data = file.read(max_bytes + 1)
+    else:
+        data = str((req.get_json(silent=True) or {}).get("pgn") or "").encode("utf-8")
+    if not data.strip():
+        raise ValueError("pgn is required")
+    if len(data) > max_bytes:
+        raise ValueError(f"PGN uploads are limited to {max_bytes // 1024} KB")
+    return data
+
+
+def parse_upload(text, max_games):
+    """PGNGames with at least one legal move from uploaded PGN text; ValueError if unusable"""
+    games = [game for game in parse_games(text) if len(game.moves)]
+    if not games:
+        raise ValueError("No games with legal moves found in the PGN")
+    if len(games) > max_games:
+        raise ValueError(f"At most {max_games} games per upload")
+    return games
+
+
+class FirestoreAnalysisStore:
+    """Job and result documents in Firestore"""
+
+    def _jobs(self):
+        from app.utils.firebase_init import db
+        return db.collection("analysis_jobs")
+
+    def create_job(self, uid, total, uploaded_by, worker=None):
+        now = now_utc()
+        ref = self._jobs().document()
+        ref.set({
+            "uid": uid,
+            "uploaded_by": uploaded_by,
+            "status": "queued",
+            "total": total,
+            "done": 0,
+            "failed": 0,
+            "worker": worker,
+            "created_at": now,
+            "updated_at": now,
+        })
+        return ref.id
+
+    def fail_orphans(self, worker):
+        """Mark unfinished jobs owned by any other queue instance as failed; returns how many"""
+        from app.utils.firebase_init import db
+
+        orphans = [doc for doc in self._jobs().where("status", "in", ["queued", "running"]).stream()
+                   if doc.to_dict().get("worker") != worker]
+        if orphans:
+            batch = db.batch()
+            for doc in orphans:
+                batch.update(doc.reference, {
+                    "status": "failed",
+                    "error": "Analysis was interrupted by a server restart; please upload the games again",
+                    "updated_at": now_utc(),
+                })
+            batch.commit()
+        return len(orphans)
+
+    def write(self, records, progress):
+        """One batched commit: the finished games plus each job's counters"""
+        from firebase_admin import firestore
+        from app.utils.firebase_init import db
+
+        now = now_utc()
+        jobs = self._jobs()
+        batch = db.batch()
+        for job_id, index, record in records:
+            batch.set(jobs.document(job_id).collection("games").document(f"{index:04d}"), record)
+        for job_id, counts in progress.items():
+            batch.update(jobs.document(job_id), {
+                "done": firestore.Increment(counts["done"]),
+                "failed": firestore.Increment(counts["failed"]),
+                "status": counts["status"],
+                "updated_at": now,
+            })
+        batch.commit()
+
+    def get_job(self, job_id, with_games=True):
+        """(job dict, list of game dicts) or (None, []) if there is no such job"""
+        ref = self._jobs().document(job_id)
+        doc = ref.get()
+        if not doc.exists:
+            return None, []
+        job = doc.to_dict()
+        job["id"] = doc.id
+        games = []
+        if with_games:
+            games = [g.to_dict() for g in ref.collection("games").order_by("index").stream()]
+        return job, games
+
+    def list_jobs(self, uid, limit=20):
+        jobs = []
+        for doc in self._jobs().where("uid", "==", uid).stream():
+            job = doc.to_dict()
+            job["id"] = doc.id
+            jobs.append(job)
+        jobs.sort(key=lambda j: j.get("created_at") or 0, reverse=True)
+        return jobs[:limit]
+
+
+class AnalysisQueue:
+    def __init__(self, store, workers=1, depth=4, time_ms=500, flush_games=10, flush_interval=2.0):
+        self.store = store
+        self.workers = workers
+        self.depth = depth
+        self.time_ms = time_ms
+        self.instance = secrets.token_hex(4)
+        self._recovered = False
+        self.flush_games = flush_games
+        self.flush_interval = flush_interval
+        self._executor = None
+        self._writer = None
+        self._lock = threading.Lock()
+        self._results = queue.Queue()
+        # job id -> [games submitted, games finished] for jobs submitted by this web worker
+        self._jobs = {}
+
+    def _pool(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn, not fork: forking a threaded web worker can copy held locks
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._executor
+
+    def recover(self):
+        """Once per process: fail the jobs a previous process left unfinished"""
+        with self._lock:
+            if self._recovered:
+                return
+            self._recovered = True
+        try:
+            failed = self.store.fail_orphans(self.instance)
+            if failed:
+                print(f"Marked {failed} interrupted analysis job(s) as failed")
+        except Exception as e:
+            print(f"Analysis job recovery error: {e}")
+            with self._lock:
+                self._recovered = False
+
+    def active_job(self, uid):
+        """The student's queued or running job, or None"""
+        self.recover()
+        for job in self.store.list_jobs(uid):
+            if job.get("status") in ("queued", "running"):
+                return job
+        return None
+
+    def submit(self, uid, games, uploaded_by=None):
+        """Queue PGNGames for analysis on behalf of `uid`; returns the job id"""
+        self.recover()
+        job_id = self.store.create_job(uid, len(games), uploaded_by, worker=self.instance)
+        with self._lock:
+            self._jobs[job_id] = [len(games), 0]
+        self._start()
+        for index, game in enumerate(games):
+            headers = {tag: game.headers[tag] for tag in KEPT_HEADERS if tag in game.headers}
+            args = (analyze_game, game.start_fen, list(game.moves), self.depth, self.time_ms)
+            try:
+                future = self._pool().submit(*args)
+            except BrokenProcessPool:
+                # A crashed child poisons the whole executor; start a fresh one
+                self.shutdown()
+                future = self._pool().submit(*args)
+            future.add_done_callback(partial(self._finished, job_id, index, headers))
+        return job_id
+
+    def _finished(self, job_id, index, headers, future):
+        """Runs in the executor's thread: only hands the result to the writer"""
+        record = {"index": index, "headers": headers}
+        try:
+            record.update(future.result())
+            record["status"] = "done"
+        except Exception as e:
+            print(f"Game analysis error ({job_id} #{index}): {e}")
+            record["status"] = "failed"
+            record["error"] = "Analysis failed"
+        self._results.put((job_id, index, record))
+
+    def _start(self):
+        # Started lazily from the first upload so each gunicorn worker gets its own thread after fork
+        with self._lock:
+            if self._writer is not None:
+                return
+            self._writer = threading.Thread(target=self._run, name="analysis-writer", daemon=True)
+            self._writer.start()
+
+    def _run(self):
+        while True:
+            items = [self._results.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(items) < self.flush_games:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._results.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.flush(items)
+
+    def flush(self, items):
+        progress = {}
+        for job_id, _, record in items:
+            counts = progress.setdefault(job_id, {"done": 0, "failed": 0})
+            counts["done" if record["status"] == "done" else "failed"] += 1
+        with self._lock:
+            for job_id, counts in progress.items():
+                total, finished = self._jobs.get(job_id, [0, 0])
+                finished += counts["done"] + counts["failed"]
+                counts["status"] = "done" if finished >= total else "running"
+        try:
+            self.store.write(items, progress)
+        except Exception as e:
+            print(f"Analysis write error: {e}")
+            # Keep the results and retry them with the next flush
+            time.sleep(self.flush_interval)
+            for item in items:
+                self._results.put(item)
+            return
+        with self._lock:
+            for job_id, counts in progress.items():
+                if counts["status"] == "done":
+                    self._jobs.pop(job_id, None)
+                elif job_id in self._jobs:
+                    self._jobs[job_id][1] += counts["done"] + counts["failed"]
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def job_progress(job):
+    """The polling view of a job document"""
+    total = job.get("total", 0)
+    finished = job.get("done", 0) + job.get("failed", 0)
+    return {
+        "id": job["id"],
+        "status": job.get("status"),
+        "total": total,
+        "done": job.get("done", 0),
+        "failed": job.get("failed", 0),
+        "progress": round(finished / total, 3) if total else 1.0,
+        "error": job.get("error"),
+        "created_at": job.get("created_at"),
+        "updated_at": job.get("updated_at"),
+    }
+
+
+def init_analysis_queue(app):
+    app.extensions["analysis_queue"] = AnalysisQueue(
+        FirestoreAnalysisStore(),
+        workers=app.config.get("ANALYSIS_WORKERS", 1),
+        depth=app.config.get("ANALYSIS_DEPTH", 4),
+        time_ms=app.config.get("ANALYSIS_MOVE_MS", 500),
+        flush_games=app.config.get("ANALYSIS_FLUSH_GAMES", 10),
+        flush_interval=app.config.get("ANALYSIS_FLUSH_INTERVAL", 2.0),
+    )
@@ -0,0 +1,162 @@
+"""
+Chat Intent Analytics
+
+Counts which chat intents are hit and keeps a small sample of messages that
+fell through to the fallback. Everything is aggregated in this worker's memory
+and written out by a background thread in one batch per interval, so the
+chat request path only pays for a dict increment under a lock. Whatever is
+still pending when the worker shuts down is flushed from an atexit hook.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+
+
+class ChatAnalytics:
+    def __init__(self, sink, flush_interval=300, sample_size=50):
+        self.sink = sink
+        self.flush_interval = flush_interval
+        self._counts = Counter()
+        self._unmatched = deque(maxlen=sample_size)
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def record(self, intent, message=None):
+        with self._lock:
+            self._counts[intent] += 1
+            if message is not None:
+                self._unmatched.append(message[:300])
+        if self._thread is None:
+            self._start()
+
+    def pending(self):
+        """Counts not yet flushed (for the admin panel)"""
+        with self._lock:
+            return dict(self._counts), list(self._unmatched)
+
+    def flush(self):
+        with self._lock:
+            counts, unmatched = self._counts, list(self._unmatched)
+            self._counts = Counter()
+            self._unmatched.clear()
+        if not counts and not unmatched:
+            return
+        try:
+            self.sink(dict(counts), unmatched)
+        except Exception as e:
+            print(f"Chat analytics flush error: {e}")
+            # Put the numbers back so the next flush retries them
+            with self._lock:
+                self._counts.update(counts)
+
+    def _start(self):
+        # Started lazily from the first request so each gunicorn worker gets its own thread after fork
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="chat-analytics", daemon=True)
+            self._thread.start()
+        # The daemon thread dies with the worker; write out the last interval's counts
+        atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+
+def firestore_sink(counts, unmatched):
+    """One batched commit per flush: day totals via Increment plus one sample doc"""
+    from firebase_admin import firestore
+    from app.utils.firebase_init import db
+
+    now = datetime.now(timezone.utc)
+    day_ref = db.collection("chat_analytics").document(now.strftime("%Y-%m-%d"))
+
+    batch = db.batch()
+    update = {f"counts.{intent}": firestore.Increment(n) for intent, n in counts.items()}
+    update["date"] = now.strftime("%Y-%m-%d")
+    update["updated_at"] = now
+    batch.set(day_ref, update, merge=True)
+    if unmatched:
+        batch.set(day_ref.collection("unmatched").document(), {
+            "messages": unmatched,
+            "created_at": now,
+        })
+    batch.commit()
+
+
+def local_sink(path):
+    """Append flushes as JSON lines to a local file (no Firestore)"""
+    def sink(counts, unmatched):
+        record = {
+            "ts": datetime.now(timezone.utc).isoformat(),
+            "counts": counts,
+            "unmatched": unmatched,
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return sink
+
+
+def load_summary(config, days=14):
+    """
+    Totals per intent over the last `days` days plus recent unmatched messages,
+    read from whichever backend the flushes go to.
+    """
+    totals = Counter()
+    unmatched = []
+
+    if config.get("CHAT_ANALYTICS_BACKEND", "firestore") == "local":
+        path = config.get("CHAT_ANALYTICS_PATH", "chat_analytics.jsonl")
+        if os.path.exists(path):
+            cutoff = time.time() - days * 86400
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    record = json.loads(line)
+                    if datetime.fromisoformat(record["ts"]).timestamp() < cutoff:
+                        continue
+                    totals.update(record["counts"])
+                    unmatched.extend(record["unmatched"])
+        return dict(totals), unmatched[-50:][::-1]
+
+    from firebase_admin import firestore
+    from app.utils.firebase_init import db
+
+    day_docs = list(
+        db.collection("chat_analytics")
+        .order_by("date", direction=firestore.Query.DESCENDING)
+        .limit(days)
+        .stream()
+    )
+    for doc in day_docs:
+        totals.update(doc.to_dict().get("counts", {}))
+    if day_docs:
+        samples = (
+            day_docs[0].reference.collection("unmatched")
+            .order_by("created_at", direction=firestore.Query.DESCENDING)
+            .limit(5)
+            .stream()
+        )
+        for doc in samples:
+            unmatched.extend(reversed(doc.to_dict().get("messages", [])))
+    return dict(totals), unmatched[:50]
+
+
+def init_chat_analytics(app):
+    backend = app.config.get("CHAT_ANALYTICS_BACKEND", "firestore")
+    if backend == "local":
+        sink = local_sink(app.config.get("CHAT_ANALYTICS_PATH", "chat_analytics.jsonl"))
+    elif backend == "firestore":
+        sink = firestore_sink
+    else:
+        raise ValueError(f"Unknown CHAT_ANALYTICS_BACKEND: {backend}")
+    app.extensions["chat_analytics"] = ChatAnalytics(
+        sink,
+        flush_interval=app.config.get("CHAT_ANALYTICS_FLUSH_INTERVAL", 300),
+    )
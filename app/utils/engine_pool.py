@@ -0,0 +1,86 @@
+"""
+Chess Engine Process Pool
+
+Engine searches are pure CPU work, so they run in separate processes and a
+long think never holds the GIL in the worker that serves the rest of the
+site. Each pool process keeps its own Searcher (and transposition table)
+across requests. The pool is created on first use, after gunicorn has forked.
+
+search() waits for the result on the request's thread, which sleeps while
+the other gthread threads go on serving the site. The number of searches
+queued or running is bounded (`max_pending`, workers x ENGINE_QUEUE_PER_WORKER):
+beyond it search() raises EngineBusy at once, so a burst of level-5 requests
+can tie up at most that many request threads, each for a few seconds.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.chess.search import search_fen
+
+
+class EngineBusy(Exception):
+    """Every engine slot is taken; the caller should answer 503 and let the client retry"""
+
+
+class EnginePool:
+    def __init__(self, workers=2, max_pending=8):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor = None
+        self._lock = threading.Lock()
+        self._pending_lock = threading.Lock()
+
+    def _pool(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # spawn, not fork: forking a threaded web worker can copy held locks
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=multiprocessing.get_context("spawn"),
+                    )
+        return self._executor
+
+    def _done(self, future):
+        with self._pending_lock:
+            self.pending -= 1
+
+    def search(self, fen, max_depth, time_ms, moves=()):
+        """
+        Search the position after the UCI `moves` from `fen` in the pool and
+        wait for it (with slack for queueing and start-up). Raises EngineBusy
+        when `max_pending` searches are already queued or running.
+        """
+        with self._pending_lock:
+            if self.pending >= self.max_pending:
+                raise EngineBusy()
+            self.pending += 1
+        try:
+            future = self._pool().submit(search_fen, fen, max_depth, time_ms, list(moves))
+        except BaseException:
+            self._done(None)
+            raise
+        # Counted until the search really ends, even if this request stops waiting
+        future.add_done_callback(self._done)
+        try:
+            return future.result(timeout=time_ms / 1000.0 + 30)
+        except BrokenProcessPool:
+            # A crashed child poisons the whole executor; start a fresh one next time
+            self.shutdown()
+            raise
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def init_engine_pool(app):
+    workers = app.config.get("ENGINE_WORKERS", 2)
+    app.extensions["engine_pool"] = EnginePool(
+        workers=workers,
+        max_pending=workers * app.config.get("ENGINE_QUEUE_PER_WORKER", 4),
+    )
@@ -0,0 +1,126 @@
+"""
+BM25 retrieval index for the chat FAQ fallback
+"""
+import re
+import numpy as np
+
+STOPWORDS = frozenset("""
+a an the is are was were be been am i me my we our you your yours he she it they them
+this that these those of in on at to for from by with about as and or but if so do does
+did can could would should will shall may might must what which who whom whose when where
+why how please tell know want need any some there here have has had get got just also
+hai hain ka ki ke ko kya kaise kaisa kab kaun mujhe mera meri hum aap ap tum
+bhi se me mein par pe na nahi ho hota hoti kar karo karna bata batao batana
+""".split())
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def stem(word):
+    """Very small suffix stripper so 'classes'/'class' and 'fees'/'fee' collide"""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith("es") and word[-3] in "sxz":
+        return word[:-2]
+    if len(word) > 4 and word.endswith(("ches", "shes")):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def tokenize(text):
+    """Lowercase, split on non-alphanumerics, drop stopwords and stem"""
+    return [stem(tok) for tok in TOKEN_RE.findall(text.lower()) if tok not in STOPWORDS]
+
+
+class FAQIndex:
+    """
+    Okapi BM25 over FAQ questions.
+
+    `entries` is a list of (questions, answer) pairs; every question phrasing is
+    indexed as its own document and maps back to the entry's answer. Term
+    weights are precomputed into a column-compressed postings layout so a query
+    is a handful of array slices plus one np.bincount.
+    """
+
+    def __init__(self, entries, k1=1.2, b=0.75, min_score=0.5):
+        self.answers = [answer for _, answer in entries]
+        self.min_score = min_score
+        self.vocab = {}
+
+        doc_terms = []
+        doc_entry = []
+        for entry_idx, (questions, _) in enumerate(entries):
+            for question in questions:
+                terms = tokenize(question)
+                if not terms:
+                    continue
+                doc_terms.append([self.vocab.setdefault(t, len(self.vocab)) for t in terms])
+                doc_entry.append(entry_idx)
+
+        self.n_docs = len(doc_terms)
+        self.doc_entry = np.asarray(doc_entry, dtype=np.int32)
+
+        if not self.n_docs:
+            self.indptr = np.zeros(1, dtype=np.int64)
+            self.postings_doc = np.zeros(0, dtype=np.int32)
+            self.postings_weight = np.zeros(0, dtype=np.float32)
+            self.doc_norm = np.zeros(0, dtype=np.float32)
+            return
+
+        # (term, doc, tf) triplets
+        term_ids, doc_ids, tfs = [], [], []
+        for doc_idx, terms in enumerate(doc_terms):
+            uniq, counts = np.unique(np.asarray(terms, dtype=np.int32), return_counts=True)
+            term_ids.append(uniq)
+            doc_ids.append(np.full(len(uniq), doc_idx, dtype=np.int32))
+            tfs.append(counts)
+        term_ids = np.concatenate(term_ids)
+        doc_ids = np.concatenate(doc_ids)
+        tfs = np.concatenate(tfs).astype(np.float32)
+
+        doc_len = np.asarray([len(t) for t in doc_terms], dtype=np.float32)
+        avgdl = doc_len.mean()
+        df = np.bincount(term_ids, minlength=len(self.vocab)).astype(np.float32)
+        idf = np.log1p((self.n_docs - df + 0.5) / (df + 0.5))
+
+        norm = k1 * (1.0 - b + b * doc_len[doc_ids] / avgdl)
+        weights = idf[term_ids] * tfs * (k1 + 1.0) / (tfs + norm)
+
+        order = np.argsort(term_ids, kind="stable")
+        self.postings_doc = doc_ids[order]
+        self.postings_weight = weights[order].astype(np.float32)
+        self.indptr = np.zeros(len(self.vocab) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(term_ids, minlength=len(self.vocab)), out=self.indptr[1:])
+
+        # Score of each document against itself, used to normalise matches to 0..1
+        self.doc_norm = np.bincount(doc_ids, weights=weights, minlength=self.n_docs).astype(np.float32)
+
+    def raw_scores(self, text):
+        """Return plain BM25 scores for every indexed question"""
+        term_ids = {self.vocab[t] for t in tokenize(text) if t in self.vocab}
+        if not term_ids:
+            return np.zeros(self.n_docs, dtype=np.float32)
+        slices = [slice(self.indptr[t], self.indptr[t + 1]) for t in term_ids]
+        docs = np.concatenate([self.postings_doc[s] for s in slices])
+        weights = np.concatenate([self.postings_weight[s] for s in slices])
+        return np.bincount(docs, weights=weights, minlength=self.n_docs)
+
+    def scores(self, text):
+        """Return normalised BM25 scores for every indexed question"""
+        return self.raw_scores(text) / self.doc_norm
+
+    def best_answer(self, text):
+        """Return the answer of the best matching entry, or None below threshold"""
+        if not self.n_docs:
+            return None
+        raw = self.raw_scores(text)
+        scores = raw / self.doc_norm
+        # A short question like "where is the academy" is fully covered by any message
+        # containing its one term; among equal scores prefer the one sharing more of the message
+        tied = np.flatnonzero(scores >= scores.max() - 1e-6)
+        best = int(tied[np.argmax(raw[tied])])
+        if scores[best] < self.min_score:
+            return None
+        return self.answers[self.doc_entry[best]]
@@ -1,7 +1,10 @@
 """
 Helper Utility Functions
 """
-from datetime import datetime, timezone
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone, timedelta
 from flask import request
 from firebase_admin import auth
 from dateutil import parser as dateparser
@@ -74,7 +77,6 @@ def coerce_dt(value):
 def cleanup_old_payments():
     """Delete payment docs older than 1 year (no storage operations)."""
     try:
-        from datetime import timedelta
         one_year_ago = now_utc() - timedelta(days=365)
         old_payments = (
             db.collection("payments")
@@ -94,6 +96,53 @@ def cleanup_old_payments():
         print(f"cleanup error: {e}")
 
 
+def client_key(user_agent=True):
+    """
+    Stable per-client key derived from IP (+ User-Agent).
+    The IP is request.remote_addr, which ProxyFix sets from the proxy-appended
+    X-Forwarded-For entry (PROXY_HOPS), so a forged header cannot change it.
+    Rate limits pass user_agent=False since that header is just as easy to vary.
+    Uses sha1 rather than hash() so every worker process derives the same key.
+    """
+    ip = request.remote_addr
+    agent = request.headers.get('User-Agent', 'unknown') if user_agent else ''
+    return hashlib.sha1(f"{ip}_{agent}".encode("utf-8")).hexdigest()[:16]
+
+
+_cleanup_lock = threading.Lock()
+_next_cleanup = 0.0
+
+
+def cleanup_stale_chat_sessions(max_age_seconds=300, min_interval=3600):
+    """
+    Delete leftover chat_sessions docs (guest_<hash> etc.) older than max_age.
+    Chat state now lives in the session store, so anything here is stale.
+    Queries Firestore at most once per `min_interval` seconds per process;
+    calls in between return 0 straight away.
+    """
+    global _next_cleanup
+    now = time.monotonic()
+    with _cleanup_lock:
+        if now < _next_cleanup:
+            return 0
+        _next_cleanup = now + min_interval
+    try:
+        cutoff = datetime.now() - timedelta(seconds=max_age_seconds)
+        stale = db.collection("chat_sessions").where("timestamp", "<", cutoff).limit(500).stream()
+        batch = db.batch()
+        deleted = 0
+        for doc in stale:
+            batch.delete(doc.reference)
+            deleted += 1
+        if deleted:
+            batch.commit()
+            print(f"[cleanup] Deleted {deleted} stale chat session docs")
+        return deleted
+    except Exception as e:
+        print(f"chat session cleanup error: {e}")
+        return 0
+
+
 def calculate_fee_status(student_id, current_time):
     """
     Finds the latest 'expires_at' date among all verified payments.
@@ -0,0 +1,88 @@
+"""
+Lesson Bundle Cache
+
+Holds the whole `lessons` collection as one pre-serialised JSON body with a
+strong ETag, so /learn/lessons.json costs no Firestore reads per visitor.
+After LESSONS_CACHE_TTL the cache reads one manifest doc (meta/lessons) and
+only reloads the collection when its `version` has changed.
+"""
+import hashlib
+import json
+import threading
+import time
+
+
+def normalize_lesson(data):
+    """Firestore lesson doc -> the shape the Learn board consumes"""
+    from app.routes.learn import moves_for_position, position_key
+
+    lesson = dict(data)
+    lesson["correctMoves"] = [[m.get("from"), m.get("to")] for m in data.get("correctMoves") or []]
+    lesson.setdefault("pieces", {})
+    if not lesson.get("legalMoves") and lesson.get("fen"):
+        try:
+            lesson["legalMoves"] = moves_for_position(position_key(lesson["fen"]))["moves"]
+        except ValueError:
+            lesson["legalMoves"] = None
+    return lesson
+
+
+class LessonBundle:
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self.lessons = []
+        self.body = None
+        self.etag = None
+        self.version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Current bundle, refreshing it first if the TTL has run out"""
+        if self.body is None or time.monotonic() - self._checked_at > self.ttl:
+            with self._lock:
+                if self.body is None or time.monotonic() - self._checked_at > self.ttl:
+                    self._refresh()
+        return self
+
+    def invalidate(self):
+        with self._lock:
+            self._checked_at = 0.0
+            self.version = None
+
+    def _refresh(self):
+        from app.utils.firebase_init import db
+
+        try:
+            manifest = db.collection("meta").document("lessons").get()
+            version = manifest.to_dict().get("version") if manifest.exists else None
+            if self.body is not None and version is not None and version == self.version:
+                self._checked_at = time.monotonic()
+                return
+
+            docs = db.collection("lessons").order_by("id").stream()
+            lessons = [normalize_lesson(doc.to_dict()) for doc in docs]
+        except Exception as e:
+            if self.body is None:
+                raise
+            # Keep serving what we have; try again after another TTL
+            print(f"Lesson bundle refresh error: {e}")
+            self._checked_at = time.monotonic()
+            return
+
+        body = json.dumps({"lessons": lessons}, ensure_ascii=False, separators=(",", ":"), default=str)
+        self.lessons = lessons
+        self.body = body.encode("utf-8")
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+        self.version = version
+        self._checked_at = time.monotonic()
+        print(f"Lesson bundle loaded: {len(lessons)} lessons (etag {self.etag})")
+
+
+def get_lesson_bundle():
+    from flask import current_app
+    return current_app.extensions["lesson_bundle"].get()
+
+
+def init_lesson_bundle(app):
+    app.extensions["lesson_bundle"] = LessonBundle(ttl=app.config.get("LESSONS_CACHE_TTL", 300))
@@ -0,0 +1,444 @@
+"""
+Online Games
+
+Two students playing each other in the browser. Moves arrive as POSTs and go
+out to both players (and any spectators) as Server-Sent Events (app/utils/
+sse.py). The flow needs no WebSocket server; the app has none.
+
+The authoritative state of every game lives in this process's memory. That
+covers the board, the clocks and the move list. A move is checked against
+the legal moves, applied, timed and broadcast without touching Firestore,
+so a move's round trip is the network plus microseconds of work. This needs
+a single threaded worker process (see render.yaml): every open event stream
+holds a thread, and another process would not see the game.
+
+Finished games go on a queue. A writer thread commits them in batches to
+`online_games`, in the compact binary format (app/chess/gamecodec.py) with
+clock times, and whatever is still queued when the process exits is written
+from an atexit hook. Results between students are recorded for rating
+(app/utils/ratings.py) in the same batch, under the id "online-<game id>",
+so a retried batch overwrites them instead of counting them twice.
+
+    online_games/{id}   white, black (uids), white_name, black_name, result, termination,
+                        time_control, rated, plies, game (gamecodec bytes), started_at, finished_at
+
+Events on a game's stream:
+
+    snapshot  the whole game (on connect)
+    start     the challenge was accepted
+    move      {ply, uci, san, fen, clock: {white, black} ms left}
+    draw      {offered_by: "white" | "black"}
+    end       {result, termination}
+"""
+import atexit
+import queue
+import secrets
+import threading
+import time
+from collections import Counter
+
+from app.chess import Board, move_to_uci, PAWN, KNIGHT, BISHOP, ROOK, QUEEN
+from app.chess.gamecodec import encode_game
+from app.utils.helpers import now_utc
+from app.utils.sse import EventLog, format_event, sse_stream
+
+COLOURS = ("white", "black")
+
+
+def insufficient_material(board, colour=None):
+    """
+    True if `colour` (or, with None, neither side) cannot possibly mate:
+    a bare king, or a king and one minor piece
+    """
+    sides = (0, 1) if colour is None else (colour,)
+    for side in sides:
+        if any(board.bb[side * 6 + piece] for piece in (PAWN, ROOK, QUEEN)):
+            return False
+        minors = bin(board.bb[side * 6 + KNIGHT]).count("1") + bin(board.bb[side * 6 + BISHOP]).count("1")
+        if minors > 1:
+            return False
+    return True
+
+
+class OnlineGame:
+    def __init__(self, id, challenger, colour, opponent_uid, minutes, increment, backlog=200):
+        self.id = id
+        self.players = [None, None]          # {"uid", "name", "rating"} by colour
+        self.players[colour] = challenger
+        self.opponent_uid = opponent_uid     # None: an open challenge anyone can accept
+        self.minutes = minutes
+        self.increment = increment
+        self.board = Board()
+        self.moves = []                      # 16-bit moves
+        self.clocks = []                     # tenths of a second left after each move
+        self.remaining = [minutes * 60000, minutes * 60000]     # ms
+        self.turn_started = None             # time.monotonic() the side to move started thinking
+        self.positions = Counter([self.board.hash])
+        self.draw_offer = None               # colour that offered
+        self.status = "pending"
+        self.result = None
+        self.termination = None
+        self.created = time.monotonic()
+        self.finished = None
+        self.started_at = None
+        self.finished_at = None
+        self.on_finish = None
+        self.log = EventLog(backlog)
+        self.lock = threading.Lock()
+
+    @property
+    def time_control(self):
+        return f"{self.minutes * 60}+{self.increment}"
+
+    def colour_of(self, uid):
+        for colour, player in enumerate(self.players):
+            if player and player["uid"] == uid:
+                return colour
+        return None
+
+    def _clock_view(self, now=None):
+        """ms left per side, counting the running clock down to `now`"""
+        left = list(self.remaining)
+        if self.status == "active" and self.turn_started is not None:
+            left[self.board.turn] -= int(((now or time.monotonic()) - self.turn_started) * 1000)
+        return {"white": max(left[0], 0), "black": max(left[1], 0)}
+
+    def state(self):
+        """The whole game as the snapshot event and GET endpoint show it (lock held)"""
+        return {
+            "id": self.id,
+            "status": self.status,
+            "white": self.players[0],
+            "black": self.players[1],
+            "time_control": self.time_control,
+            "moves": [move_to_uci(m) for m in self.moves],
+            "fen": self.board.fen(),
+            "turn": COLOURS[self.board.turn],
+            "clock": self._clock_view(),
+            "draw_offer": COLOURS[self.draw_offer] if self.draw_offer is not None else None,
+            "result": self.result,
+            "termination": self.termination,
+        }
+
+    def snapshot(self):
+        with self.lock:
+            return self.log.seq, format_event(self.log.event_id(self.log.seq), "snapshot", self.state())
+
+    def stream(self, last_event_id=None, heartbeat=5.0, lifetime=1800.0):
+        return sse_stream(self.log, last_event_id, self.snapshot, heartbeat, lifetime,
+                          on_heartbeat=self.check_clock)
+
+    # ---------------- ACTIONS ----------------
+    # Each takes the lock, validates, changes state and publishes while
+    # still holding it, so every viewer sees events in the order applied.
+    # They raise ValueError with a message for the player.
+
+    def accept(self, player):
+        with self.lock:
+            if self.status != "pending":
+                raise ValueError("This challenge is no longer open")
+            if self.opponent_uid not in (None, player["uid"]) or self.colour_of(player["uid"]) is not None:
+                raise ValueError("This challenge is not for you")
+            self.players[self.players.index(None)] = player
+            self.status = "active"
+            self.started_at = now_utc()
+            self.turn_started = time.monotonic()
+            self.log.publish([("start", {"white": self.players[0], "black": self.players[1],
+                                         "clock": self._clock_view()})])
+
+    def play(self, uid, uci, ply=None):
+        """
+        Play a move for `uid`. `ply` is the number of moves the player has
+        seen, so a retried POST cannot play a move twice.
+        """
+        with self.lock:
+            colour = self.colour_of(uid)
+            if colour is None:
+                raise ValueError("You are not playing in this game")
+            if self.status != "active":
+                raise ValueError("The game is not in progress")
+            if ply is not None and ply != len(self.moves):
+                raise ValueError("Out of sync with the game; reload it")
+            if colour != self.board.turn:
+                raise ValueError("It is not your turn")
+            now = time.monotonic()
+            if self._flagged(now):
+                raise ValueError("Your time has run out")
+            try:
+                move = self.board.parse_uci(str(uci).strip().lower())
+            except ValueError:
+                raise ValueError("Illegal move")
+
+            self.remaining[colour] -= int((now - self.turn_started) * 1000)
+            self.remaining[colour] += self.increment * 1000
+            self.turn_started = now
+            san = self.board.san(move)
+            self.board.push(move)
+            self.moves.append(move)
+            self.clocks.append(self.remaining[colour] // 100)
+            self.positions[self.board.hash] += 1
+            if self.draw_offer is not None and self.draw_offer != colour:
+                self.draw_offer = None       # moving instead of accepting declines it
+            self.log.publish([("move", {
+                "ply": len(self.moves),
+                "uci": move_to_uci(move),
+                "san": san,
+                "fen": self.board.fen(),
+                "clock": self._clock_view(now),
+            })])
+            self._check_end()
+            return self.state()
+
+    def resign(self, uid):
+        with self.lock:
+            colour = self._player_in_game(uid)
+            self._finish("0-1" if colour == 0 else "1-0", "resignation")
+
+    def offer_draw(self, uid):
+        """Offer a draw, or accept the opponent's offer"""
+        with self.lock:
+            colour = self._player_in_game(uid)
+            if self.draw_offer is not None and self.draw_offer != colour:
+                self._finish("1/2-1/2", "agreement")
+            elif self.draw_offer is None:
+                self.draw_offer = colour
+                self.log.publish([("draw", {"offered_by": COLOURS[colour]})])
+
+    def check_clock(self):
+        """End the game if the side to move has run out of time"""
+        with self.lock:
+            if self.status == "active":
+                self._flagged(time.monotonic())
+
+    # ---------------- INTERNAL (lock held) ----------------
+
+    def _player_in_game(self, uid):
+        colour = self.colour_of(uid)
+        if colour is None:
+            raise ValueError("You are not playing in this game")
+        if self.status != "active":
+            raise ValueError("The game is not in progress")
+        return colour
+
+    def _flagged(self, now):
+        side = self.board.turn
+        if self.remaining[side] - (now - self.turn_started) * 1000 > 0:
+            return False
+        self.remaining[side] = 0
+        # Losing on time to a side that cannot mate is a draw
+        if insufficient_material(self.board, 1 - side):
+            self._finish("1/2-1/2", "timeout vs insufficient material")
+        else:
+            self._finish("0-1" if side == 0 else "1-0", "timeout")
+        return True
+
+    def _check_end(self):
+        board = self.board
+        if not board.legal_moves():
+            if board.is_check():
+                self._finish("1-0" if board.turn == 1 else "0-1", "checkmate")
+            else:
+                self._finish("1/2-1/2", "stalemate")
+        elif self.positions[board.hash] >= 3:
+            self._finish("1/2-1/2", "threefold repetition")
+        elif board.halfmove >= 100:
+            self._finish("1/2-1/2", "fifty-move rule")
+        elif insufficient_material(board):
+            self._finish("1/2-1/2", "insufficient material")
+
+    def _finish(self, result, termination):
+        self.status = "finished"
+        self.result = result
+        self.termination = termination
+        self.finished = time.monotonic()
+        self.finished_at = now_utc()
+        self.draw_offer = None
+        self.log.publish([("end", {"result": result, "termination": termination,
+                                   "clock": self._clock_view()})])
+        if self.on_finish:
+            self.on_finish(self)
+
+    def record(self):
+        """Firestore document for the finished game"""
+        white, black = self.players
+        # Names come from user documents and are not guaranteed to be strings
+        white_name, black_name = str(white["name"] or "?"), str(black["name"] or "?")
+        headers = {
+            "Event": "Online game",
+            "Date": self.started_at.strftime("%Y.%m.%d"),
+            "White": white_name,
+            "Black": black_name,
+            "Result": self.result,
+            "TimeControl": self.time_control,
+            "Termination": self.termination,
+        }
+        return {
+            "white": white["uid"],
+            "black": black["uid"],
+            "white_name": white_name,
+            "black_name": black_name,
+            "result": self.result,
+            "termination": self.termination,
+            "time_control": self.time_control,
+            "rated": bool(self.moves),
+            "plies": len(self.moves),
+            "game": encode_game(headers, self.moves, self.clocks),
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class FirestoreGameStore:
+    """Finished games in Firestore, plus their results for the rating system"""
+
+    def __init__(self, rating_days=7):
+        self.rating_days = rating_days
+
+    def write(self, records):
+        """One batched commit of (game, document) pairs and their results"""
+        from app.utils.firebase_init import db
+        from app.utils.ratings import result_writes
+
+        collection = db.collection("online_games")
+        batch = db.batch()
+        for game, doc in records:
+            batch.set(collection.document(game.id), doc)
+            # A game resigned or agreed drawn before the first move is kept but not rated
+            if not game.moves:
+                continue
+            result = {"id": f"online-{game.id}", "white": game.players[0]["uid"],
+                      "black": game.players[1]["uid"], "result": game.result, "played_at": game.finished_at}
+            try:
+                for _, ref, data in result_writes([result], self.rating_days, source="online"):
+                    batch.set(ref, data)
+            except ValueError as e:
+                # Retrying cannot fix a rejected result; the game itself is still saved
+                print(f"Online game {game.id} result not recorded: {e}")
+        batch.commit()
+
+
+class GameHub:
+    """
+    Every open challenge and game in this process, and the writer thread
+    that persists finished games and retires old ones
+    """
+
+    def __init__(self, store, backlog=200, flush_games=20, flush_interval=5.0,
+                 challenge_ttl=600.0, keep_finished=300.0):
+        self.store = store
+        self.backlog = backlog
+        self.flush_games = flush_games
+        self.flush_interval = flush_interval
+        self.challenge_ttl = challenge_ttl
+        self.keep_finished = keep_finished
+        self._games = {}
+        self._lock = threading.Lock()
+        self._finished = queue.Queue()
+        self._writer = None
+
+    def create(self, challenger, opponent_uid=None, colour=None, minutes=10, increment=5):
+        """A new challenge from `challenger` ({"uid", "name", "rating"}); colour 0/1 or None for random"""
+        if colour is None:
+            colour = secrets.randbelow(2)
+        game = OnlineGame(secrets.token_hex(6), challenger, colour, opponent_uid, minutes, increment, self.backlog)
+        game.on_finish = self._finished.put
+        with self._lock:
+            self._games[game.id] = game
+        self._start()
+        return game
+
+    def get(self, game_id):
+        with self._lock:
+            return self._games.get(game_id)
+
+    def challenges_for(self, uid):
+        """Pending challenges `uid` could accept: addressed to them, or open to all"""
+        with self._lock:
+            games = list(self._games.values())
+        return [
+            {"id": g.id, "challenger": next(p for p in g.players if p), "time_control": g.time_control,
+             "open": g.opponent_uid is None}
+            for g in games
+            if g.status == "pending" and g.opponent_uid in (None, uid) and g.colour_of(uid) is None
+        ]
+
+    def _start(self):
+        # Started lazily from the first challenge so each gunicorn worker gets its own thread after fork
+        with self._lock:
+            if self._writer is not None:
+                return
+            self._writer = threading.Thread(target=self._run, name="online-games-writer", daemon=True)
+            self._writer.start()
+        # The daemon thread dies with the worker; write out the games that just ended
+        atexit.register(self.drain)
+
+    def _run(self):
+        while True:
+            try:
+                items = [self._finished.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                self.sweep()
+                continue
+            deadline = time.monotonic() + self.flush_interval
+            while len(items) < self.flush_games:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._finished.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.flush(items)
+            self.sweep()
+
+    def flush(self, games):
+        records = []
+        for game in games:
+            try:
+                records.append((game, game.record()))
+            except Exception as e:
+                # A game that cannot be encoded never will be; don't let it hold up the others
+                print(f"Online game {game.id} dropped, could not be encoded: {e}")
+        if not records:
+            return
+        try:
+            self.store.write(records)
+        except Exception as e:
+            print(f"Online game write error: {e}")
+            # Keep the games and retry them with the next flush
+            time.sleep(self.flush_interval)
+            for game, _ in records:
+                self._finished.put(game)
+
+    def drain(self):
+        """Write every finished game still waiting on the queue"""
+        games = []
+        while True:
+            try:
+                games.append(self._finished.get_nowait())
+            except queue.Empty:
+                break
+        for i in range(0, len(games), self.flush_games):
+            self.flush(games[i:i + self.flush_games])
+
+    def sweep(self):
+        """Flag players whose time ran out unwatched, expire challenges, forget old games"""
+        now = time.monotonic()
+        with self._lock:
+            games = list(self._games.items())
+        for game_id, game in games:
+            game.check_clock()
+            stale = (game.status == "pending" and now - game.created > self.challenge_ttl) or \
+                (game.status == "finished" and now - game.finished > self.keep_finished)
+            if stale:
+                with self._lock:
+                    self._games.pop(game_id, None)
+
+
+def init_online_games(app):
+    app.extensions["online_games"] = GameHub(
+        FirestoreGameStore(rating_days=app.config.get("RATING_PERIOD_DAYS", 7)),
+        flush_games=app.config.get("ONLINE_FLUSH_GAMES", 20),
+        flush_interval=app.config.get("ONLINE_FLUSH_INTERVAL", 5.0),
+        challenge_ttl=app.config.get("ONLINE_CHALLENGE_SECONDS", 600.0),
+    )
@@ -0,0 +1,116 @@
+"""
+Per-client Rate Limiting for Public Endpoints
+"""
+import threading
+import time
+from functools import wraps
+from flask import current_app, jsonify, request
+from app.utils.helpers import client_key
+
+
+class MemoryRateLimiter:
+    """Token bucket per (route, client) kept in this worker's memory"""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + 3600
+
+    def hit(self, key, limit, period):
+        """Consume one token; returns (allowed, retry_after_seconds)"""
+        now = time.monotonic()
+        rate = limit / period
+        with self._lock:
+            tokens, last = self._buckets.get(key, (limit, now))
+            tokens = min(limit, tokens + (now - last) * rate)
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                allowed, retry_after = True, 0
+            else:
+                self._buckets[key] = (tokens, now)
+                allowed, retry_after = False, int((1 - tokens) / rate) + 1
+            if now >= self._next_sweep:
+                self._sweep(now)
+        return allowed, retry_after
+
+    def _sweep(self, now):
+        """Forget buckets idle for over an hour; they would be full again anyway (lock held)"""
+        idle = [k for k, (_, last) in self._buckets.items() if now - last > 3600]
+        for k in idle:
+            del self._buckets[k]
+        self._next_sweep = now + 3600
+
+
+class RedisRateLimiter:
+    """Sliding-window counter shared by all workers (approximated from two fixed windows)"""
+
+    def __init__(self, url, prefix="ratelimit:"):
+        import redis  # optional dependency, only needed for this backend
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def hit(self, key, limit, period):
+        now = time.time()
+        window = int(now // period)
+        current_key = f"{self.prefix}{key}:{window}"
+        previous_key = f"{self.prefix}{key}:{window - 1}"
+
+        pipe = self._client.pipeline()
+        pipe.incr(current_key)
+        pipe.expire(current_key, period * 2)
+        pipe.get(previous_key)
+        current, _, previous = pipe.execute()
+
+        elapsed = (now % period) / period
+        estimated = int(previous or 0) * (1 - elapsed) + current
+        if estimated > limit:
+            return False, int(period - now % period) + 1
+        return True, 0
+
+
+def create_rate_limiter(config):
+    """Build the limiter selected by RATE_LIMIT_BACKEND ('memory' or 'redis')"""
+    backend = config.get("RATE_LIMIT_BACKEND", "memory")
+
+    if backend == "redis":
+        url = config.get("REDIS_URL")
+        if not url:
+            raise ValueError("RATE_LIMIT_BACKEND=redis requires REDIS_URL")
+        return RedisRateLimiter(url)
+    if backend != "memory":
+        raise ValueError(f"Unknown RATE_LIMIT_BACKEND: {backend}")
+    return MemoryRateLimiter()
+
+
+def init_rate_limiter(app):
+    app.extensions["rate_limiter"] = create_rate_limiter(app.config)
+
+
+def rate_limit(name, body=None):
+    """
+    Reject a client that exceeds RATE_LIMITS[name] with a 429.
+    Only POST requests count; the check runs before the view touches Firestore.
+    `body` is the JSON returned when limited, so each route keeps its own response shape.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            limit = current_app.config.get("RATE_LIMITS", {}).get(name)
+            if limit and request.method == "POST":
+                max_requests, period = limit
+                limiter = current_app.extensions["rate_limiter"]
+                try:
+                    allowed, retry_after = limiter.hit(f"{name}:{client_key(user_agent=False)}", max_requests, period)
+                except Exception as e:
+                    # Never take the endpoint down because the limiter backend is unreachable
+                    print(f"Rate limiter error: {e}")
+                    allowed, retry_after = True, 0
+                if not allowed:
+                    resp = jsonify(body or {"error": "Too many requests. Please try again later."})
+                    resp.status_code = 429
+                    resp.headers["Retry-After"] = str(retry_after)
+                    return resp
+            return f(*args, **kwargs)
+
+        return wrapper
+    return decorator
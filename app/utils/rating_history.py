@@ -0,0 +1,160 @@
+"""
+Rating History Store
+
+Every rated period appends a point to users/{uid}/rating_history (see
+app/utils/ratings.py). The same write also rolls the points up into compact
+documents that the profile chart reads instead:
+
+    users/{uid}/rating_buckets/{YYYY-MM}   month, day[], rating[], rd[], games[]
+    users/{uid}/rating_buckets/summary     months[], close[], low[], high[], games[]
+
+A chart of the last year reads at most 12 month buckets; anything longer is
+drawn from the summary's month-end ratings, a single read, however long the
+history. Either way the series is downsampled to the chart's resolution with
+largest-triangle-three-buckets, which keeps the peaks and dips a plain
+stride would drop.
+"""
+from app.utils.firebase_init import db
+from app.utils.helpers import now_utc
+
+SUMMARY = "summary"
+
+# Longest range served from month buckets; longer ranges use the summary
+BUCKET_MONTHS = 12
+
+RANGES = {"3m": 3, "6m": 6, "1y": 12, "3y": 36, "all": None}
+
+
+def month_key(date):
+    return date.strftime("%Y-%m")
+
+
+def first_month(months):
+    """Key of the earliest month in a window of the last `months` months, this one included"""
+    now = now_utc()
+    index = now.year * 12 + now.month - 1 - (months - 1)
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+
+def _buckets(uid):
+    return db.collection("users").document(uid).collection("rating_buckets")
+
+
+def _merge_month(bucket, points):
+    """Bucket dict with `points` (dicts with date, rating, rd, games) merged in by day"""
+    by_day = {}
+    if bucket:
+        for day, rating, rd, games in zip(bucket["day"], bucket["rating"], bucket["rd"], bucket["games"]):
+            by_day[day] = (rating, rd, games)
+    for point in points:
+        by_day[point["date"].day] = (point["rating"], point["rd"], point["games"])
+    days = sorted(by_day)
+    return {
+        "month": month_key(points[0]["date"]),
+        "day": days,
+        "rating": [by_day[d][0] for d in days],
+        "rd": [by_day[d][1] for d in days],
+        "games": [by_day[d][2] for d in days],
+    }
+
+
+def rollup_writes(uid, points, replace=False):
+    """
+    Batch writes (method, ref, data) that fold a student's new history points
+    into their month buckets and summary. Unless `replace` (a full recompute
+    that has already cleared the buckets), the touched buckets and the
+    summary are read first and merged.
+    """
+    collection = _buckets(uid)
+    by_month = {}
+    for point in points:
+        by_month.setdefault(month_key(point["date"]), []).append(point)
+
+    summary = {}
+    if not replace:
+        doc = collection.document(SUMMARY).get()
+        if doc.exists:
+            data = doc.to_dict()
+            for row in zip(data["months"], data["close"], data["low"], data["high"], data["games"]):
+                summary[row[0]] = row[1:]
+
+    writes = []
+    for month, month_points in sorted(by_month.items()):
+        existing = None
+        if not replace:
+            doc = collection.document(month).get()
+            existing = doc.to_dict() if doc.exists else None
+        bucket = _merge_month(existing, month_points)
+        bucket["updated_at"] = now_utc()
+        writes.append(("set", collection.document(month), bucket))
+        summary[month] = (bucket["rating"][-1], min(bucket["rating"]), max(bucket["rating"]), sum(bucket["games"]))
+
+    months = sorted(summary)
+    writes.append(("set", collection.document(SUMMARY), {
+        "months": months,
+        "close": [summary[m][0] for m in months],
+        "low": [summary[m][1] for m in months],
+        "high": [summary[m][2] for m in months],
+        "games": [summary[m][3] for m in months],
+        "updated_at": now_utc(),
+    }))
+    return writes
+
+
+def downsample(points, threshold):
+    """Largest-triangle-three-buckets: at most `threshold` points, first and last kept"""
+    threshold = max(threshold, 3)
+    if len(points) <= threshold:
+        return points
+    xs = list(range(len(points)))
+    ys = [p["rating"] for p in points]
+    sampled = [points[0]]
+    every = (len(points) - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        # Average of the next bucket is the third corner of the triangle
+        nxt_start, nxt_end = end, min(int((i + 2) * every) + 1, len(points))
+        avg_x = sum(xs[nxt_start:nxt_end]) / (nxt_end - nxt_start)
+        avg_y = sum(ys[nxt_start:nxt_end]) / (nxt_end - nxt_start)
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a]))
+            if area > best_area:
+                best, best_area = j, area
+        sampled.append(points[best])
+        a = best
+    sampled.append(points[-1])
+    return sampled
+
+
+def load_history(uid, months=BUCKET_MONTHS, resolution=60):
+    """
+    Chart points ({date, rating, rd?, games}) for the last `months` months
+    (None for everything), at most `resolution` of them. Returns (points, source)
+    where source says which documents were read.
+    """
+    collection = _buckets(uid)
+    if months is not None and months <= BUCKET_MONTHS:
+        start = first_month(months)
+        points = []
+        for doc in collection.where("month", ">=", start).stream():
+            bucket = doc.to_dict()
+            for day, rating, rd, games in zip(bucket["day"], bucket["rating"], bucket["rd"], bucket["games"]):
+                points.append({"date": f"{bucket['month']}-{day:02d}", "rating": rating, "rd": rd, "games": games})
+        points.sort(key=lambda p: p["date"])
+        return downsample(points, resolution), "months"
+
+    doc = collection.document(SUMMARY).get()
+    if not doc.exists:
+        return [], "summary"
+    data = doc.to_dict()
+    points = [
+        {"date": month, "rating": close, "low": low, "high": high, "games": games}
+        for month, close, low, high, games in zip(data["months"], data["close"], data["low"], data["high"], data["games"])
+    ]
+    if months is not None:
+        start = first_month(months)
+        points = [p for p in points if p["date"] >= start]
+    return downsample(points, resolution), "summary"
@@ -0,0 +1,267 @@
+"""
+Student Ratings
+
+Game and tournament results are stored one per document in `game_results`
+and rated with Glicko-2 (app/chess/glicko2.py) once their rating period has
+closed. Periods are RATING_PERIOD_DAYS long, counted from a fixed Monday, so
+every result belongs to exactly one period whenever it is recorded.
+
+    game_results/{id}                       white, black (uids), result, score (White's),
+                                            played_at, period, source, tournament_id
+    users/{uid}                             rating, rating_rd, rating_volatility, rating_games
+    users/{uid}/rating_history/{YYYY-MM-DD} one point per period played (period start date)
+    users/{uid}/rating_buckets/...          the same points rolled up by month (rating_history.py)
+    meta/ratings                            last_period: newest period already rated
+
+update_ratings() rates the periods closed since the last run, starting from
+the ratings stored on the users. recompute_ratings() replays every stored
+result from each student's seed rating and rewrites the whole history.
+A coach-entered `rating` on a student who has never been rated is used as
+their seed (kept in `rating_seed`). Results recorded late, for a period that
+has already been rated, only count after a recompute.
+"""
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from app.chess.glicko2 import Ratings, DEFAULT_RATING, DEFAULT_RD, DEFAULT_VOLATILITY
+from app.utils.firebase_init import db
+from app.utils.helpers import now_utc, coerce_dt
+from app.utils.rating_history import rollup_writes
+
+RESULT_SCORES = {"1-0": 1.0, "0-1": 0.0, "1/2-1/2": 0.5}
+
+# Monday 6 January 2020; period 0 starts here
+EPOCH = datetime(2020, 1, 6, tzinfo=timezone.utc)
+
+# Firestore allows 500 writes per batch
+BATCH_LIMIT = 400
+
+
+def period_of(when, days):
+    return (when - EPOCH).days // days
+
+
+def period_start(period, days):
+    return EPOCH + timedelta(days=period * days)
+
+
+def _commit(writes):
+    """Commit (method, ref, data) writes in as few batches as Firestore allows"""
+    for i in range(0, len(writes), BATCH_LIMIT):
+        batch = db.batch()
+        for method, ref, data in writes[i:i + BATCH_LIMIT]:
+            if method == "delete":
+                batch.delete(ref)
+            elif method == "merge":
+                batch.set(ref, data, merge=True)
+            else:
+                batch.set(ref, data)
+        batch.commit()
+
+
+def result_writes(results, days, source="game", tournament_id=None):
+    """
+    ("set", ref, doc) writes storing `results` (see record_results), for
+    callers that commit them together with their own writes; raises
+    ValueError naming the first bad entry
+    """
+    now = now_utc()
+    writes = []
+    for i, item in enumerate(results):
+        white, black, result = item.get("white"), item.get("black"), item.get("result")
+        if not white or not black or white == black:
+            raise ValueError(f"Result {i}: white and black must be two different players")
+        if result not in RESULT_SCORES:
+            raise ValueError(f"Result {i}: result must be one of {', '.join(RESULT_SCORES)}")
+        played_at = coerce_dt(item.get("played_at")) or now
+        ref = db.collection("game_results").document(item.get("id"))
+        writes.append(("set", ref, {
+            "white": white,
+            "black": black,
+            "result": result,
+            "score": RESULT_SCORES[result],
+            "played_at": played_at,
+            "period": period_of(played_at, days),
+            "source": item.get("source", source),
+            "tournament_id": item.get("tournament_id", tournament_id),
+            "recorded_at": now,
+        }))
+    return writes
+
+
+def record_results(results, days, source="game", tournament_id=None):
+    """
+    Store results ({"white": uid, "black": uid, "result": "1-0", "played_at": optional,
+    "id": optional}); raises ValueError naming the first bad entry before
+    anything is written. A result with an `id` is stored under that document
+    id, so recording it again overwrites it instead of counting it twice.
+    """
+    writes = result_writes(results, days, source, tournament_id)
+    _commit(writes)
+    return len(writes)
+
+
+def rate_periods(results, seeds, first, last, tau):
+    """
+    Run Glicko-2 over periods first..last. `results` are dicts with white,
+    black, score and period; `seeds` maps uid -> (rating, rd, volatility,
+    already rated). Returns (uids, Ratings, history points).
+    """
+    uids = sorted(set(seeds) | {r["white"] for r in results} | {r["black"] for r in results})
+    index = {uid: i for i, uid in enumerate(uids)}
+    default = (DEFAULT_RATING, DEFAULT_RD, DEFAULT_VOLATILITY, False)
+    seed = [seeds.get(uid, default) for uid in uids]
+    ratings = Ratings(len(uids), [s[0] for s in seed], [s[1] for s in seed], [s[2] for s in seed], tau=tau)
+    ratings.active[:] = [s[3] for s in seed]
+
+    results = sorted(results, key=lambda r: r["period"])
+    periods = np.array([r["period"] for r in results], dtype=np.int64)
+    white = np.array([index[r["white"]] for r in results], dtype=np.int64)
+    black = np.array([index[r["black"]] for r in results], dtype=np.int64)
+    score = np.array([r["score"] for r in results], dtype=float)
+
+    history = []
+    for period in range(first, last + 1):
+        lo, hi = np.searchsorted(periods, [period, period + 1])
+        if lo == hi and not ratings.active.any():
+            continue
+        games = ratings.update(white[lo:hi], black[lo:hi], score[lo:hi])
+        points = np.bincount(white[lo:hi], score[lo:hi], minlength=len(uids)) + \
+            np.bincount(black[lo:hi], 1.0 - score[lo:hi], minlength=len(uids))
+        played = np.flatnonzero(games)
+        columns = zip(
+            played.tolist(),
+            ratings.rating[played].round(1).tolist(),
+            ratings.rd[played].round(1).tolist(),
+            ratings.volatility[played].round(6).tolist(),
+            games[played].tolist(),
+            points[played].tolist(),
+        )
+        for i, rating, rd, volatility, count, total in columns:
+            history.append({
+                "uid": uids[i],
+                "period": period,
+                "rating": rating,
+                "rd": rd,
+                "volatility": volatility,
+                "games": count,
+                "score": total,
+            })
+    return uids, ratings, history
+
+
+def _seed_rating(user):
+    """Where a student's rating starts in a full replay"""
+    if "rating_seed" in user:
+        return user["rating_seed"]
+    # A rating typed in before any games were rated is the coach's estimate
+    if "rating_rd" not in user and user.get("rating"):
+        return user["rating"]
+    return DEFAULT_RATING
+
+
+def _students():
+    return {doc.id: doc.to_dict() for doc in db.collection("users").where("role", "==", "student").stream()}
+
+
+def _write(uids, ratings, history, students, days, games_played, replace=False):
+    now = now_utc()
+    users = db.collection("users")
+    writes = []
+    for i, uid in enumerate(uids):
+        if uid not in students or not ratings.active[i]:
+            continue
+        update = {
+            "rating": int(round(ratings.rating[i])),
+            "rating_rd": round(float(ratings.rd[i]), 1),
+            "rating_volatility": round(float(ratings.volatility[i]), 6),
+            "rating_games": games_played.get(uid, 0),
+            "rating_updated_at": now,
+        }
+        if "rating_seed" not in students[uid]:
+            update["rating_seed"] = _seed_rating(students[uid])
+        writes.append(("merge", users.document(uid), update))
+    points = {}
+    for point in history:
+        if point["uid"] not in students:
+            continue
+        start = period_start(point["period"], days)
+        doc = {key: value for key, value in point.items() if key != "uid"}
+        doc["date"] = start
+        writes.append(("set", users.document(point["uid"]).collection("rating_history")
+                       .document(start.strftime("%Y-%m-%d")), doc))
+        points.setdefault(point["uid"], []).append(doc)
+    for uid, user_points in points.items():
+        writes.extend(rollup_writes(uid, user_points, replace=replace))
+    _commit(writes)
+
+
+def _settings(config):
+    return config.get("RATING_PERIOD_DAYS", 7), config.get("RATING_TAU", 0.5)
+
+
+def update_ratings(config, now=None):
+    """Rate every period that has closed since the last run; returns a summary dict"""
+    days, tau = _settings(config)
+    last = period_of(now or now_utc(), days) - 1
+    meta_ref = db.collection("meta").document("ratings")
+    meta = meta_ref.get()
+    done = meta.to_dict().get("last_period") if meta.exists else None
+    if done is not None and done >= last:
+        return {"periods": 0, "results": 0, "players": 0}
+
+    query = db.collection("game_results")
+    if done is not None:
+        query = query.where("period", ">", done)
+    results = [r for r in (doc.to_dict() for doc in query.stream()) if r["period"] <= last]
+    if done is None:
+        first = min((r["period"] for r in results), default=last)
+    else:
+        first = done + 1
+
+    students = _students()
+    seeds = {}
+    for uid, user in students.items():
+        rated = "rating_rd" in user
+        rating = user.get("rating") or DEFAULT_RATING
+        seeds[uid] = (rating, user.get("rating_rd", DEFAULT_RD),
+                      user.get("rating_volatility", DEFAULT_VOLATILITY), rated)
+    uids, ratings, history = rate_periods(results, seeds, first, last, tau)
+
+    games_played = {uid: user.get("rating_games", 0) for uid, user in students.items()}
+    for point in history:
+        games_played[point["uid"]] = games_played.get(point["uid"], 0) + point["games"]
+    _write(uids, ratings, history, students, days, games_played)
+    meta_ref.set({"last_period": last, "updated_at": now_utc()}, merge=True)
+    return {"periods": last - first + 1, "results": len(results), "players": len(set(p["uid"] for p in history))}
+
+
+def recompute_ratings(config, now=None):
+    """
+    Replay every stored result from the students' seed ratings and rewrite
+    their ratings and complete rating history; returns a summary dict
+    """
+    days, tau = _settings(config)
+    last = period_of(now or now_utc(), days) - 1
+    results = [r for r in (doc.to_dict() for doc in db.collection("game_results").stream()) if r["period"] <= last]
+    first = min((r["period"] for r in results), default=last)
+
+    students = _students()
+    seeds = {uid: (_seed_rating(user), DEFAULT_RD, DEFAULT_VOLATILITY, False) for uid, user in students.items()}
+    uids, ratings, history = rate_periods(results, seeds, first, last, tau)
+
+    # Old points may belong to periods that no longer have games
+    deletes = []
+    for uid in students:
+        for name in ("rating_history", "rating_buckets"):
+            for doc in db.collection("users").document(uid).collection(name).stream():
+                deletes.append(("delete", doc.reference, None))
+    _commit(deletes)
+
+    games_played = {}
+    for point in history:
+        games_played[point["uid"]] = games_played.get(point["uid"], 0) + point["games"]
+    _write(uids, ratings, history, students, days, games_played, replace=True)
+    db.collection("meta").document("ratings").set({"last_period": last, "updated_at": now_utc()}, merge=True)
+    return {"periods": last - first + 1, "results": len(results), "players": len(games_played), "points": len(history)}
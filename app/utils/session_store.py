@@ -0,0 +1,85 @@
+"""
+Short-lived Chat Session State Store
+"""
+import json
+import threading
+import time
+
+
+class MemorySessionStore:
+    """Per-process dict with expiry; the default backend (single gunicorn worker)"""
+
+    def __init__(self, ttl=300):
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.Lock()
+        self._next_sweep = time.monotonic() + ttl
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= now:
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value):
+        now = time.monotonic()
+        with self._lock:
+            self._data[key] = (now + self.ttl, value)
+            if now >= self._next_sweep:
+                self._sweep(now)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def _sweep(self, now):
+        """Drop expired entries so one-off guests don't accumulate (lock held)"""
+        expired = [k for k, (expires_at, _) in self._data.items() if expires_at <= now]
+        for k in expired:
+            del self._data[k]
+        self._next_sweep = now + self.ttl
+
+
+class RedisSessionStore:
+    """Shared backend for multi-worker deployments; Redis handles expiry itself"""
+
+    def __init__(self, url, ttl=300, prefix="chat_session:"):
+        import redis  # optional dependency, only needed for this backend
+        self.ttl = ttl
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key):
+        raw = self._client.get(self.prefix + key)
+        return json.loads(raw) if raw else None
+
+    def set(self, key, value):
+        self._client.set(self.prefix + key, json.dumps(value), ex=self.ttl)
+
+    def delete(self, key):
+        self._client.delete(self.prefix + key)
+
+
+def create_session_store(config):
+    """Build the store selected by CHAT_SESSION_BACKEND ('memory' or 'redis')"""
+    ttl = config.get("CHAT_SESSION_TTL", 300)
+    backend = config.get("CHAT_SESSION_BACKEND", "memory")
+
+    if backend == "redis":
+        url = config.get("REDIS_URL")
+        if not url:
+            raise ValueError("CHAT_SESSION_BACKEND=redis requires REDIS_URL")
+        return RedisSessionStore(url, ttl=ttl)
+    if backend != "memory":
+        raise ValueError(f"Unknown CHAT_SESSION_BACKEND: {backend}")
+    return MemorySessionStore(ttl=ttl)
+
+
+def init_session_store(app):
+    app.extensions["chat_session_store"] = create_session_store(app.config)
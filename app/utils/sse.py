@@ -0,0 +1,166 @@
+"""
+Server-Sent Events Plumbing
+
+An EventLog numbers and formats events once and keeps a short backlog of
+them; any number of streams (sse_stream) write the same text from it.
+
+Event ids are "<epoch>.<seq>", the epoch being random per log. A browser that
+reconnects with Last-Event-ID resumes from the backlog. If its id belongs to
+another log (another process, or one that was restarted) or is older than
+the backlog, it gets the caller's snapshot instead. Streams send a comment
+line as a heartbeat and end after `lifetime` seconds; EventSource reconnects
+by itself.
+
+Every open stream holds one of the worker's request threads, so streams
+share a fixed number of slots per process (SSE_MAX_STREAMS); a viewer who
+finds them all taken gets 503 with Retry-After and the rest of the site
+keeps its threads. stream_response() does both.
+"""
+import json
+import secrets
+import threading
+import time
+from collections import deque
+
+from flask import Response, jsonify, stream_with_context
+
+# Browsers wait this long before reconnecting a dropped stream
+RETRY_MS = 3000
+
+
+def format_event(event_id, event, data):
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class EventLog:
+    def __init__(self, backlog=500):
+        self.epoch = secrets.token_hex(4)
+        self.seq = 0
+        self._events = deque(maxlen=backlog)     # (seq, formatted text)
+        self.cond = threading.Condition()
+
+    def event_id(self, seq):
+        return f"{self.epoch}.{seq}"
+
+    def publish(self, events):
+        """Append (event, data) pairs and wake every waiting stream"""
+        with self.cond:
+            for event, data in events:
+                self.seq += 1
+                self._events.append((self.seq, format_event(self.event_id(self.seq), event, data)))
+            if events:
+                self.cond.notify_all()
+
+    def resume_seq(self, last_event_id):
+        """Sequence number a reconnecting viewer is up to, or None if they need a snapshot"""
+        epoch, _, seq = (last_event_id or "").partition(".")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        seq = int(seq)
+        with self.cond:
+            oldest = self._events[0][0] if self._events else self.seq + 1
+            if seq > self.seq or seq < oldest - 1:
+                return None
+        return seq
+
+    def wait(self, after, timeout):
+        """
+        Formatted events after `after`, waiting up to `timeout` seconds for
+        one; [] on timeout, None if they have left the backlog
+        """
+        with self.cond:
+            if self.seq == after:
+                self.cond.wait(timeout)
+            if self.seq == after:
+                return []
+            if not self._events or self._events[0][0] > after + 1:
+                return None
+            return [text for seq, text in self._events if seq > after]
+
+
+def sse_stream(log, last_event_id, snapshot, heartbeat=15.0, lifetime=1800.0, on_heartbeat=None):
+    """
+    Generator of SSE text for one viewer. `snapshot()` returns (seq, formatted
+    event) for the full current state; `on_heartbeat` runs after each
+    heartbeat, e.g. to check a clock or reload state.
+    """
+    yield f"retry: {RETRY_MS}\n\n"
+    cursor = log.resume_seq(last_event_id)
+    if cursor is None:
+        cursor, text = snapshot()
+        yield text
+    deadline = time.monotonic() + lifetime
+    while time.monotonic() < deadline:
+        texts = log.wait(cursor, heartbeat)
+        if texts is None:
+            cursor, text = snapshot()
+            yield text
+        elif texts:
+            cursor += len(texts)
+            yield "".join(texts)
+        else:
+            yield ": heartbeat\n\n"
+            if on_heartbeat:
+                on_heartbeat()
+
+
+class StreamSlots:
+    """Counter of open streams in this process, refusing more than `limit`"""
+
+    def __init__(self, limit=20):
+        self.limit = limit
+        self.open = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self.open >= self.limit:
+                return False
+            self.open += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self.open -= 1
+
+
+class _HeldSlot:
+    """Response body that gives its slot back exactly once, however the stream ends"""
+
+    def __init__(self, slots, body):
+        self._slots = slots
+        self._body = body
+        self._held = True
+
+    def __iter__(self):
+        try:
+            yield from self._body
+        finally:
+            self.close()
+
+    def close(self):
+        if self._held:
+            self._held = False
+            self._slots.release()
+            self._body.close()
+
+
+def stream_response(slots, events, retry_after=30):
+    """
+    text/event-stream Response for the `events` generator, or 503 with
+    Retry-After when `slots` are all taken (call inside the request)
+    """
+    if not slots.acquire():
+        response = jsonify({"success": False, "error": "Too many live viewers, please try again shortly"})
+        response.status_code = 503
+        response.headers["Retry-After"] = str(retry_after)
+        return response
+    response = Response(_HeldSlot(slots, stream_with_context(events)), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # Keep nginx from buffering the stream
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+def init_sse(app):
+    app.extensions["sse_slots"] = StreamSlots(app.config.get("SSE_MAX_STREAMS", 20))
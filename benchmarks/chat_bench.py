@@ -0,0 +1,185 @@
+"""
+Chat Load-Test Harness
+
+Replays benchmarks/chat_corpus.json against /chat through the Flask test
+client with Firestore stubbed out, and reports p50/p95/p99 latency per intent
+plus overall throughput. Each message's label is checked against the intent
+/chat actually recorded, and the run stops on a mismatch so the timings stay
+attributed to the right branch. Every FAQ_ENTRIES question must likewise get
+its own answer from the FAQ index rather than a keyword branch. Exits non-zero when any intent's p95
+regresses past the stored baseline, so it can gate CI.
+
+    python benchmarks/chat_bench.py
+    python benchmarks/chat_bench.py --update-baseline
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import types
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+
+class _StubQuery:
+    """Answers every Firestore call with 'nothing there' and never touches the network"""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def get(self, *args, **kwargs):
+        return types.SimpleNamespace(exists=False, to_dict=lambda: {})
+
+    def stream(self, *args, **kwargs):
+        return iter(())
+
+
+class _IntentRecorder:
+    """Stands in for ChatAnalytics and remembers the last intent /chat recorded"""
+
+    def __init__(self):
+        self.last = None
+
+    def record(self, intent, message=None):
+        self.last = intent
+
+
+def install_firestore_stub():
+    stub = types.ModuleType("app.utils.firebase_init")
+    stub.db = _StubQuery()
+    sys.modules["app.utils.firebase_init"] = stub
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def run(corpus, iterations):
+    install_firestore_stub()
+    from app import create_app
+    from app.config import Config
+
+    class BenchConfig(Config):
+        DEBUG = False
+        TESTING = True
+        CHAT_REPLY_DELAY = (0, 0)
+        RATE_LIMITS = {}
+
+    app = create_app(BenchConfig)
+    recorder = _IntentRecorder()
+    app.extensions["chat_analytics"] = recorder
+    client = app.test_client()
+
+    # Warm up imports, regex caches and the FAQ index, and check every label
+    mislabelled = []
+    for item in corpus:
+        recorder.last = None
+        client.post("/chat", json={"message": item["message"]})
+        if recorder.last != item["intent"]:
+            mislabelled.append(f"{item['message']!r}: labelled {item['intent']}, matched {recorder.last}")
+    if mislabelled:
+        raise SystemExit("Corpus labels disagree with /chat:\n  " + "\n  ".join(mislabelled))
+
+    from app.api.chat import FAQ_ENTRIES, format_response
+    unreachable = []
+    for questions, answer in FAQ_ENTRIES:
+        for question in questions:
+            recorder.last = None
+            reply = client.post("/chat", json={"message": question}).get_json()["reply"]
+            if recorder.last != "faq" or format_response(answer) not in reply:
+                unreachable.append(f"{question!r}: answered as {recorder.last}")
+    if unreachable:
+        raise SystemExit("FAQ questions that never reach their answer:\n  " + "\n  ".join(unreachable))
+
+    samples = defaultdict(list)
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for item in corpus:
+            t0 = time.perf_counter()
+            resp = client.post("/chat", json={"message": item["message"]})
+            elapsed = (time.perf_counter() - t0) * 1000.0
+            if resp.status_code != 200:
+                raise SystemExit(f"/chat returned {resp.status_code} for {item['message']!r}")
+            samples[item["intent"]].append(elapsed)
+    total_time = time.perf_counter() - started
+
+    report = {}
+    for intent, values in samples.items():
+        values.sort()
+        report[intent] = {
+            "n": len(values),
+            "p50_ms": round(percentile(values, 50), 3),
+            "p95_ms": round(percentile(values, 95), 3),
+            "p99_ms": round(percentile(values, 99), 3),
+        }
+    total = sum(len(v) for v in samples.values())
+    return report, total, total_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /chat intent matching latency")
+    parser.add_argument("--corpus", default=os.path.join(HERE, "chat_corpus.json"))
+    parser.add_argument("--baseline", default=os.path.join(HERE, "chat_baseline.json"))
+    parser.add_argument("--iterations", type=int, default=20, help="passes over the corpus")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="allowed p95 slowdown vs baseline (0.5 = 50%%)")
+    parser.add_argument("--floor-ms", type=float, default=0.5,
+                        help="ignore regressions smaller than this, in ms (timer noise)")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    with open(args.corpus, encoding="utf-8") as f:
+        corpus = json.load(f)
+
+    report, total, total_time = run(corpus, args.iterations)
+
+    print(f"{'intent':<14}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for intent in sorted(report):
+        r = report[intent]
+        print(f"{intent:<14}{r['n']:>6}{r['p50_ms']:>10.3f}{r['p95_ms']:>10.3f}{r['p99_ms']:>10.3f}")
+    print(f"\n{total} requests in {total_time:.2f}s -> {total / total_time:.0f} req/s")
+
+    if args.update_baseline:
+        baseline = {intent: r["p95_ms"] for intent, r in report.items()}
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"p95_ms": baseline}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline found; run with --update-baseline to create one.")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)["p95_ms"]
+
+    regressions = []
+    for intent, r in report.items():
+        base = baseline.get(intent)
+        if base is None:
+            continue
+        limit = max(base * (1 + args.tolerance), base + args.floor_ms)
+        if r["p95_ms"] > limit:
+            regressions.append(f"{intent}: p95 {r['p95_ms']:.3f}ms > {limit:.3f}ms (baseline {base:.3f}ms)")
+
+    if regressions:
+        print("\nREGRESSION:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+Batch Evaluation Benchmark
+
+Positions/second for app.chess.batch_eval at several batch sizes: the NumPy
+path against evaluate_row(), which computes the same terms one position at a
+time. Both include FEN parsing. Positions come from random playouts, so every
+batch mixes openings, middlegames and endgames. The batch size where the
+speed-up passes 1.0x is what SCALAR_BELOW in batch_eval should be.
+
+    python benchmarks/eval_bench.py
+    python benchmarks/eval_bench.py --sizes 1 64 4096 --repeat 5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.chess import Board  # noqa: E402
+from app.chess.batch_eval import BLOCK, _evaluate_block, evaluate_row, parse_placements  # noqa: E402
+
+
+def sample_fens(count, seed=7):
+    rng = random.Random(seed)
+    fens = []
+    while len(fens) < count:
+        board = Board()
+        for _ in range(rng.randrange(10, 120)):
+            moves = board.legal_moves()
+            if not moves:
+                break
+            board.push(rng.choice(moves))
+            fens.append(board.fen())
+    return fens[:count]
+
+
+def vectorized(fens):
+    pieces, _ = parse_placements(fens)
+    return [_evaluate_block(pieces[i:i + BLOCK]) for i in range(0, len(pieces), BLOCK)]
+
+
+def scalar(fens):
+    pieces, _ = parse_placements(fens)
+    return [evaluate_row(row) for row in pieces]
+
+
+def best_time(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batch position evaluation")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 16, 128, 1024, 8192])
+    parser.add_argument("--repeat", type=int, default=3, help="runs per size; the fastest is reported")
+    args = parser.parse_args()
+
+    fens = sample_fens(max(args.sizes))
+    print(f"{'batch':>7} {'NumPy pos/s':>14} {'evaluate_row pos/s':>19} {'speed-up':>9}")
+    for size in args.sizes:
+        batch = fens[:size]
+        numpy_time = best_time(lambda: vectorized(batch), args.repeat)
+        row_time = best_time(lambda: scalar(batch), args.repeat)
+        print(f"{size:>7} {size / numpy_time:>14,.0f} {size / row_time:>19,.0f} {row_time / numpy_time:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
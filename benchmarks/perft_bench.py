@@ -0,0 +1,110 @@
+"""
+Perft Benchmark
+
+Runs the app.chess perft suite, prints nodes/second per position and appends
+the run to benchmarks/perft_history.jsonl. Exits non-zero when a position
+returns the wrong node count, or when overall nps falls more than
+--tolerance below the median of the last few comparable runs.
+
+By default the transposition cache is off so the number tracks the raw move
+generator hot loop; pass --cache / --workers to benchmark those paths.
+
+    python benchmarks/perft_bench.py                 # depth 4, raw generator
+    python benchmarks/perft_bench.py --depth 5 --cache --workers 0
+    python benchmarks/perft_bench.py --no-record     # measure without touching history
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+from app.chess.perft import run_suite  # noqa: E402
+
+
+def git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                             capture_output=True, text=True, timeout=5)
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def comparable(entry, run):
+    """Only compare runs measuring the same thing on the same kind of machine"""
+    keys = ("depth", "cache", "workers", "python", "machine")
+    return all(entry.get(k) == run.get(k) for k in keys)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the chess move generator with perft")
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--cache", action="store_true", help="use the Zobrist perft cache")
+    parser.add_argument("--workers", type=int, default=1, help="processes to split root moves over (0 = all cores)")
+    parser.add_argument("--history", default=os.path.join(HERE, "perft_history.jsonl"))
+    parser.add_argument("--window", type=int, default=5, help="previous runs the median is taken over")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed nps drop vs the recent median (0.2 = 20%%)")
+    parser.add_argument("--no-record", action="store_true", help="don't append this run to the history")
+    args = parser.parse_args()
+
+    ok, results = run_suite(args.depth, use_cache=args.cache, workers=args.workers)
+
+    nodes = sum(r["nodes"] for r in results)
+    seconds = sum(r["seconds"] for r in results)
+    nps = round(nodes / seconds) if seconds > 0 else 0
+    print(f"\n{nodes} nodes in {seconds:.2f}s -> {nps} nps")
+
+    run = {
+        "ts": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "rev": git_revision(),
+        "depth": args.depth,
+        "cache": args.cache,
+        "workers": args.workers or os.cpu_count(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "nodes": nodes,
+        "seconds": round(seconds, 3),
+        "nps": nps,
+        "positions": {r["name"]: r["nps"] for r in results},
+    }
+
+    if not ok:
+        print("Node count mismatch - move generator is broken, not recording this run.")
+        return 1
+
+    previous = [e for e in load_history(args.history) if comparable(e, run)][-args.window:]
+    if not args.no_record:
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(run) + "\n")
+
+    if not previous:
+        print("No comparable history yet; this run is the reference.")
+        return 0
+
+    reference = statistics.median(e["nps"] for e in previous)
+    change = (nps - reference) / reference
+    print(f"vs median of last {len(previous)} runs ({reference:.0f} nps): {change:+.1%}")
+    if change < -args.tolerance:
+        print("REGRESSION: move generator is slower than recent runs.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
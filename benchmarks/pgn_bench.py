@@ -0,0 +1,147 @@
+"""
+PGN Reader Benchmark
+
+Builds a synthetic PGN file (a few hundred random games replicated with
+varied headers until it reaches --size-mb) and reports games/second for:
+
+    scan       every game's headers, movetext left undecoded
+    filter     header filter only (min Elo), non-matching games skipped
+    parse      headers + SAN decoded to 16-bit moves (first --parse-games games)
+    parallel   filter + full parse across a process pool, whole file
+
+Filtered runs report games/s over every game read, not just the matches.
+
+    python benchmarks/pgn_bench.py                   # 300 MB file, all cores
+    python benchmarks/pgn_bench.py --size-mb 50 --workers 4
+
+The generated file is kept (benchmarks/bench.pgn by default) and reused while
+it is at least the requested size.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+from app.chess import Board  # noqa: E402
+from app.chess.pgn import HeaderFilter, map_games, read_games  # noqa: E402
+
+RESULTS = ("1-0", "0-1", "1/2-1/2")
+
+
+def random_movetext(rng, max_plies=120):
+    """Random legal game as PGN movetext, with the odd comment, NAG and variation"""
+    board = Board()
+    parts = []
+    for ply in range(max_plies):
+        moves = board.legal_moves()
+        if not moves:
+            break
+        move = rng.choice(moves)
+        if ply % 2 == 0:
+            parts.append(f"{ply // 2 + 1}.")
+        parts.append(board.san(move))
+        roll = rng.random()
+        if roll < 0.03:
+            parts.append("{a comment}")
+        elif roll < 0.05:
+            parts.append("$1")
+        elif roll < 0.06:
+            parts.append(f"({board.san(rng.choice(moves))})")
+        board.push(move)
+    return " ".join(parts)
+
+
+def wrap(text, width=80):
+    lines, line = [], ""
+    for word in text.split(" "):
+        if line and len(line) + 1 + len(word) > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    lines.append(line)
+    return "\n".join(lines)
+
+
+def generate(path, size_mb, seed_games=300):
+    rng = random.Random(2024)
+    print(f"Generating {size_mb} MB of PGN at {path} ...")
+    movetexts = [wrap(random_movetext(rng)) for _ in range(seed_games)]
+    target = size_mb * 1024 * 1024
+    written = 0
+    n = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < target:
+            result = rng.choice(RESULTS)
+            game = (
+                f'[Event "Bench Open {n % 97}"]\n'
+                f'[Site "?"]\n'
+                f'[Date "2024.{n % 12 + 1:02d}.{n % 28 + 1:02d}"]\n'
+                f'[Round "{n % 9 + 1}"]\n'
+                f'[White "Player {rng.randrange(5000)}"]\n'
+                f'[Black "Player {rng.randrange(5000)}"]\n'
+                f'[Result "{result}"]\n'
+                f'[WhiteElo "{rng.randrange(1000, 2800)}"]\n'
+                f'[BlackElo "{rng.randrange(1000, 2800)}"]\n'
+                f'\n{movetexts[n % seed_games]} {result}\n\n'
+            )
+            f.write(game)
+            written += len(game)
+            n += 1
+    return n
+
+
+def timed(label, fn, total=None):
+    """Run fn() (which returns the games it produced) and print games/s over the games it read"""
+    started = time.perf_counter()
+    count = fn()
+    elapsed = time.perf_counter() - started
+    read = total if total is not None else count
+    rate = read / elapsed if elapsed else float("inf")
+    kept = f"  ({count} matched)" if total is not None else ""
+    print(f"  {label:<10} {read:>9} games in {elapsed:7.2f}s  {rate:>12,.0f} games/s{kept}")
+    return count
+
+
+def _ply_count(game):
+    return len(game.moves)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the memory-mapped PGN reader")
+    parser.add_argument("--size-mb", type=int, default=300)
+    parser.add_argument("--file", default=os.path.join(HERE, "bench.pgn"))
+    parser.add_argument("--min-elo", type=int, default=2600, help="filter used by filter/parallel")
+    parser.add_argument("--parse-games", type=int, default=2000, help="games fully decoded in the single-process run")
+    parser.add_argument("--workers", type=int, default=0, help="pool size for the parallel run (0 = all cores)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.file) or os.path.getsize(args.file) < args.size_mb * 1024 * 1024:
+        generate(args.file, args.size_mb)
+    size_mb = os.path.getsize(args.file) / (1024 * 1024)
+    workers = args.workers or os.cpu_count() or 1
+    header_filter = HeaderFilter(min_elo=args.min_elo)
+    print(f"{args.file}: {size_mb:.0f} MB, {workers} workers")
+
+    total = timed("scan", lambda: sum(1 for _ in read_games(args.file)))
+    timed("filter", lambda: sum(1 for _ in read_games(args.file, header_filter)), total)
+
+    def parse():
+        n = 0
+        for game in read_games(args.file):
+            game.moves
+            n += 1
+            if n >= args.parse_games:
+                break
+        return n
+    timed("parse", parse)
+    timed("parallel", lambda: sum(1 for _ in map_games(args.file, _ply_count, header_filter, workers)), total)
+
+
+if __name__ == "__main__":
+    main()
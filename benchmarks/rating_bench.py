@@ -0,0 +1,65 @@
+"""
+Rating Recompute Benchmark
+
+Times a full Glicko-2 replay (app.utils.ratings.rate_periods, no Firestore)
+over synthetic results: players of spread-out strengths play random
+opponents, with results drawn from the Elo expectation.
+
+    python benchmarks/rating_bench.py
+    python benchmarks/rating_bench.py --players 5000 --games 200000 --periods 260
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, HERE)
+
+from chat_bench import install_firestore_stub  # noqa: E402
+
+
+def synthetic_results(players, games, periods, seed=11):
+    rng = np.random.default_rng(seed)
+    strength = rng.normal(1500, 300, players)
+    white = rng.integers(0, players, games)
+    black = (white + rng.integers(1, players, games)) % players
+    expected = 1 / (1 + 10 ** ((strength[black] - strength[white]) / 400))
+    roll = rng.random(games)
+    score = np.where(roll < expected - 0.1, 1.0, np.where(roll < expected + 0.1, 0.5, 0.0))
+    period = np.sort(rng.integers(0, periods, games))
+    results = [
+        {"white": f"u{w}", "black": f"u{b}", "score": float(s), "period": int(p)}
+        for w, b, s, p in zip(white, black, score, period)
+    ]
+    return results, strength
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark a full Glicko-2 rating recompute")
+    parser.add_argument("--players", type=int, default=2000)
+    parser.add_argument("--games", type=int, default=100000)
+    parser.add_argument("--periods", type=int, default=156, help="rating periods (156 weeks = 3 years)")
+    args = parser.parse_args()
+
+    install_firestore_stub()
+    from app.utils.ratings import rate_periods
+
+    results, strength = synthetic_results(args.players, args.games, args.periods)
+    started = time.perf_counter()
+    uids, ratings, history = rate_periods(results, {}, 0, args.periods - 1, tau=0.5)
+    elapsed = time.perf_counter() - started
+
+    order = [int(uid[1:]) for uid in uids]
+    corr = np.corrcoef(strength[order], ratings.rating)[0, 1]
+    print(f"{args.games} games, {args.players} players, {args.periods} periods: {elapsed:.2f}s "
+          f"({args.games / elapsed:,.0f} games/s), {len(history)} history points")
+    print(f"rating vs true strength correlation: {corr:.3f}, mean RD {ratings.rd.mean():.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Swiss Pairing Benchmark
+
+Plays a whole Swiss event in memory (app.tournaments, no Firestore): players
+of spread-out strengths, results drawn from the Elo expectation, every round
+paired by pair_round. Reports the time per pairing and checks the event for
+rematches, colour imbalance and players given one colour three times running.
+
+    python benchmarks/tournament_bench.py
+    python benchmarks/tournament_bench.py --players 500 --rounds 11
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.tournaments import Tournament  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Swiss pairing on a simulated event")
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=9)
+    parser.add_argument("--seed", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    strength = rng.normal(1500, 300, args.players)
+    tournament = Tournament("bench", "Bench Open", rounds_planned=args.rounds)
+    for i, rating in enumerate(strength):
+        tournament.add_player(i, f"P{i}", int(rating))
+
+    times = []
+    for number in range(1, args.rounds + 1):
+        started = time.perf_counter()
+        rnd = tournament.pair_next_round()
+        times.append(time.perf_counter() - started)
+        for board, game in enumerate(rnd["boards"], 1):
+            expected = 1 / (1 + 10 ** ((strength[game["black"]] - strength[game["white"]]) / 400))
+            roll = rng.random()
+            result = "1-0" if roll < expected - 0.1 else "1/2-1/2" if roll < expected + 0.1 else "0-1"
+            tournament.set_result(number, board, result)
+
+    seen, rematches, colours = set(), 0, {}
+    for rnd in tournament.rounds:
+        for game in rnd["boards"]:
+            pair = frozenset((game["white"], game["black"]))
+            rematches += pair in seen
+            seen.add(pair)
+            colours[game["white"]] = colours.get(game["white"], "") + "w"
+            colours[game["black"]] = colours.get(game["black"], "") + "b"
+    imbalanced = sum(1 for c in colours.values() if abs(c.count("w") - c.count("b")) > 1)
+    three_running = sum(1 for c in colours.values() if "www" in c or "bbb" in c)
+
+    times = np.array(times) * 1000
+    print(f"{args.players} players, {args.rounds} rounds: pairing {times.mean():.1f} ms mean, "
+          f"{times.max():.1f} ms worst")
+    print(f"rematches: {rematches}, players with colour difference > 1: {imbalanced}, "
+          f"same colour three times running: {three_running}")
+    leader = tournament.standings_table()[0]
+    print(f"winner: {leader['name']} ({leader['rating']}) {leader['score']} pts, "
+          f"Buchholz {leader['buchholz']}, SB {leader['sonneborn_berger']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -149,7 +149,8 @@ async function sendMessage() {
             body: JSON.stringify({ message })
         });
 
-        if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
+        // 429 (rate limited) still carries a reply to show
+        if (!response.ok && response.status !== 429) throw new Error(`HTTP error! status: ${response.status}`);
         const data = await response.json();
 
         // Remove typing indicator
@@ -14,6 +14,11 @@
       this.task = 'move_piece';
       this.correctMoves = [];
       this.targetSquare = null;
+      this.fen = null;
+      // { from: [{ to, special }] } from the server move generator; null until known
+      this.legalMoves = null;
+      // Endgame drills: true while the tablebase is choosing Black's reply
+      this.awaitingReply = false;
 
       this.unicode = {
         'wp': '♙', 'wr': '♖', 'wn': '♘', 'wb': '♗', 'wq': '♕', 'wk': '♔',
@@ -85,6 +90,8 @@
     }
 
     onSquareClick(square) {
+      if (this.awaitingReply) return;
+
       // A. Selecting a piece
       if (this.selected === null) {
         if (this.pieces[square]) {
@@ -147,6 +154,9 @@
         
         delete this.pieces[from];
         this.selected = null;
+        // The precomputed moves describe the lesson's starting position only
+        this.legalMoves = null;
+        this.fen = null;
         this.render();
         
         if (this.onMoveAccepted) {
@@ -177,7 +187,7 @@
       }
 
       // For free practice, any legal move is valid
-      if (this.task === 'free_practice' || this.task === 'none') {
+      if (this.task === 'free_practice' || this.task === 'none' || this.task === 'endgame') {
         return { valid: true };
       }
 
@@ -200,7 +210,10 @@
       // Check for special moves
       let special = null;
       
-      if (piece === 'wp' && to[1] === '8') {
+      if (this.legalMoves) {
+        const entry = (this.legalMoves[from] || []).find(m => m.to === to);
+        special = (entry && entry.special) || null;
+      } else if (piece === 'wp' && to[1] === '8') {
         special = 'promotion';
       } else if (piece === 'wk' && from === 'e1') {
         if (to === 'g1') special = 'castle_kingside';
@@ -237,6 +250,74 @@
     }
 
     legalMovesFor(piece, from) {
+      // Server-computed moves know about checks, pins and castling rights
+      if (this.legalMoves) {
+        return (this.legalMoves[from] || []).map(m => m.to);
+      }
+      return this.approximateMovesFor(piece, from);
+    }
+
+    async fetchLegalMoves(fen) {
+      try {
+        const res = await fetch('/learn/moves?fen=' + encodeURIComponent(fen));
+        if (!res.ok) return;
+        const data = await res.json();
+        // Ignore the answer if the lesson changed while we were waiting
+        if (data.success && this.fen === fen) {
+          this.legalMoves = data.moves;
+        }
+      } catch (e) {
+        console.error('Could not load legal moves:', e);
+      }
+    }
+
+    // FEN of the pieces on the board; lesson boards never keep castling or en passant rights
+    toFen(turn) {
+      const rows = [];
+      for (let rank = 8; rank >= 1; rank--) {
+        let row = '';
+        let empty = 0;
+        for (let file = 0; file < 8; file++) {
+          const piece = this.pieces[this.files[file] + rank];
+          if (!piece) { empty++; continue; }
+          if (empty) { row += empty; empty = 0; }
+          row += piece[0] === 'w' ? piece[1].toUpperCase() : piece[1];
+        }
+        rows.push(empty ? row + empty : row);
+      }
+      return `${rows.join('/')} ${turn} - - 0 1`;
+    }
+
+    // Endgame drills: play the tablebase's longest defence for Black, then
+    // load White's legal moves. Resolves to the /learn/endgame answer, or null.
+    async playEndgameReply() {
+      const lesson = this.lesson;
+      this.awaitingReply = true;
+      try {
+        const res = await fetch('/learn/endgame?fen=' + encodeURIComponent(this.toFen('b')));
+        const data = await res.json();
+        // Ignore the answer if the lesson changed while we were waiting
+        if (!data.success || this.lesson !== lesson) return null;
+        if (data.best) {
+          const from = data.best.uci.slice(0, 2);
+          const to = data.best.uci.slice(2, 4);
+          this.pieces[to] = this.pieces[from];
+          delete this.pieces[from];
+          this.fen = this.toFen('w');
+          this.render();
+          this.fetchLegalMoves(this.fen);
+        }
+        return data;
+      } catch (e) {
+        console.error('Could not load the endgame reply:', e);
+        return null;
+      } finally {
+        this.awaitingReply = false;
+      }
+    }
+
+    // Rough local rules, only used until the server moves arrive (or if that request fails)
+    approximateMovesFor(piece, from) {
       const file = from[0];
       const rank = parseInt(from[1], 10);
       const results = [];
@@ -343,13 +424,20 @@
       });
     }
 
-    setLesson(id, task = 'move_piece', correctMoves = [], targetSquare = null) {
+    setLesson(id, task = 'move_piece', correctMoves = [], targetSquare = null, fen = null, legalMoves = null) {
       this.lesson = id;
       this.task = task;
       this.correctMoves = correctMoves;
       this.targetSquare = targetSquare;
+      this.fen = fen;
+      this.legalMoves = legalMoves;
+      this.awaitingReply = false;
       this.selected = null;
       this.render();
+
+      if (fen && !legalMoves) {
+        this.fetchLegalMoves(fen);
+      }
     }
   }
 
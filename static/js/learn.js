@@ -1,16 +1,8 @@
 /**
  * Interactive Chess Learning System
- * Loads lessons from Firestore and manages learning progress
+ * Loads the lesson bundle from /learn/lessons.json and manages learning progress
  */
 
-import { db } from './firebase.js';
-import {
-  collection,
-  getDocs,
-  query,
-  orderBy
-} from "https://www.gstatic.com/firebasejs/10.7.1/firebase-firestore.js";
-
 document.addEventListener('DOMContentLoaded', async () => {
   const boardEl = document.getElementById('board');
   const solutionEl = document.getElementById('solution');
@@ -38,26 +30,15 @@ document.addEventListener('DOMContentLoaded', async () => {
     }
   }
 
-  // Load lessons from Firestore
-  async function loadLessonsFromFirestore() {
+  // Load the lesson bundle (cached server-side, correctMoves already as [from, to] pairs)
+  async function loadLessonBundle() {
     try {
-      const q = query(collection(db, 'lessons'), orderBy('id'));
-      const snapshot = await getDocs(q);
-
-      lessons = snapshot.docs.map(doc => {
-        const data = doc.data();
-        
-        // Convert correctMoves array format from Firestore
-        if (data.correctMoves && data.correctMoves.length > 0) {
-          data.correctMoves = data.correctMoves.map(move => [move.from, move.to]);
-        } else {
-          data.correctMoves = [];
-        }
-        
-        return data;
-      });
+      const res = await fetch(boardEl.dataset.lessonsUrl || '/learn/lessons.json');
+      if (!res.ok) throw new Error(`HTTP ${res.status}`);
+      const data = await res.json();
+      lessons = data.lessons || [];
 
-      console.log(`Loaded ${lessons.length} lessons from Firestore`);
+      console.log(`Loaded ${lessons.length} lessons`);
     } catch (error) {
       console.error('Error loading lessons:', error);
       solutionEl.innerHTML = `
@@ -160,6 +141,9 @@ document.addEventListener('DOMContentLoaded', async () => {
       case 'free_practice':
         taskText = '🎓 Free practice mode';
         break;
+      case 'endgame':
+        taskText = '♚ Task: Checkmate against the best defence';
+        break;
       default:
         taskText = '';
     }
@@ -180,7 +164,9 @@ document.addEventListener('DOMContentLoaded', async () => {
       lesson.id, 
       lesson.task || 'move_piece', 
       lesson.correctMoves || [], 
-      lesson.targetSquare || null
+      lesson.targetSquare || null,
+      lesson.fen || null,
+      lesson.legalMoves || null
     );
 
     // Update navigation buttons
@@ -210,9 +196,43 @@ document.addEventListener('DOMContentLoaded', async () => {
     });
   }
 
+  // Endgame drills go on move by move: Black answers from the tablebase until mated
+  function handleEndgameReply(lesson, reply) {
+    if (!reply || lessons[current] !== lesson) return;
+
+    if (reply.best) {
+      const outlook = reply.best.result === 'loss'
+        ? `Mate in ${reply.best.plies / 2} with best play.`
+        : 'The win has slipped away. Reset the lesson and try again.';
+      solutionEl.className = 'solution-text';
+      solutionEl.innerHTML = `
+        <strong style="font-size: 22px; color: #d4a24f;">${lesson.title}</strong>
+        <br><br>
+        Black played ${reply.best.san}. ${outlook}
+      `;
+    } else if (reply.result === 'loss') {
+      solutionEl.className = 'solution-text success';
+      solutionEl.innerHTML = `
+        <strong style="font-size: 22px; color: #4caf50;">✅ Checkmate!</strong>
+        <br><br>
+        ${lesson.text}
+      `;
+      showFeedback('success', 'Checkmate! 🎉', 'You beat the best defence!');
+      markLessonComplete(lesson.id);
+    } else {
+      solutionEl.className = 'solution-text error';
+      showFeedback('error', 'Stalemate! 💪', 'Reset the lesson and try again');
+    }
+  }
+
   // Handle successful moves
   board.onMoveAccepted = ({ piece, from, to, lesson }) => {
     const currentLesson = lessons[current];
+
+    if (currentLesson.task === 'endgame') {
+      board.playEndgameReply().then(reply => handleEndgameReply(currentLesson, reply));
+      return;
+    }
     
     solutionEl.className = 'solution-text success';
     
@@ -285,6 +305,7 @@ document.addEventListener('DOMContentLoaded', async () => {
         case 'check': taskText = '✅ Task: Give check'; break;
         case 'checkmate': taskText = '♔ Task: Deliver checkmate!'; break;
         case 'free_practice': taskText = '🎓 Free practice mode'; break;
+        case 'endgame': taskText = '♚ Task: Checkmate against the best defence'; break;
       }
       
       solutionEl.innerHTML = `
@@ -298,10 +319,34 @@ document.addEventListener('DOMContentLoaded', async () => {
 
   // Initialize the system
   console.log('Initializing Chess Learning System...');
-  await loadLessonsFromFirestore();
+
+  // Draw the inlined first lesson straight away, before the bundle arrives
+  const firstLessonEl = document.getElementById('first-lesson');
+  if (firstLessonEl) {
+    try {
+      const firstLesson = JSON.parse(firstLessonEl.textContent);
+      if (firstLesson) {
+        lessons = [firstLesson];
+        loadIndex(0);
+      }
+    } catch (e) {
+      console.error('Error reading inlined lesson:', e);
+    }
+  }
+
+  const shownBeforeLoad = lessons.length > 0;
+  await loadLessonBundle();
   
   if (lessons.length > 0) {
-    loadIndex(0);
+    // Don't yank the learner back if they already started on the inlined lesson
+    if (!shownBeforeLoad) {
+      loadIndex(0);
+    } else {
+      updateProgress();
+      nextBtn.disabled = current === lessons.length - 1;
+      const badge = document.querySelector('.lesson-badge');
+      if (badge) badge.textContent = `Lesson ${lessons[current].id} of ${lessons.length}`;
+    }
   } else {
     solutionEl.innerHTML = `
       <strong style="color: #f44336;">No Lessons Found</strong>
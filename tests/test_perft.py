@@ -0,0 +1,33 @@
+"""
+Shallow perft checks for the move generator, against the published node
+counts in PERFT_SUITE. Depth 3 keeps the whole file to a few seconds.
+
+    python -m pytest tests/test_perft.py
+"""
+import pytest
+
+from app.chess.board import Board
+from app.chess.perft import PERFT_SUITE, divide, perft, perft_cached
+
+DEPTH = 3
+
+
+@pytest.mark.parametrize("name, fen, expected", PERFT_SUITE, ids=[name for name, _, _ in PERFT_SUITE])
+def test_perft(name, fen, expected):
+    board = Board(fen)
+    for depth in range(1, DEPTH + 1):
+        assert perft(board, depth) == expected[depth - 1]
+    # push/pop must leave the board exactly as it started
+    assert board.fen() == Board(fen).fen()
+
+
+@pytest.mark.parametrize("name, fen, expected", PERFT_SUITE, ids=[name for name, _, _ in PERFT_SUITE])
+def test_perft_cached(name, fen, expected):
+    assert perft_cached(Board(fen), DEPTH, {}) == expected[DEPTH - 1]
+
+
+def test_divide_sums_to_perft():
+    name, fen, expected = PERFT_SUITE[1]
+    counts = divide(Board(fen), DEPTH)
+    assert len(counts) == expected[0]
+    assert sum(counts.values()) == expected[DEPTH - 1]